@@ -0,0 +1 @@
+"""Benchmarks for the Smarter Kettle and Coffee integration."""
@@ -0,0 +1,79 @@
+"""Fixtures and result reporting for the benchmarks."""
+
+import json
+import platform
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_DEVICE_COUNTS = "10,100,1000"
+# Every emulated kettle runs a stream thread and a timer thread in the client
+DEFAULT_CLOUD_DEVICE_COUNTS = "10,100"
+
+_results: list[dict[str, Any]] = []
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the benchmark options."""
+    group = parser.getgroup("smarter benchmarks")
+    group.addoption(
+        "--bench-output",
+        default=DEFAULT_OUTPUT,
+        help="file the benchmark results are written to, as JSON",
+    )
+    group.addoption(
+        "--bench-devices",
+        default=DEFAULT_DEVICE_COUNTS,
+        help="comma separated numbers of fake devices to benchmark with",
+    )
+    group.addoption(
+        "--bench-cloud-devices",
+        default=DEFAULT_CLOUD_DEVICE_COUNTS,
+        help="comma separated numbers of kettles to emulate in the cloud benchmark",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Parametrize benchmarks that take `device_count` or `cloud_device_count`."""
+    for fixture, option in (
+        ("device_count", "--bench-devices"),
+        ("cloud_device_count", "--bench-cloud-devices"),
+    ):
+        if fixture in metafunc.fixturenames:
+            counts = metafunc.config.getoption(option)
+            metafunc.parametrize(fixture, [int(count) for count in counts.split(",")])
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Write the collected results."""
+    if not _results:
+        return
+
+    Path(session.config.getoption("--bench-output")).write_text(
+        json.dumps(
+            {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": _results,
+            },
+            indent=2,
+        )
+    )
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading of custom integrations."""
+    yield
+
+
+@pytest.fixture
+def bench_results():
+    """Return the list benchmark results are appended to."""
+    return _results
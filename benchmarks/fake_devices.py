@@ -0,0 +1,71 @@
+"""Fake Smarter devices with a scripted status stream."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+from smarter_client.managed_devices.base import BaseDevice
+
+FAKE_USER_ID = "bench_user"
+
+
+def initial_status(index: int) -> dict[str, Any]:
+    """Return the status a fake kettle starts with."""
+    return {
+        "device_model": "BENCH_KETTLE",
+        "firmware_version": "0.0.0",
+        "state": "Idle",
+        "boil_temperature": 100.0,
+        "target_temperature": 100.0,
+        "water_temperature": 20.0 + index % 10,
+        "water_level": 50,
+        "kettle_is_present": True,
+        "calibrated": True,
+        "keep_warm_time": 5.0,
+    }
+
+
+class FakeDevice(BaseDevice):
+    """
+    Kettle that never talks to the Smarter API.
+
+    Status pushes are replayed with `push`, which calls the subscribed handlers on
+    the calling thread, like the client's stream thread does.
+    """
+
+    def __init__(self, index: int) -> None:
+        """Create fake kettle number `index`, without fetching it."""
+        self.device = SimpleNamespace(
+            identifier=f"bench_kettle{index}",
+            status=initial_status(index),
+            settings={},
+            commands={},
+        )
+        self.friendly_name = f"Bench Kettle {index}"
+        self.user_id = FAKE_USER_ID
+        self.type = "kettle"
+        self._handlers: set[Callable[[dict], None]] = set()
+        self.last_push: float | None = None
+
+    def subscribe_status(self, handler: Callable[[dict], None] = lambda x: None):
+        """Subscribe a handler to the scripted stream."""
+        self._handlers.add(handler)
+
+    def unsubscribe_status(self, handler: Callable[[dict], None]):
+        """Unsubscribe a handler from the scripted stream."""
+        self._handlers.discard(handler)
+
+    def push(self, **changes: Any) -> None:
+        """Replace the status with a changed copy and notify the handlers."""
+        self.device.status = {**self.device.status, **changes}
+        self.last_push = time.perf_counter()
+        for handler in list(self._handlers):
+            handler(self.device.status)
+
+
+def make_devices(count: int) -> list[FakeDevice]:
+    """Return `count` fake kettles."""
+    return [FakeDevice(index) for index in range(count)]
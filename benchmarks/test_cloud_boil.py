@@ -0,0 +1,150 @@
+"""
+Benchmark the integration against the local Smarter cloud emulator.
+
+Unlike the fan-out benchmark, every request goes over the network code paths of
+`smarter_client` and the hub's transport. See `--bench-cloud-devices`.
+"""
+
+import asyncio
+import statistics
+import time
+
+from custom_components.smarter.const import DOMAIN
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_STATE_CHANGED,
+    SERVICE_TURN_ON,
+    Platform,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from tests.emulator import async_connect_emulator
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench"
+
+# Degrees the water temperature rises per boil step, from 20 to 100
+BOIL_STEP = 4.0
+
+# Seconds between boil steps
+BOIL_INTERVAL = 0.05
+
+# Command rate the account is allowed while switching all kettles on
+COMMANDS_PER_SECOND = 1_000_000.0
+
+# Seconds to wait for all kettles to report a boil before giving up
+BOIL_TIMEOUT = 300
+
+
+def _percentile(samples: list[float], percentile: int) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[percentile - 1]
+
+
+async def test_cloud_boil(
+    hass: HomeAssistant, socket_enabled, cloud_device_count: int, bench_results: list
+):
+    """Set up through the emulator, boil every kettle and switch them all on."""
+    async with async_connect_emulator(hass) as cloud:
+        user_id = cloud.add_user(EMAIL, PASSWORD)
+        kettle_ids = cloud.add_kettles(user_id, cloud_device_count)
+        entry = MockConfigEntry(
+            domain=DOMAIN, data={CONF_USERNAME: EMAIL, CONF_PASSWORD: PASSWORD}
+        )
+        entry.add_to_hass(hass)
+
+        start = time.perf_counter()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        setup_time = time.perf_counter() - start
+
+        registry = er.async_get(hass)
+        sensor_ids = {
+            registry.async_get_entity_id(
+                Platform.SENSOR, DOMAIN, f"{kettle_id}-kettle-water_temperature"
+            )
+            for kettle_id in kettle_ids
+        }
+        switch_ids = [
+            registry.async_get_entity_id(
+                Platform.SWITCH, DOMAIN, f"{kettle_id}-kettle-start_boil"
+            )
+            for kettle_id in kettle_ids
+        ]
+        boiled = asyncio.Event()
+        waiting = set(sensor_ids)
+        state_writes = 0
+
+        @callback
+        def on_state_changed(event: Event) -> None:
+            nonlocal state_writes
+            state_writes += 1
+            new_state = event.data["new_state"]
+            if event.data["entity_id"] in waiting and new_state.state == "100.0":
+                waiting.discard(event.data["entity_id"])
+                if not waiting:
+                    boiled.set()
+
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, on_state_changed)
+        start = time.perf_counter()
+        await cloud.async_boil(kettle_ids, step=BOIL_STEP, interval=BOIL_INTERVAL)
+        pushed = time.perf_counter()
+        async with asyncio.timeout(BOIL_TIMEOUT):
+            await boiled.wait()
+        boil_time = time.perf_counter() - start
+        boil_lag = time.perf_counter() - pushed
+        boil_writes = state_writes
+        unsub()
+
+        hub = hass.data[DOMAIN][entry.entry_id]["hub"]
+        # Time the round trips, not the account's command rate limit
+        hub.rate_limiter.rate = COMMANDS_PER_SECOND
+        hub.rate_limiter.burst = cloud_device_count
+        start = time.perf_counter()
+        round_trips = await asyncio.gather(
+            *(
+                _turn_on(hass, hub, kettle_id, switch_id)
+                for kettle_id, switch_id in zip(kettle_ids, switch_ids, strict=True)
+            )
+        )
+        command_time = time.perf_counter() - start
+
+        await hass.config_entries.async_unload(entry.entry_id)
+
+    bench_results.append(
+        {
+            "benchmark": "cloud_boil",
+            "devices": cloud_device_count,
+            "setup_s": setup_time,
+            "boil": {
+                "elapsed_s": boil_time,
+                "lag_after_last_push_ms": boil_lag * 1000,
+                "state_writes": boil_writes,
+            },
+            "commands": {
+                "elapsed_s": command_time,
+                "round_trip_ms": {
+                    "p50": _percentile(round_trips, 50) * 1000,
+                    "p99": _percentile(round_trips, 99) * 1000,
+                    "max": max(round_trips) * 1000,
+                },
+            },
+        }
+    )
+
+    assert len(cloud.commands) == cloud_device_count
+
+
+async def _turn_on(hass: HomeAssistant, hub, kettle_id: str, switch_id: str) -> float:
+    """Turn a switch on and return the seconds until the kettle confirmed it."""
+    start = time.perf_counter()
+    await hass.services.async_call(
+        Platform.SWITCH, SERVICE_TURN_ON, {ATTR_ENTITY_ID: switch_id}, blocking=True
+    )
+    async with asyncio.timeout(BOIL_TIMEOUT):
+        while hub.pending_commands.get(kettle_id, "state") is not None:
+            await asyncio.sleep(0.001)
+
+    return time.perf_counter() - start
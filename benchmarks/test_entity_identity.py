@@ -0,0 +1,98 @@
+"""
+Benchmark the identity and device metadata of entities.
+
+Home Assistant reads `unique_id` and `device_info` while entities are registered
+and their states written. The benchmark times those reads on every entity of
+`--bench-devices` fake kettles, against building the values on every read as the
+entities used to, and measures the memory an entity takes.
+"""
+
+import time
+import tracemalloc
+
+from custom_components.smarter.binary_sensor import (
+    BINARY_SENSOR_TYPES,
+    SmarterBinarySensor,
+)
+from custom_components.smarter.const import DOMAIN, MANUFACTURER
+from custom_components.smarter.entity import SmarterEntity
+from custom_components.smarter.number import NUMBER_TYPES, SmarterNumber
+from custom_components.smarter.sensor import SENSOR_TYPES, SmarterSensor
+from custom_components.smarter.switch import SWITCH_TYPES, SmarterSwitch
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from .fake_devices import FakeDevice, make_devices
+
+# Reads of each property per entity in the timed part of the benchmark
+READS = 20
+
+ENTITY_TYPES = (
+    (SmarterSensor, SENSOR_TYPES),
+    (SmarterBinarySensor, BINARY_SENSOR_TYPES),
+    (SmarterSwitch, SWITCH_TYPES),
+    (SmarterNumber, NUMBER_TYPES),
+)
+
+
+def _make_entities(devices: list[FakeDevice]) -> list[SmarterEntity]:
+    return [
+        entity_class(device, description)
+        for device in devices
+        for entity_class, descriptions in ENTITY_TYPES
+        for description in descriptions
+    ]
+
+
+def _rebuild_identity(entity: SmarterEntity) -> tuple[str, DeviceInfo]:
+    """Build the unique ID and device info like every read used to."""
+    device = entity.device
+    return "-".join(
+        (device.id, device.type, entity.entity_description.key)
+    ), DeviceInfo(
+        identifiers={(DOMAIN, device.device.identifier)},
+        manufacturer=MANUFACTURER,
+        model=device.model,
+        name=device.friendly_name,
+        suggested_area="Kitchen",
+        sw_version=device.firmware_version,
+    )
+
+
+def _time_reads(entities: list[SmarterEntity], read) -> float:
+    start = time.perf_counter()
+    for _ in range(READS):
+        for entity in entities:
+            read(entity)
+    return time.perf_counter() - start
+
+
+def test_entity_identity(device_count: int, bench_results: list):
+    """Time unique ID and device info reads, and measure entity memory."""
+    devices = make_devices(device_count)
+
+    tracemalloc.start()
+    entities = _make_entities(devices)
+    entity_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    memoized = _time_reads(
+        entities, lambda entity: (entity.unique_id, entity.device_info)
+    )
+    rebuilt = _time_reads(entities, _rebuild_identity)
+    reads = READS * len(entities)
+
+    bench_results.append(
+        {
+            "benchmark": "entity_identity",
+            "devices": device_count,
+            "entities": len(entities),
+            "reads": reads,
+            "memoized_per_read_ns": memoized / reads * 1e9,
+            "rebuilt_per_read_ns": rebuilt / reads * 1e9,
+            "speedup": rebuilt / memoized,
+            "memory_per_entity_bytes": entity_memory / len(entities),
+        }
+    )
+
+    assert all(entity.device_info is entity.device_info for entity in entities[:10])
+    assert memoized < rebuilt
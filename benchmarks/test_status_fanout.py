@@ -0,0 +1,157 @@
+"""
+Benchmark the status fan-out from device pushes to the state machine.
+
+Run with `pytest benchmarks`. Results are written to `bench_results.json`, see
+`--bench-output` and `--bench-devices`.
+"""
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+from unittest.mock import MagicMock, patch
+
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.entity import SmarterEntity
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from .fake_devices import FakeDevice, make_devices
+
+# Pushes per device in the timed part of the benchmark
+STEPS = 20
+
+# Seconds to wait for the states of one step before giving up
+STEP_TIMEOUT = 60
+
+
+def _percentile(samples: list[float], percentile: int) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[percentile - 1]
+
+
+async def _setup_integration(
+    hass: HomeAssistant, devices: list[FakeDevice]
+) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_USERNAME: "bench", CONF_PASSWORD: "bench"}
+    )
+    entry.add_to_hass(hass)
+    with (
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterHub.sign_in",
+            return_value=MagicMock(refresh_token=None),
+        ),
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterHub.get_user",
+            return_value=MagicMock(),
+        ),
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterHub.discover_devices",
+            return_value=devices,
+        ),
+    ):
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    return entry
+
+
+async def test_status_fanout(
+    hass: HomeAssistant, device_count: int, bench_results: list
+):
+    """Push water temperature changes to every device and time their states."""
+    devices = make_devices(device_count)
+    latencies: list[float] = []
+    state_writes = 0
+    update_time = 0.0
+    update_calls = 0
+    waiting: set[str] = set()
+    step_done = asyncio.Event()
+    on_state_update = SmarterEntity._on_state_update
+
+    def timed_on_state_update(self, changed_keys):
+        nonlocal update_time, update_calls
+        start = time.perf_counter()
+        try:
+            return on_state_update(self, changed_keys)
+        finally:
+            update_time += time.perf_counter() - start
+            update_calls += 1
+
+    @callback
+    def on_state_changed(event: Event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+        entity_id = event.data["entity_id"]
+        if entity_id in waiting:
+            latencies.append(time.perf_counter() - entity_ids[entity_id].last_push)
+            waiting.discard(entity_id)
+            if not waiting:
+                step_done.set()
+
+    def push_step(step: int) -> None:
+        # Runs in an executor thread, like the client's stream thread
+        for index, device in enumerate(devices):
+            device.push(water_temperature=30.0 + step + index % 10 / 10)
+
+    async def run_step(step: int) -> None:
+        waiting.update(entity_ids)
+        step_done.clear()
+        await hass.async_add_executor_job(push_step, step)
+        async with asyncio.timeout(STEP_TIMEOUT):
+            await step_done.wait()
+
+    tracemalloc.start()
+    # Entities subscribe the method when they are added, so patch it before setup
+    with patch.object(SmarterEntity, "_on_state_update", timed_on_state_update):
+        await _setup_integration(hass, devices)
+        registry = er.async_get(hass)
+        entity_ids = {
+            registry.async_get_entity_id(
+                "sensor", DOMAIN, f"{device.id}-{device.type}-water_temperature"
+            ): device
+            for device in devices
+        }
+        assert None not in entity_ids
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, on_state_changed)
+
+        # Warm up, and include one round of pushes in the memory peak
+        await run_step(0)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        latencies.clear()
+        state_writes = update_calls = 0
+        update_time = 0.0
+
+        start = time.perf_counter()
+        for step in range(1, STEPS + 1):
+            await run_step(step)
+        elapsed = time.perf_counter() - start
+
+    unsub()
+
+    result = {
+        "benchmark": "status_fanout",
+        "devices": device_count,
+        "pushes": device_count * STEPS,
+        "elapsed_s": elapsed,
+        "latency_ms": {
+            "p50": _percentile(latencies, 50) * 1000,
+            "p99": _percentile(latencies, 99) * 1000,
+            "max": max(latencies) * 1000,
+        },
+        "on_state_update": {
+            "calls": update_calls,
+            "total_ms": update_time * 1000,
+            "per_call_us": update_time / update_calls * 1e6,
+            "loop_share": update_time / elapsed,
+        },
+        "state_writes": state_writes,
+        "state_writes_per_s": state_writes / elapsed,
+        "peak_memory_bytes": peak_memory,
+    }
+    bench_results.append(result)
+
+    assert len(latencies) == device_count * STEPS
@@ -2,47 +2,265 @@
 
 from __future__ import annotations
 
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from functools import partial
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import Config, HomeAssistant
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import Config, HomeAssistant, SupportsResponse, callback
+from homeassistant.helpers.event import async_call_later
+from smarter_client.domain.models import User
+from smarter_client.managed_devices.base import BaseDevice
 
+from custom_components.smarter.device_cache import SmarterDeviceCache
+from custom_components.smarter.hub_registry import async_get_hub_registry
+from custom_components.smarter.profiler import async_handle_profile
 from custom_components.smarter.smarter_hub import SmarterHub
 
-from .const import DOMAIN, LOGGER, PLATFORMS
+from .const import (
+    CONF_REFRESH_TOKEN,
+    DISCOVERY_RETRY_DELAY,
+    DOMAIN,
+    LOGGER,
+    PLATFORMS,
+    SERVICE_PROFILE,
+    SERVICE_SCHEMA_PROFILE,
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Smarter Kettle and Coffee from a config entry."""
     hass.data.setdefault(DOMAIN, {})
-    hub = SmarterHub(hass)
-    session = await hub.sign_in(entry.data["username"], entry.data["password"])
-    user = await hub.get_user(session)
+    registry = async_get_hub_registry(hass)
+    hub = registry.async_acquire(entry)
 
-    devices = await hub.discover_devices(user)
-    for device in devices:
-        device.set_logger(LOGGER)
+    cache = SmarterDeviceCache(hass, entry.entry_id)
+    data = hass.data[DOMAIN][entry.entry_id] = {
+        "hub": hub,
+        "cache": cache,
+        "options": dict(entry.options),
+        "setup_timings": {},
+    }
+    timings = data["setup_timings"]
+
+    with _timed(timings, "cache_load"):
+        cached_devices = await cache.async_load()
+
+    if cached_devices:
+        # Create entities from the snapshot right away, and reconcile them with the
+        # cloud in the background
+        data["user"] = None
+        data["devices"] = hub.async_register_devices(entry.entry_id, cached_devices)
+        entry.async_create_background_task(
+            hass,
+            _async_reconcile_devices(hass, entry, hub, cache, data["devices"], timings),
+            f"{DOMAIN} {entry.title} discovery",
+        )
+    else:
+        try:
+            data["user"], devices = await _async_discover(hass, entry, hub, timings)
+        except Exception:
+            hass.data[DOMAIN].pop(entry.entry_id)
+            registry.async_release(entry)
+            raise
+        data["devices"] = hub.async_register_devices(entry.entry_id, devices)
+        if hub.failed_networks:
+            # Not saved, so the next setup discovers the missing devices again
+            _async_retry_discovery(hass, entry, hub, cache, timings)
+        else:
+            await cache.async_save(data["devices"])
 
-    hass.data[DOMAIN][entry.entry_id] = {"user": user, "devices": devices}
+    _async_track_status(entry, hub, cache, data["devices"])
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    with _timed(timings, "platforms"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
+@contextmanager
+def _timed(timings: dict[str, float], phase: str) -> Generator[None]:
+    """Record the seconds spent on a setup phase in `timings`."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[phase] = time.monotonic() - start
+
+
+@callback
+def _async_track_status(
+    entry: ConfigEntry,
+    hub: SmarterHub,
+    cache: SmarterDeviceCache,
+    devices: list[BaseDevice],
+) -> None:
+    """Record device status changes in the cache, so they can be restored."""
+    for device in devices:
+
+        @callback
+        def record_status(changed_keys, device_id=device.id) -> None:
+            status = hub.get_status(hub.get_device(device_id))
+            cache.async_record_status(device_id, status.raw)
+
+        record_status(None)
+        entry.async_on_unload(hub.async_subscribe_status(device, record_status))
+
+
+async def _async_discover(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    hub: SmarterHub,
+    timings: dict[str, float],
+) -> tuple[User, list[BaseDevice]]:
+    """
+    Authenticate the hub and discover the devices of the entry's account.
+
+    The seconds spent on each phase are recorded in `timings`, and per network in
+    the hub's `discovery_timings`.
+    """
+    refresh_token = entry.data.get(CONF_REFRESH_TOKEN)
+    with _timed(timings, "authenticate"):
+        session = hub.session or await hub.authenticate(
+            entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], refresh_token
+        )
+
+    if session.refresh_token != refresh_token:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_REFRESH_TOKEN: session.refresh_token}
+        )
+
+    with _timed(timings, "get_user"):
+        user = await hub.get_user(session)
+
+    with _timed(timings, "discover_devices"):
+        devices = await hub.discover_devices(user)
+    for device in devices:
+        device.set_logger(LOGGER)
+
+    return user, devices
+
+
+async def _async_reconcile_devices(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    hub: SmarterHub,
+    cache: SmarterDeviceCache,
+    cached_devices: list[BaseDevice],
+    timings: dict[str, float],
+) -> None:
+    """
+    Replace the cached devices of an entry with the devices found in the cloud.
+
+    The entry is only reloaded if other devices were found. A discovery that fails,
+    in full or for some networks, keeps the devices and is retried later.
+    """
+    try:
+        user, devices = await _async_discover(hass, entry, hub, timings)
+    except Exception as ex:
+        LOGGER.exception(
+            "Failed to discover devices, retrying in %s seconds", DISCOVERY_RETRY_DELAY
+        )
+        hub.async_record_connection_event("discovery_failed", error=str(ex))
+        _async_schedule_reconcile(hass, entry, hub, cache, timings)
+        return
+
+    if hub.failed_networks:
+        # The devices of the failed networks are missing, keep the cached devices
+        _async_retry_discovery(hass, entry, hub, cache, timings)
+        return
+
+    await cache.async_save(devices)
+
+    if {device.id for device in devices} != {device.id for device in cached_devices}:
+        # Devices were added or removed, recreate the entities from the new snapshot
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    data["user"] = user
+    data["devices"] = hub.async_replace_devices(entry.entry_id, devices)
+
+
+@callback
+def _async_retry_discovery(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    hub: SmarterHub,
+    cache: SmarterDeviceCache,
+    timings: dict[str, float],
+) -> None:
+    """Retry the discovery of an entry whose networks did not all load."""
+    LOGGER.warning(
+        "Failed to discover devices in networks %s, retrying in %s seconds",
+        ", ".join(sorted(hub.failed_networks)),
+        DISCOVERY_RETRY_DELAY,
+    )
+    _async_schedule_reconcile(hass, entry, hub, cache, timings)
+
+
+@callback
+def _async_schedule_reconcile(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    hub: SmarterHub,
+    cache: SmarterDeviceCache,
+    timings: dict[str, float],
+) -> None:
+    """Reconcile the devices of an entry again after `DISCOVERY_RETRY_DELAY`."""
+    data = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def reconcile(_now) -> None:
+        data["cancel_reconcile"] = None
+        entry.async_create_background_task(
+            hass,
+            _async_reconcile_devices(hass, entry, hub, cache, data["devices"], timings),
+            f"{DOMAIN} {entry.title} discovery",
+        )
+
+    data["cancel_reconcile"] = async_call_later(hass, DISCOVERY_RETRY_DELAY, reconcile)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        if (cancel_reconcile := data.get("cancel_reconcile")) is not None:
+            cancel_reconcile()
+        data["hub"].async_unregister_devices(entry.entry_id)
+        async_get_hub_registry(hass).async_release(entry)
+        await data["cache"].async_flush_status()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the device cache of a deleted config entry."""
+    await SmarterDeviceCache(hass, entry.entry_id).async_remove()
+
+
 async def async_setup(hass: HomeAssistant, config: Config):
-    """Set up this integration using YAML is not supported."""
+    """Set up the integration's services. Set up using YAML is not supported."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        partial(async_handle_profile, hass),
+        SERVICE_SCHEMA_PROFILE,
+        SupportsResponse.OPTIONAL,
+    )
     return True
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
+    """Reload config entry when its options change."""
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is not None and data["options"] == entry.options:
+        # Only the entry data changed, e.g. a rotated refresh token was saved
+        return
+
     await hass.config_entries.async_reload(entry.entry_id)
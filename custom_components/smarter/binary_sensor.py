@@ -9,11 +9,14 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .capabilities import supported_descriptions
 from .const import DOMAIN
 from .entity import SmarterEntity
+from .status import DeviceStatus
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -50,6 +53,13 @@ BINARY_SENSOR_TYPES = [
         get_status_field="kettle_is_present",
         state_on_values=(True,),
     ),
+    SmarterBinarySensorEntityDescription(
+        key="calibrated",
+        name="Calibrated",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        get_status_field="calibrated",
+        state_on_values=(True,),
+    ),
 ]
 
 
@@ -63,7 +73,12 @@ async def async_setup_entry(
     entities = [
         SmarterBinarySensor(device, description)
         for device in data.get("devices")
-        for description in BINARY_SENSOR_TYPES
+        for description in supported_descriptions(
+            Platform.BINARY_SENSOR,
+            device,
+            BINARY_SENSOR_TYPES,
+            lambda description: description.get_status_field,
+        )
     ]
 
     async_add_entities(entities, True)
@@ -76,11 +91,16 @@ class SmarterBinarySensor(SmarterEntity, BinarySensorEntity):
 
     _attr_has_entity_name = True
 
+    @property
+    def status_keys(self) -> frozenset[str] | None:
+        """Return the device status keys this entity's state depends on."""
+        return self.attribute_status_keys | {self.entity_description.get_status_field}
+
     @property
     def is_on(self) -> bool | None:
         """Return true if the binary sensor is on."""
+        return self._memoized("is_on", self._status_is_on)
+
+    def _status_is_on(self, status: DeviceStatus) -> bool:
         description = self.entity_description
-        return (
-            self.device.status.get(description.get_status_field)
-            in description.state_on_values
-        )
+        return status.get(description.get_status_field) in description.state_on_values
@@ -0,0 +1,120 @@
+"""Decide which entities a device gets from what it is known to support."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from homeassistant.const import Platform
+from homeassistant.helpers.entity import EntityDescription
+from smarter_client.managed_devices.base import BaseDevice
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """Status keys and commands of a device type or model."""
+
+    status_keys: frozenset[str]
+    commands: frozenset[str]
+
+
+KETTLE_PROFILE = DeviceProfile(
+    status_keys=frozenset(
+        (
+            "device_model",
+            "firmware_version",
+            "state",
+            "boil_temperature",
+            "target_temperature",
+            "water_temperature",
+            "water_level",
+            "kettle_is_present",
+            "calibrated",
+            "keep_warm_time",
+        )
+    ),
+    commands=frozenset(
+        (
+            "start_boil",
+            "stop_boil",
+            "start_auto_boil",
+            "set_boil_temperature",
+            "set_keep_warm_time",
+        )
+    ),
+)
+
+# Profiles by `BaseDevice.type`
+DEVICE_PROFILES: dict[str, DeviceProfile] = {
+    "kettle": KETTLE_PROFILE,
+}
+
+# Profiles by `BaseDevice.model`, which take precedence over the device type
+MODEL_PROFILES: dict[str, DeviceProfile] = {
+    "SMKET01": KETTLE_PROFILE,
+}
+
+# Commands sent by entities, by platform and entity description key
+ENTITY_COMMANDS: dict[tuple[Platform, str], frozenset[str]] = {
+    (Platform.SWITCH, "start_boil"): frozenset(("start_boil", "stop_boil")),
+    (Platform.NUMBER, "boil_temperature"): frozenset(("set_boil_temperature",)),
+    (Platform.NUMBER, "keep_warm_time"): frozenset(("set_keep_warm_time",)),
+}
+
+
+class DeviceCapabilities:
+    """
+    What a device supports, from its profile, its status and its command catalog.
+
+    A status key is supported if the profile of the device declares it, or the
+    device reports it. A command is supported if the device's command catalog lists
+    it, or, while the catalog is unknown, if the profile declares it. A device
+    without a profile or anything reported supports everything, so entities are
+    only left out when the device is known not to need them.
+    """
+
+    def __init__(self, device: BaseDevice) -> None:
+        """Collect the capabilities of a device."""
+        profile = MODEL_PROFILES.get(device.model) or DEVICE_PROFILES.get(device.type)
+        reported = frozenset(device.status)
+        catalog = frozenset(device.device.commands)
+
+        self.status_keys: frozenset[str] | None = None
+        if profile is not None or reported:
+            self.status_keys = reported.union(profile.status_keys if profile else ())
+
+        self.commands: frozenset[str] | None = catalog or (
+            profile.commands if profile else None
+        )
+
+    def supports(self, status_key: str, commands: Iterable[str] = ()) -> bool:
+        """Return whether the device supports a status key and commands."""
+        return (self.status_keys is None or status_key in self.status_keys) and (
+            self.commands is None or self.commands.issuperset(commands)
+        )
+
+
+def supported_descriptions[DescriptionT: EntityDescription](
+    platform: Platform,
+    device: BaseDevice,
+    descriptions: Iterable[DescriptionT],
+    status_key: Callable[[DescriptionT], str] = lambda description: description.key,
+) -> Iterator[DescriptionT]:
+    """
+    Return the entity descriptions of a platform that a device supports.
+
+    Args:
+        platform: platform of the descriptions, see `ENTITY_COMMANDS`
+        device: device the entities would represent
+        descriptions: entity descriptions of the platform
+        status_key: returns the status key an entity shows
+    """
+    capabilities = DeviceCapabilities(device)
+    return (
+        description
+        for description in descriptions
+        if capabilities.supports(
+            status_key(description),
+            ENTITY_COMMANDS.get((platform, description.key), ()),
+        )
+    )
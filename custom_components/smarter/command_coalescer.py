@@ -0,0 +1,195 @@
+"""Debounce rapid writes of a device setting into a single command."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from smarter_client.managed_devices.base import BaseDevice
+
+from .const import LOGGER
+from .rate_limiter import CommandPriority
+from .status import DeviceStatus
+
+# Seconds without a new value before the latest value of a setting is sent
+COMMAND_DEBOUNCE_DELAY = 0.5
+
+# Called as `send_command(device, command_name, value, priority=priority)`
+CommandSender = Callable[..., Awaitable[Any]]
+
+# Returns the status snapshot of a device, e.g. the hub's `get_status`
+StatusReader = Callable[[BaseDevice], DeviceStatus]
+
+
+@dataclass
+class _PendingWrite:
+    device: BaseDevice
+    value: Any
+    priority: CommandPriority
+    future: asyncio.Future
+    timer: asyncio.TimerHandle | None = None
+
+
+@dataclass
+class _WriteLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Writes holding or waiting for the lock, it is dropped once there are none
+    writes: int = 0
+
+
+@dataclass(frozen=True)
+class _SentWrite:
+    value: Any
+    # Value the device status reported when the write was sent
+    reported: Any
+
+
+class CommandCoalescer:
+    """
+    Coalesce writes of a setting per device and command, the latest value wins.
+
+    A write is held back for `delay` seconds and replaced by any value written in the
+    meantime, so dragging a slider sends only the value it was released at. It is
+    sent in the most urgent lane of the writes it replaced. Writes of a setting are
+    sent one at a time and in order, and a value that matches the current value of
+    the setting is not sent at all. The current value is the one last sent, until
+    the device status reports a change after it was sent, because the status lags
+    behind writes in flight. The number of writes that were never sent is kept in
+    `saved_writes`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send_command: CommandSender,
+        get_status: StatusReader,
+        delay: float = COMMAND_DEBOUNCE_DELAY,
+    ) -> None:
+        """
+        Create a new coalescer.
+
+        Args:
+            send_command: sends a command to a device, e.g. the hub's
+                `async_send_command`
+            get_status: returns the status snapshot of a device, e.g. the hub's
+                `get_status`
+            delay: seconds to wait for further values before a write is sent
+        """
+        self.hass = hass
+        self.delay = delay
+        self.saved_writes = 0
+        self._send_command = send_command
+        self._get_status = get_status
+        self._pending: dict[tuple[str, str], _PendingWrite] = {}
+        self._locks: dict[tuple[str, str], _WriteLock] = {}
+        self._sent: dict[tuple[str, str], _SentWrite] = {}
+
+    async def async_send(
+        self,
+        device: BaseDevice,
+        command_name: str,
+        status_key: str,
+        value: Any,
+        priority: CommandPriority = CommandPriority.INTERACTIVE,
+    ) -> Any:
+        """
+        Write a setting of a device.
+
+        Args:
+            device: device to send the command to
+            command_name: name of the command that writes the setting
+            status_key: status key that reports the setting
+            value: new value of the setting
+            priority: lane of the command in the rate limiter
+        Returns:
+            Response of the command that was sent in the end, or `None` if no command
+            had to be sent. Every caller whose value was replaced gets the same
+            result.
+        """
+        key = (device.id, command_name)
+        if (pending := self._pending.get(key)) is None:
+            pending = self._pending[key] = _PendingWrite(
+                device, value, priority, self.hass.loop.create_future()
+            )
+        else:
+            pending.timer.cancel()
+            pending.device = device
+            pending.value = value
+            pending.priority = min(pending.priority, priority)
+            self.saved_writes += 1
+
+        pending.timer = self.hass.loop.call_later(
+            self.delay, self._async_flush, key, status_key
+        )
+
+        # A cancelled caller must not cancel the write for the others
+        return await asyncio.shield(pending.future)
+
+    @callback
+    def async_cancel(self, device_id: str) -> None:
+        """Drop the writes of a device that have not been sent yet."""
+        for key in [key for key in self._pending if key[0] == device_id]:
+            pending = self._pending.pop(key)
+            pending.timer.cancel()
+            pending.future.cancel()
+        for key in [key for key in self._sent if key[0] == device_id]:
+            del self._sent[key]
+
+    def _current_value(self, key: tuple[str, str], reported: Any) -> Any:
+        """Return the value a setting has, or will have once writes in flight land."""
+        sent = self._sent.get(key)
+        if sent is None or sent.reported != reported:
+            return reported
+        return sent.value
+
+    @callback
+    def _async_flush(self, key: tuple[str, str], status_key: str) -> None:
+        pending = self._pending.pop(key)
+        self.hass.async_create_task(
+            self._async_write(key, status_key, pending),
+            f"smarter command {key[1]} for {key[0]}",
+        )
+
+    async def _async_write(
+        self, key: tuple[str, str], status_key: str, pending: _PendingWrite
+    ) -> None:
+        device_id, command_name = key
+        # Only one write of a setting is in flight, so they land in order
+        lock = self._locks.setdefault(key, _WriteLock())
+        lock.writes += 1
+        try:
+            async with lock.lock:
+                reported = self._get_status(pending.device).get(status_key)
+                if self._current_value(key, reported) == pending.value:
+                    LOGGER.debug(
+                        "Skipping %s for %s, setting is already %s",
+                        command_name,
+                        device_id,
+                        pending.value,
+                    )
+                    self.saved_writes += 1
+                    result = None
+                else:
+                    self._sent[key] = _SentWrite(pending.value, reported)
+                    try:
+                        result = await self._send_command(
+                            pending.device,
+                            command_name,
+                            pending.value,
+                            priority=pending.priority,
+                        )
+                    except Exception:
+                        # The value may not have been applied, go by the status
+                        self._sent.pop(key, None)
+                        raise
+        except Exception as ex:  # raised to the callers instead
+            pending.future.set_exception(ex)
+        else:
+            pending.future.set_result(result)
+        finally:
+            lock.writes -= 1
+            if not lock.writes:
+                del self._locks[key]
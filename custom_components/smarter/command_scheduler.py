@@ -0,0 +1,87 @@
+"""Schedule the commands of an account in per-device order."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from .const import LOGGER
+from .rate_limiter import CommandPriority, CommandRateLimiter
+
+# Maximum number of commands of an account that are in flight at the same time
+MAX_CONCURRENT_COMMANDS = 4
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _Lane:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    depth: int = 0
+
+
+class CommandScheduler:
+    """
+    Run the commands of an account in one FIFO lane per device.
+
+    A device sees its commands in the order they were issued, while commands of
+    different devices run concurrently, at most `max_concurrent` at a time. Each
+    command takes a token from the account's rate limiter once it is at the head of
+    its lane.
+    """
+
+    def __init__(
+        self,
+        rate_limiter: CommandRateLimiter,
+        max_concurrent: int = MAX_CONCURRENT_COMMANDS,
+    ) -> None:
+        """Create a new command scheduler."""
+        self.rate_limiter = rate_limiter
+        self.in_flight = 0
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._lanes: dict[str, _Lane] = {}
+
+    def lane_depth(self, device_id: str) -> int:
+        """Return the number of queued and running commands of a device."""
+        lane = self._lanes.get(device_id)
+        return 0 if lane is None else lane.depth
+
+    async def async_run(
+        self,
+        device_id: str,
+        priority: CommandPriority,
+        send: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        """
+        Run a command of a device after the commands issued before it.
+
+        Args:
+            device_id: ID of the device the command is sent to
+            priority: lane of the command in the rate limiter
+            send: sends the command
+        Returns:
+            Result of `send`.
+        """
+        if (lane := self._lanes.get(device_id)) is None:
+            lane = self._lanes[device_id] = _Lane()
+
+        lane.depth += 1
+        try:
+            # asyncio locks wake their waiters in FIFO order
+            async with lane.lock:
+                if waited := await self.rate_limiter.async_acquire(priority):
+                    LOGGER.debug(
+                        "Command for %s was rate limited for %.3fs", device_id, waited
+                    )
+                async with self._slots:
+                    self.in_flight += 1
+                    try:
+                        return await send()
+                    finally:
+                        self.in_flight -= 1
+        finally:
+            lane.depth -= 1
+            if not lane.depth:
+                del self._lanes[device_id]
@@ -6,14 +6,30 @@ import logging
 from typing import Any
 
 import voluptuous as vol
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+    OptionsFlowWithConfigEntry,
+)
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 
 from custom_components.smarter.smarter_hub import SmarterHub
 
-from .const import CONF_REFRESH_TOKEN, DOMAIN
+from .const import (
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_REFRESH_TOKEN,
+    CONF_STATUS_WINDOW,
+    DATA_FLOW_HUBS,
+    DEFAULT_STATUS_WINDOW,
+    DOMAIN,
+    MAX_STATUS_WINDOW,
+)
+from .sensor import SENSOR_TYPES
+from .significance import SIGNIFICANCE_OPTIONS, significance_option
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +59,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     if session is None:
         raise InvalidAuth
 
+    # Hand the signed-in hub to the first setup of the entry
+    hass.data.setdefault(DOMAIN, {}).setdefault(DATA_FLOW_HUBS, {})[
+        session.refresh_token
+    ] = hub
+
     # Return info that you want to store in the config entry.
     return {
         CONF_USERNAME: data[CONF_USERNAME],
@@ -56,6 +77,12 @@ class SmarterConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow of an entry."""
+        return SmarterOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -82,6 +109,45 @@ class SmarterConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
 
+class SmarterOptionsFlow(OptionsFlowWithConfigEntry):
+    """Handle the options of a Smarter Kettle and Coffee entry."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            # Keep options that are not shown in the form
+            return self.async_create_entry(data={**self.options, **user_input})
+
+        schema: dict[vol.Marker, Any] = {
+            vol.Optional(
+                CONF_COMPACT_ATTRIBUTES,
+                default=self.options.get(CONF_COMPACT_ATTRIBUTES, False),
+            ): bool,
+            vol.Optional(
+                CONF_STATUS_WINDOW,
+                default=self.options.get(CONF_STATUS_WINDOW, DEFAULT_STATUS_WINDOW),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_STATUS_WINDOW)),
+        }
+        # Significance settings of the measurement sensors, see `SignificanceFilter`
+        for description in SENSOR_TYPES:
+            if description.significance is None:
+                continue
+            settings = description.significance.with_options(
+                description.key, self.options
+            )
+            for setting in SIGNIFICANCE_OPTIONS:
+                schema[
+                    vol.Optional(
+                        significance_option(description.key, setting),
+                        default=getattr(settings, setting),
+                    )
+                ] = vol.All(vol.Coerce(float), vol.Range(min=0))
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -11,7 +11,26 @@ DOMAIN = "smarter"
 
 MANUFACTURER = "Smarter"
 
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
 CONF_REFRESH_TOKEN = "refresh_token"
+CONF_STATUS_WINDOW = "status_window"
+
+# hass.data[DOMAIN] key of hubs signed in by the config flow, by refresh token
+DATA_FLOW_HUBS = "flow_hubs"
+# hass.data[DOMAIN] key of the `SmarterHubRegistry`
+DATA_HUBS = "hubs"
+# hass.data[DOMAIN] key of the profile being taken by the profile service
+DATA_PROFILER = "profiler"
+
+DEFAULT_STATUS_WINDOW = 0.0
+# Longest status window that can be set in the options, in seconds
+MAX_STATUS_WINDOW = 5.0
+
+# Seconds to wait before retrying a failed background discovery
+DISCOVERY_RETRY_DELAY = 300
+
+SIGNAL_DEVICE_REPLACED = f"{DOMAIN}_device_replaced_{{}}"
+SIGNAL_PENDING_COMMAND = f"{DOMAIN}_pending_command_{{}}"
 
 LOGGER = logging.getLogger(__package__)
 
@@ -26,16 +45,23 @@ PLATFORMS: list[Platform] = [
 SERVICE_QUICK_BOIL = "quick_boil"
 SERVICE_SEND_COMMAND = "send_command"
 SERVICE_GET_COMMANDS = "get_commands"
+SERVICE_PROFILE = "profile"
 
 SERVICE_ATTR_COMMAND_NAME = "command_name"
 SERVICE_ATTR_COMMAND_DATA_TEXT = "command_data_text"
 SERVICE_ATTR_COMMAND_DATA_NUMBER = "command_data_number"
 SERVICE_ATTR_COMMAND_DATA_BOOLEAN = "command_data_boolean"
+SERVICE_ATTR_SECONDS = "seconds"
+
+# Seconds profiled by the profile service by default, and at most
+DEFAULT_PROFILE_SECONDS = 60
+MAX_PROFILE_SECONDS = 3600
 
 SERVICES: list[str] = [
     SERVICE_QUICK_BOIL,
     SERVICE_SEND_COMMAND,
     SERVICE_GET_COMMANDS,
+    SERVICE_PROFILE,
 ]
 
 SERVICE_SCHEMA_SEND_COMMAND = vol.Schema(
@@ -63,6 +89,14 @@ SERVICE_SCHEMA_SEND_COMMAND = vol.Schema(
 
 SERVICE_SCHEMA_QUICK_BOIL = cv.make_entity_service_schema({})
 SERVICE_SCHEMA_GET_COMMANDS = cv.make_entity_service_schema({})
+SERVICE_SCHEMA_PROFILE = vol.Schema(
+    {
+        vol.Optional(SERVICE_ATTR_SECONDS, default=DEFAULT_PROFILE_SECONDS): vol.All(
+            vol.Coerce(float),
+            vol.Range(min=0, min_included=False, max=MAX_PROFILE_SECONDS),
+        ),
+    }
+)
 
 
 class SmarterSensorEntityFeature(IntFlag):
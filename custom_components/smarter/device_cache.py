@@ -0,0 +1,186 @@
+"""Persisted snapshot of the devices discovered for a config entry and their status."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from smarter_client.managed_devices.base import BaseDevice
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+
+# Seconds to wait before status changes are written to disk
+STATUS_SAVE_DELAY = 60
+
+_STATUS_VALUE_TYPES = (str, int, float, bool)
+
+
+@dataclass(frozen=True)
+class CachedCommand:
+    """Command of a cached device, as listed by `get_commands`."""
+
+    name: str
+    example: Any = None
+
+
+@dataclass
+class CachedDeviceData:
+    """Stand-in for the client's `Device` model of a cached device."""
+
+    identifier: str
+    commands: dict[str, CachedCommand] = field(default_factory=dict)
+    status: dict[str, Any] = field(default_factory=dict)
+
+
+class CachedDevice:
+    """
+    Stand-in for a `BaseDevice` restored from the device cache.
+
+    Provides the metadata entities need to be created before discovery has finished.
+    It is replaced by the live device once discovery completes.
+    """
+
+    def __init__(
+        self,
+        identifier: str,
+        device_type: str,
+        friendly_name: str,
+        model: str | None,
+        firmware_version: str | None,
+        commands: dict[str, Any],
+        status: dict[str, Any] | None = None,
+    ) -> None:
+        """Create a new cached device."""
+        self.device = CachedDeviceData(
+            identifier,
+            {name: CachedCommand(name, example) for name, example in commands.items()},
+            dict(status or {}),
+        )
+        self.type = device_type
+        self.friendly_name = friendly_name
+        self.model = model
+        self.firmware_version = firmware_version
+
+    @property
+    def id(self) -> str:
+        """Return the ID of the device in the Smarter API."""
+        return self.device.identifier
+
+    @property
+    def status(self) -> dict[str, Any]:
+        """Return the last known status of the device."""
+        return self.device.status
+
+    def set_logger(self, logger) -> None:
+        """Ignore the logger, cached devices do not talk to the API."""
+
+    def subscribe_status(self, handler: Callable[[dict], None]) -> None:
+        """Ignore subscriptions until the live device is available."""
+
+    def unsubscribe_status(self, handler: Callable[[dict], None]) -> None:
+        """Ignore subscriptions until the live device is available."""
+
+    def send_command(self, command: str, value: Any) -> None:
+        """Reject commands until the live device is available."""
+        raise HomeAssistantError(f"Device {self.id} is not connected yet")
+
+
+class SmarterDeviceCache:
+    """
+    Persist the devices discovered for a config entry with HA's `Store`.
+
+    The last known status of each device is kept in a second store, which is written
+    at most once every `STATUS_SAVE_DELAY` seconds.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry_id: str) -> None:
+        """Create a new device cache for the given config entry."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{config_entry_id}.devices"
+        )
+        self._status_store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{config_entry_id}.status"
+        )
+        self._statuses: dict[str, dict[str, Any]] = {}
+        self._status_dirty = False
+
+    async def async_load(self) -> list[CachedDevice]:
+        """
+        Return the cached devices, or an empty list if nothing is cached.
+
+        Each device is seeded with its last known status.
+        """
+        data = await self._store.async_load() or {}
+        self._statuses = await self._status_store.async_load() or {}
+
+        return [
+            CachedDevice(
+                device["id"],
+                device["type"],
+                device["friendly_name"],
+                device.get("model"),
+                device.get("firmware_version"),
+                device.get("commands", {}),
+                self._statuses.get(device["id"]),
+            )
+            for device in data.get("devices", [])
+        ]
+
+    @callback
+    def async_record_status(self, device_id: str, status: Mapping[str, Any]) -> None:
+        """
+        Record the status of a device, to be written with the next delayed save.
+
+        Only scalar values are kept.
+        """
+        self._statuses[device_id] = {
+            key: value
+            for key, value in status.items()
+            if value is None or isinstance(value, _STATUS_VALUE_TYPES)
+        }
+        if not self._status_dirty:
+            # Delayed saves restart their timer, so only schedule the first one
+            self._status_dirty = True
+            self._status_store.async_delay_save(self._status_data, STATUS_SAVE_DELAY)
+
+    async def async_flush_status(self) -> None:
+        """Write recorded status changes to disk now."""
+        if self._status_dirty:
+            await self._status_store.async_save(self._status_data())
+
+    @callback
+    def _status_data(self) -> dict[str, dict[str, Any]]:
+        self._status_dirty = False
+        return dict(self._statuses)
+
+    async def async_save(self, devices: Iterable[BaseDevice]) -> None:
+        """Save the metadata and command catalog of the given devices."""
+        await self._store.async_save(
+            {
+                "devices": [
+                    {
+                        "id": device.id,
+                        "type": device.type,
+                        "friendly_name": device.friendly_name,
+                        "model": device.model,
+                        "firmware_version": device.firmware_version,
+                        "commands": {
+                            command.name: command.example
+                            for command in device.device.commands.values()
+                        },
+                    }
+                    for device in devices
+                ]
+            }
+        )
+
+    async def async_remove(self) -> None:
+        """Remove the cache from disk."""
+        await self._store.async_remove()
+        await self._status_store.async_remove()
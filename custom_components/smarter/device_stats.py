@@ -0,0 +1,167 @@
+"""Runtime counters of a Smarter device, exposed as diagnostic sensors."""
+
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+# Seconds over which the status push rate is measured
+PUSH_RATE_WINDOW = 60
+
+# Number of status key counts kept for diagnostics
+STATUS_KEY_SAMPLES = 20
+
+# Upper bounds of the command latency buckets, in seconds. Buckets grow by a quarter
+# octave from 1 ms to about 65 s, so a percentile is off by at most 19%.
+LATENCY_BUCKETS: tuple[float, ...] = tuple(
+    0.001 * 2 ** (index / 4) for index in range(65)
+)
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of latencies, in seconds."""
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Create an empty histogram with the given bucket upper bounds."""
+        self.bounds = bounds
+        # The last bucket holds the latencies above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+
+    def add(self, latency: float) -> None:
+        """Count a latency."""
+        self.counts[bisect.bisect_left(self.bounds, latency)] += 1
+        self.count += 1
+
+    def percentile(self, percentile: float) -> float | None:
+        """
+        Return the upper bound of the bucket that holds a percentile.
+
+        Args:
+            percentile: percentile between 0 and 100
+        Returns:
+            Latency in seconds, `math.inf` if it is above the last bucket, or `None`
+            if no latency was counted.
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+
+        return self.bounds[index] if index < len(self.bounds) else math.inf
+
+
+class DeviceStats:
+    """
+    Counters of what the integration does for one device.
+
+    Status pushes are recorded by the device's `StatusDispatcher`, state writes by
+    its entities and commands by the `SmarterHub`. All counters are updated in the
+    event loop.
+    """
+
+    def __init__(self) -> None:
+        """Create zeroed counters."""
+        self.status_pushes = 0
+        self.last_status_push: datetime | None = None
+        self.state_writes = 0
+        self.state_update_time = 0.0
+        self.suppressed_updates = 0
+        self.commands = 0
+        self.command_errors = 0
+        self.command_latency = LatencyHistogram()
+        self.status_key_counts: deque[int] = deque(maxlen=STATUS_KEY_SAMPLES)
+        self._push_times: deque[tuple[float, int]] = deque()
+
+    @callback
+    def async_record_pushes(self, count: int, pushed_at: float) -> None:
+        """
+        Record status pushes of the device.
+
+        Args:
+            count: number of pushes
+            pushed_at: `time.monotonic()` of the last push
+        """
+        self.status_pushes += count
+        self.last_status_push = dt_util.utcnow() - timedelta(
+            seconds=max(0.0, time.monotonic() - pushed_at)
+        )
+        self._push_times.append((pushed_at, count))
+        self._trim_push_times(time.monotonic())
+
+    @callback
+    def async_record_status_keys(self, count: int) -> None:
+        """Record the number of keys of a status payload, a cheap proxy of its size."""
+        self.status_key_counts.append(count)
+
+    @property
+    def status_pushes_per_minute(self) -> float:
+        """Return the rate of status pushes over the last `PUSH_RATE_WINDOW`."""
+        self._trim_push_times(time.monotonic())
+        pushes = sum(count for _, count in self._push_times)
+        return pushes * 60 / PUSH_RATE_WINDOW
+
+    def _trim_push_times(self, now: float) -> None:
+        while self._push_times and self._push_times[0][0] < now - PUSH_RATE_WINDOW:
+            self._push_times.popleft()
+
+    @callback
+    def async_record_state_write(self, duration: float = 0.0) -> None:
+        """
+        Record a state write issued by an entity of the device.
+
+        Args:
+            duration: seconds spent handling the update that wrote the state
+        """
+        self.state_writes += 1
+        self.state_update_time += duration
+
+    @callback
+    def async_record_suppressed_update(self) -> None:
+        """Record a status change an entity did not publish as insignificant."""
+        self.suppressed_updates += 1
+
+    @callback
+    def async_record_command(self, latency: float, failed: bool = False) -> None:
+        """
+        Record a command sent to the device.
+
+        Args:
+            latency: seconds from sending the command to the cloud's response
+            failed: whether the command failed
+        """
+        self.commands += 1
+        if failed:
+            self.command_errors += 1
+        self.command_latency.add(latency)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as JSON-serializable data."""
+        return {
+            "status_pushes": self.status_pushes,
+            "status_pushes_per_minute": self.status_pushes_per_minute,
+            "last_status_push": self.last_status_push
+            and self.last_status_push.isoformat(),
+            "status_key_counts": list(self.status_key_counts),
+            "state_writes": self.state_writes,
+            "state_update_time": self.state_update_time,
+            "suppressed_updates": self.suppressed_updates,
+            "commands": self.commands,
+            "command_errors": self.command_errors,
+            "command_latency": {
+                "p50": self.command_latency.percentile(50),
+                "p95": self.command_latency.percentile(95),
+            },
+        }
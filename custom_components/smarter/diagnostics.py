@@ -0,0 +1,115 @@
+"""Diagnostics support for the Smarter Kettle and Coffee integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+from smarter_client.domain.models import User
+from smarter_client.managed_devices.base import BaseDevice
+
+from .const import CONF_REFRESH_TOKEN, DOMAIN
+from .device_cache import CachedDevice
+from .rate_limiter import CommandPriority
+from .smarter_hub import SmarterHub
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_REFRESH_TOKEN,
+    CONF_USERNAME,
+    "email",
+    "first_name",
+    "last_name",
+    "name",
+    "title",
+    "unique_id",
+    "user_id",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    hub: SmarterHub = data["hub"]
+    rate_limiter = hub.rate_limiter
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "account": async_redact_data(_account_data(data["user"]), TO_REDACT),
+        "devices": [_device_data(hub, device) for device in data["devices"]],
+        "performance": {
+            "setup_timings": data["setup_timings"],
+            "discovery_timings": hub.discovery_timings,
+            "failed_networks": sorted(hub.failed_networks),
+            "connection_history": list(hub.connection_history),
+            "commands": {
+                "in_flight": hub.command_scheduler.in_flight,
+                "rate_limited": {
+                    priority.name.lower(): depth
+                    for priority, depth in rate_limiter.queue_depths().items()
+                },
+                "rate_limit_waits": {
+                    priority.name.lower(): {
+                        "p50": rate_limiter.wait_time_percentile(priority, 50),
+                        "p95": rate_limiter.wait_time_percentile(priority, 95),
+                    }
+                    for priority in CommandPriority
+                },
+                "pending_confirmed": hub.pending_commands.confirmed,
+                "pending_rolled_back": hub.pending_commands.rolled_back,
+                "coalesced_writes": hub.command_coalescer.saved_writes,
+            },
+        },
+    }
+
+
+def _account_data(user: User | None) -> dict[str, Any] | None:
+    """Return the account of an entry, or `None` until discovery has finished."""
+    if user is None:
+        return None
+
+    return {
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "temperature_unit": user.temperature_unit,
+        "networks": [
+            {"identifier": network.identifier, "name": name}
+            for name, network in user.networks.items()
+        ],
+    }
+
+
+def _device_data(hub: SmarterHub, device: BaseDevice) -> dict[str, Any]:
+    cached = isinstance(device, CachedDevice)
+    status = dict(hub.get_status(device).raw)
+    return {
+        "id": device.id,
+        "type": device.type,
+        "model": device.model,
+        "firmware_version": device.firmware_version,
+        "cached": cached,
+        "stream": None if cached else _stream_data(device),
+        "status": async_redact_data(status, TO_REDACT),
+        # Serialized only here, the flushes count the keys of each status instead
+        "status_size": len(json_bytes(status)),
+        "entities": hub.get_entity_ids(device.id),
+        "listeners": hub.get_listener_count(device.id),
+        "command_lane_depth": hub.command_scheduler.lane_depth(device.id),
+        "stats": hub.get_device_stats(device.id).as_dict(),
+    }
+
+
+def _stream_data(device: BaseDevice) -> dict[str, bool | None]:
+    try:
+        active = bool(device.device.is_stream_active)
+    except Exception:  # the client has no stream state until it connected once
+        active = None
+
+    return {"watching": bool(device.device.is_watching), "active": active}
@@ -0,0 +1,199 @@
+"""Per-device status fan-out for Smarter entities."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from smarter_client.managed_devices.base import BaseDevice
+
+from .device_stats import DeviceStats
+from .status import DeviceStatus, parse_status
+
+StatusListener = Callable[[frozenset[str]], None]
+
+# Versions of status snapshots, unique across dispatchers so that a version never
+# refers to two snapshots
+_versions = itertools.count(1)
+
+
+class StatusDispatcher:
+    """
+    Fan status pushes for a single device out to interested listeners.
+
+    The dispatcher holds the only status subscription on the device. Pushes that
+    arrive within the same loop iteration, or within `window` seconds, are merged
+    and diffed against the previous snapshot once. Only listeners that declared
+    interest in one of the changed keys are woken up, and each of them at most once
+    per flush. Pushes and the keys of the flushed status are counted in `stats`, if
+    given.
+
+    Each push that differs from the previous snapshot is copied on the client
+    thread, parsed once into an immutable `DeviceStatus` in the event loop and
+    stamped with a new, higher version. Entities read only that snapshot, `status`,
+    and key the values they derive from it by its version.
+    """
+
+    hass: HomeAssistant
+    device: BaseDevice
+    window: float
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device: BaseDevice,
+        window: float = 0,
+        stats: DeviceStats | None = None,
+    ) -> None:
+        """Create a new dispatcher for the given device."""
+        self.hass = hass
+        self.device = device
+        self.window = window
+        self.stats = stats
+        self._listeners: dict[StatusListener, frozenset[str] | None] = {}
+        self.status: DeviceStatus = parse_status(dict(device.status), next(_versions))
+        self._lock = threading.Lock()
+        self._pending: dict[str, Any] | None = None
+        self._pushes = 0
+        self._pushed_at = 0.0
+        self._flush_scheduled = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def _on_status(self, status: dict[str, Any]) -> None:
+        """Receive a status push from the client thread."""
+        # smarter_client shares status subscribers between all devices, so pushes
+        # for other devices arrive here too.
+        if status is not self.device.status:
+            return
+
+        with self._lock:
+            self._pending = dict(status)
+            self._pushes += 1
+            self._pushed_at = time.monotonic()
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        """Flush now, or once the coalescing window has passed."""
+        if self.window > 0:
+            self._flush_handle = self.hass.loop.call_later(
+                self.window, self._async_flush
+            )
+        else:
+            self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Diff the latest status and wake listeners of changed keys."""
+        self._flush_handle = None
+        with self._lock:
+            status, self._pending = self._pending, None
+            pushes, self._pushes = self._pushes, 0
+            pushed_at = self._pushed_at
+            self._flush_scheduled = False
+
+        if status is None:
+            return
+        if pushes and self.stats is not None:
+            self.stats.async_record_pushes(pushes, pushed_at)
+            self.stats.async_record_status_keys(len(status))
+
+        previous = self.status.raw
+        changed = frozenset(
+            key
+            for key in status.keys() | previous.keys()
+            if status.get(key) != previous.get(key)
+        )
+        if not changed:
+            return
+
+        self.status = parse_status(status, next(_versions))
+        for listener, keys in list(self._listeners.items()):
+            if keys is None or not keys.isdisjoint(changed):
+                listener(changed)
+
+    @callback
+    def async_add_listener(
+        self, listener: StatusListener, keys: Iterable[str] | None = None
+    ) -> CALLBACK_TYPE:
+        """
+        Register a listener for status changes.
+
+        Args:
+            listener: called in the event loop with the set of changed keys
+            keys: status keys the listener depends on. `None` for all keys.
+        Returns:
+            Callback that removes the listener.
+        """
+        if not self._listeners:
+            self.device.subscribe_status(self._on_status)
+
+        self._listeners[listener] = None if keys is None else frozenset(keys)
+
+        @callback
+        def remove_listener() -> None:
+            if listener not in self._listeners:
+                return
+            del self._listeners[listener]
+            if not self._listeners:
+                self.device.unsubscribe_status(self._on_status)
+                self._async_cancel_flush()
+
+        return remove_listener
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop all listeners, pending pushes and the device subscription."""
+        if self._listeners:
+            self._listeners.clear()
+            self.device.unsubscribe_status(self._on_status)
+        self._async_cancel_flush()
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        with self._lock:
+            self._pending = None
+            self._pushes = 0
+            self._flush_scheduled = False
+
+    @callback
+    def async_set_device(self, device: BaseDevice) -> None:
+        """
+        Move the subscription to a new device object with the same ID.
+
+        Listeners are woken up for every key that differs between the last known
+        status and the status of the new device.
+        """
+        previous = self.device
+        self.device = device
+        if self._listeners:
+            previous.unsubscribe_status(self._on_status)
+            device.subscribe_status(self._on_status)
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        with self._lock:
+            self._pending = dict(device.status)
+        self._async_flush()
+
+    @property
+    def version(self) -> int:
+        """Return the version of the current status snapshot."""
+        return self.status.version
+
+    @property
+    def listener_count(self) -> int:
+        """Return the number of registered listeners."""
+        return len(self._listeners)
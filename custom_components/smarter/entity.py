@@ -1,19 +1,86 @@
 """Smarter base entity definitions."""
 
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any, TypeVar
+
 from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity, EntityDescription
 from smarter_client.managed_devices.base import BaseDevice
 
-from .const import DOMAIN, MANUFACTURER
+from .const import (
+    CONF_COMPACT_ATTRIBUTES,
+    DOMAIN,
+    MANUFACTURER,
+    SIGNAL_DEVICE_REPLACED,
+    SIGNAL_PENDING_COMMAND,
+)
+from .rate_limiter import CommandPriority
+from .status import DeviceStatus
+
+if TYPE_CHECKING:
+    from .dispatcher import StatusDispatcher
+    from .smarter_hub import SmarterHub
 
 # from .const import LOGGER
 
+_T = TypeVar("_T")
+
+# Status keys read by `SmarterEntity.extra_state_attributes`
+ATTRIBUTE_STATUS_KEYS = frozenset(("kettle_is_present", "calibrated"))
+
+# Status keys that change while a device is in use. Each change would store a new
+# set of attributes in the recorder, so they are not recorded as attributes.
+VOLATILE_STATUS_KEYS = frozenset(
+    (
+        "state",
+        "water_temperature",
+        "water_level",
+        "target_temperature",
+        "kettle_is_present",
+    )
+)
+
+# Status keys that only change with the device's settings or firmware. The only
+# status attributes in compact attribute mode.
+STABLE_STATUS_KEYS = frozenset(
+    ("device_model", "firmware_version", "boil_temperature", "keep_warm_time")
+)
+
 
 class SmarterEntity(Entity):
-    """Representation of a Smarter sensor."""
+    """
+    Representation of a Smarter sensor.
+
+    The unique ID is built once, and the device info whenever the model, name or
+    firmware of the device changes, as Home Assistant reads both often. Entities
+    read the device status from its immutable snapshot, `status`, and values
+    derived from it are computed once per snapshot, see `_memoized`. The hub and
+    the status dispatcher of the device are looked up once the entity is added, as
+    the snapshot is read on every state write.
+    """
+
+    # Kept out of the instance dict, which Entity instances still have
+    __slots__ = (
+        "device",
+        "_device_info",
+        "_device_info_key",
+        "_dispatcher",
+        "_hub",
+        "_memo",
+        "_memo_version",
+    )
 
     _attr_has_entity_name = True
+    _attr_should_poll = False
+    _unrecorded_attributes = ATTRIBUTE_STATUS_KEYS & VOLATILE_STATUS_KEYS
+
+    # Whether attributes are limited to stable keys, see `CONF_COMPACT_ATTRIBUTES`
+    compact_attributes = False
 
     entity_description: EntityDescription
 
@@ -27,55 +94,205 @@ class SmarterEntity(Entity):
         """Initialize the sensor."""
         self.entity_description = description
         self.device = device
-        self._state = None
+        self._attr_unique_id = "-".join(
+            (device.id, device.type, description.key if description else "device")
+        )
+        self._device_info: DeviceInfo | None = None
+        self._device_info_key: tuple[str | None, ...] | None = None
+        self._dispatcher: StatusDispatcher | None = None
+        self._hub: SmarterHub | None = None
+        self._memo: dict[str, Any] = {}
+        self._memo_version: int | None = None
+
+    @property
+    def hub(self) -> SmarterHub:
+        """Return the hub that owns this entity's device."""
+        if (hub := self._hub) is not None:
+            return hub
+        return self.hass.data[DOMAIN][self.platform.config_entry.entry_id]["hub"]
+
+    @property
+    def status(self) -> DeviceStatus:
+        """Return the latest status snapshot of the device."""
+        if (dispatcher := self._dispatcher) is not None:
+            return dispatcher.status
+        return self.hub.get_status(self.device)
+
+    @property
+    def command_priority(self) -> CommandPriority:
+        """
+        Return the rate limiter lane of commands for the current service call.
+
+        A call made by a user, e.g. from the UI, is interactive. Calls without a
+        user, made by automations and scripts, wait behind them.
+        """
+        context = self._context
+        if context is not None and context.user_id is None:
+            return CommandPriority.BACKGROUND
+        return CommandPriority.INTERACTIVE
+
+    @property
+    def status_keys(self) -> frozenset[str] | None:
+        """
+        Return the device status keys this entity's state depends on.
+
+        Returning `None` subscribes the entity to every status change.
+        """
+        return None
+
+    @property
+    def attribute_status_keys(self) -> frozenset[str]:
+        """Return the device status keys read by `extra_state_attributes`."""
+        return frozenset() if self.compact_attributes else ATTRIBUTE_STATUS_KEYS
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass.
 
         To be extended by integrations.
         """
-        self.device.subscribe_status(self._on_state_update)
+        self.compact_attributes = self.platform.config_entry.options.get(
+            CONF_COMPACT_ATTRIBUTES, False
+        )
+        hub = self._hub = self.hub
+        self.async_on_remove(self._async_release_hub)
+        self.async_on_remove(hub.async_register_entity(self.entity_id, self.device))
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_DEVICE_REPLACED.format(self.device.id),
+                self._on_device_replaced,
+            )
+        )
+        self._async_subscribe_status(hub)
 
-    async def async_will_remove_from_hass(self) -> None:
-        """Run when entity will be removed from hass.
+    @callback
+    def _async_subscribe_status(self, hub: SmarterHub) -> None:
+        """
+        Write the state when the watched status keys or their pending commands change.
 
-        To be extended by integrations.
+        Subclasses whose state does not depend on the status can skip this.
+        """
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_PENDING_COMMAND.format(self.device.id),
+                self._on_pending_command,
+            )
+        )
+        self.async_on_remove(
+            hub.async_subscribe_status(
+                self.device, self._on_state_update, self.status_keys
+            )
+        )
+        self._dispatcher = hub.get_dispatcher(self.device.id)
+
+    @callback
+    def _async_release_hub(self) -> None:
+        """Drop the hub and dispatcher, which may be shut down with the entry."""
+        self._hub = None
+        self._dispatcher = None
+
+    @callback
+    def _on_device_replaced(self, device: BaseDevice) -> None:
+        """Swap the cached device for the live device of the same ID."""
+        self.device = device
+        self._dispatcher = self.hub.get_dispatcher(device.id)
+
+    @callback
+    def _on_pending_command(self, status_key: str) -> None:
+        """Write the state when a pending command of a watched key changes."""
+        status_keys = self.status_keys
+        if status_keys is None or status_key in status_keys:
+            self.async_write_ha_state()
+            self.hub.get_device_stats(self.device.id).async_record_state_write()
+
+    def _memoized(self, name: str, compute: Callable[[DeviceStatus], _T]) -> _T:
+        """
+        Return a value derived from the device status, computed once per version.
+
+        Values are dropped whenever the hub stamps a new status snapshot of the
+        device, so repeated reads while a state is written compute them once. Memoized
+        values, e.g. attribute dicts, must not be changed by the caller.
+
+        Args:
+            name: name of the value, unique within the entity
+            compute: returns the value from a status snapshot
+        """
+        status = self.status
+        version = status.version
+        if not version:
+            return compute(status)
+
+        memo = self._memo
+        if version != self._memo_version:
+            self._memo_version = version
+            memo.clear()
+        elif name in memo:
+            return memo[name]
+
+        value = memo[name] = compute(status)
+        return value
+
+    def _pending_value(self, status_key: str, default: Any) -> Any:
+        """Return the optimistic value of a status key, or `default` if none."""
+        pending = self.hub.pending_commands.get(self.device.id, status_key)
+        return default if pending is None else pending.value
+
+    async def _async_send_optimistic(
+        self,
+        status_key: str,
+        value: Any,
+        resolves: Callable[[Any], bool],
+        command: Awaitable,
+    ) -> None:
         """
-        self.device.unsubscribe_status(self._on_state_update)
+        Show `value` until the device status confirms a command.
+
+        Args:
+            status_key: status key the command changes
+            value: optimistic value shown by the entity
+            resolves: returns whether a status value confirms the command
+            command: sends the command
+        """
+        pending_commands = self.hub.pending_commands
+        pending_commands.async_add(self.device, status_key, value, resolves)
+        try:
+            await command
+        except BaseException:
+            pending_commands.async_discard(self.device.id, status_key)
+            raise
 
     @callback
-    def _on_state_update(self, state):
+    def _on_state_update(self, changed_keys: frozenset[str]):
         """Handle state update."""
         # LOGGER.debug(
         #     "[%s] Received state update for %s",
         #     self.unique_id,
         #     self.device.device.identifier,
         # )
-        # LOGGER.debug(state)
-        self.schedule_update_ha_state()
-
-    @property
-    def unique_id(self):
-        """Return a unique identifier for this sensor."""
-        return "-".join(
-            (
-                self.device.id,
-                self.device.type,
-                self.entity_description.key if self.entity_description else "device",
-            )
+        # LOGGER.debug(changed_keys)
+        start = time.perf_counter()
+        self.async_write_ha_state()
+        self.hub.get_device_stats(self.device.id).async_record_state_write(
+            time.perf_counter() - start
         )
 
     @property
     def device_info(self) -> DeviceInfo | None:
         """Return device information for this sensor."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.device.device.identifier)},
-            manufacturer=MANUFACTURER,
-            model=self.device.model,
-            name=self.device.friendly_name,
-            suggested_area="Kitchen",
-            sw_version=self.device.firmware_version,
-        )
+        device = self.device
+        key = (device.model, device.friendly_name, device.firmware_version)
+        if key != self._device_info_key:
+            self._device_info_key = key
+            self._device_info = DeviceInfo(
+                identifiers={(DOMAIN, device.device.identifier)},
+                manufacturer=MANUFACTURER,
+                model=key[0],
+                name=key[1],
+                suggested_area="Kitchen",
+                sw_version=key[2],
+            )
+        return self._device_info
 
     @property
     def available(self) -> bool:
@@ -84,9 +301,20 @@ class SmarterEntity(Entity):
 
     @property
     def extra_state_attributes(self):
-        """Return extra device attributes associated with entity."""
+        """
+        Return extra device attributes associated with entity.
+
+        In compact attribute mode, only the device ID. The other values are shown by
+        their own entities.
+        """
+        return self._memoized("attributes", self._status_attributes)
+
+    def _status_attributes(self, status: DeviceStatus) -> dict[str, Any]:
+        if self.compact_attributes:
+            return {"device_id": self.device.id}
+
         return {
             "device_id": self.device.id,
-            "kettle_is_present": self.device.status.get("kettle_is_present"),
-            "calibrated": self.device.status.get("calibrated"),
+            "kettle_is_present": status.kettle_is_present,
+            "calibrated": status.calibrated,
         }
@@ -0,0 +1,90 @@
+"""Share one hub per Smarter account between config entries."""
+
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    CONF_REFRESH_TOKEN,
+    CONF_STATUS_WINDOW,
+    DATA_FLOW_HUBS,
+    DATA_HUBS,
+    DEFAULT_STATUS_WINDOW,
+    DOMAIN,
+    LOGGER,
+)
+from .smarter_hub import SmarterHub
+
+
+class SmarterHubRegistry:
+    """
+    Reference-counted hubs, by account.
+
+    Config entries of the same account share a hub, and with it one signed-in client,
+    one set of device objects and one status stream per device. A hub is shut down
+    when the last entry that uses it releases it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Create a new, empty registry."""
+        self.hass = hass
+        self._hubs: dict[str, SmarterHub] = {}
+        self._entries: dict[str, set[str]] = {}
+
+    @staticmethod
+    def account(entry: ConfigEntry) -> str:
+        """Return the key of the account of a config entry."""
+        return entry.data[CONF_USERNAME].casefold()
+
+    def entry_count(self, account: str) -> int:
+        """Return the number of config entries that use the hub of an account."""
+        return len(self._entries.get(account, ()))
+
+    @callback
+    def async_acquire(self, entry: ConfigEntry) -> SmarterHub:
+        """
+        Return the hub of an entry's account, creating it for the first entry.
+
+        A new hub takes over the session of the config flow that created the entry,
+        if there is one.
+        """
+        account = self.account(entry)
+        status_window = entry.options.get(CONF_STATUS_WINDOW, DEFAULT_STATUS_WINDOW)
+        flow_hubs: dict[str, SmarterHub] = self.hass.data[DOMAIN].get(
+            DATA_FLOW_HUBS, {}
+        )
+        flow_hub = flow_hubs.pop(entry.data.get(CONF_REFRESH_TOKEN), None)
+
+        if (hub := self._hubs.get(account)) is None:
+            hub = self._hubs[account] = flow_hub or SmarterHub(self.hass)
+        else:
+            LOGGER.debug("Sharing the hub of %s with entry %s", account, entry.title)
+
+        hub.status_window = status_window
+        self._entries.setdefault(account, set()).add(entry.entry_id)
+        return hub
+
+    @callback
+    def async_release(self, entry: ConfigEntry) -> None:
+        """Release an entry's hold on its account's hub, shutting it down if unused."""
+        account = self.account(entry)
+        entries = self._entries.get(account, set())
+        entries.discard(entry.entry_id)
+        if entries:
+            return
+
+        self._entries.pop(account, None)
+        if (hub := self._hubs.pop(account, None)) is not None:
+            hub.async_shutdown()
+
+
+@callback
+def async_get_hub_registry(hass: HomeAssistant) -> SmarterHubRegistry:
+    """Return the hub registry, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (registry := domain_data.get(DATA_HUBS)) is None:
+        registry = domain_data[DATA_HUBS] = SmarterHubRegistry(hass)
+
+    return registry
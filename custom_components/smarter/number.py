@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from homeassistant.components.number import (
     NumberDeviceClass,
@@ -11,20 +12,38 @@ from homeassistant.components.number import (
     NumberEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature, UnitOfTime
+from homeassistant.const import Platform, UnitOfTemperature, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from smarter_client.managed_devices.base import BaseDevice
 
+from .capabilities import supported_descriptions
 from .const import DOMAIN
 from .entity import SmarterEntity
+from .rate_limiter import CommandPriority
+
+if TYPE_CHECKING:
+    from .smarter_hub import SmarterHub
+
+
+def make_set_setting(command_name: str, status_key: str):
+    """Return a function that writes a device setting, coalescing rapid changes."""
+
+    def _set_setting(
+        hub: SmarterHub, device: BaseDevice, value: int, priority: CommandPriority
+    ) -> Awaitable:
+        return hub.command_coalescer.async_send(
+            device, command_name, status_key, value, priority
+        )
+
+    return _set_setting
 
 
 @dataclass(frozen=True, kw_only=True)
 class SmarterNumberEntityDescription(NumberEntityDescription):
     """Class describing Ecobee number entities."""
 
-    set_fn: Callable[[BaseDevice, int], Awaitable]
+    set_fn: Callable[[SmarterHub, BaseDevice, int, CommandPriority], Awaitable]
 
 
 NUMBER_TYPES = [
@@ -36,7 +55,7 @@ NUMBER_TYPES = [
         native_max_value=100,
         native_step=1,
         name="Boil Temperature",
-        set_fn=lambda device, value: device.set_boil_temperature(value),
+        set_fn=make_set_setting("set_boil_temperature", "boil_temperature"),
     ),
     SmarterNumberEntityDescription(
         key="keep_warm_time",
@@ -46,7 +65,7 @@ NUMBER_TYPES = [
         native_min_value=0,
         native_max_value=40,
         native_step=1,
-        set_fn=lambda device, value: device.set_keep_warm_time(value),
+        set_fn=make_set_setting("set_keep_warm_time", "keep_warm_time"),
     ),
 ]
 
@@ -61,7 +80,7 @@ async def async_setup_entry(
     entities = [
         SmarterNumber(device, description)
         for device in data.get("devices")
-        for description in NUMBER_TYPES
+        for description in supported_descriptions(Platform.NUMBER, device, NUMBER_TYPES)
     ]
 
     async_add_entities(entities, True)
@@ -73,11 +92,27 @@ class SmarterNumber(SmarterEntity, NumberEntity):
     entity_description: SmarterNumberEntityDescription
     _attr_has_entity_name = True
 
-    def set_native_value(self, value: float) -> None:
+    @property
+    def status_keys(self) -> frozenset[str] | None:
+        """Return the device status keys this entity's state depends on."""
+        return self.attribute_status_keys | {self.entity_description.key}
+
+    async def async_set_native_value(self, value: float) -> None:
         """Set value."""
-        self.entity_description.set_fn(self.device, int(value))
+        key = self.entity_description.key
+        value = int(value)
+        await self._async_send_optimistic(
+            key,
+            float(value),
+            lambda status_value: status_value == value,
+            self.entity_description.set_fn(
+                self.hub, self.device, value, self.command_priority
+            ),
+        )
 
     @property
     def native_value(self) -> float | None:
-        """Return the value reported by the number."""
-        return float(self.device.status.get(self.entity_description.key))
+        """Return the value reported by the number, or the value just set."""
+        return self._pending_value(
+            self.entity_description.key, self.status.get(self.entity_description.key)
+        )
@@ -0,0 +1,168 @@
+"""Track commands that were sent but are not yet reflected in the device status."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from smarter_client.managed_devices.base import BaseDevice
+
+from .const import LOGGER, SIGNAL_PENDING_COMMAND
+
+if TYPE_CHECKING:
+    from .smarter_hub import SmarterHub
+
+# Seconds to wait for the device status to confirm a command before rolling back
+PENDING_COMMAND_TIMEOUT = 10
+
+# Number of confirm latencies kept for diagnostics
+CONFIRM_LATENCY_SAMPLES = 100
+
+
+@dataclass
+class PendingCommand:
+    """Command whose effect on a status key has not been reported yet."""
+
+    value: Any
+    resolves: Callable[[Any], bool]
+    issued_at: float
+    cancel_timeout: CALLBACK_TYPE
+    unsubscribe: CALLBACK_TYPE
+
+
+class PendingCommandTable:
+    """
+    Optimistic values of device status keys, by device and key.
+
+    Entities show the value of a pending command until a status push satisfies its
+    `resolves` check, or roll back to the reported status after
+    `PENDING_COMMAND_TIMEOUT` seconds. Entities are notified of added and dropped
+    commands through `SIGNAL_PENDING_COMMAND`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: SmarterHub,
+        timeout: float = PENDING_COMMAND_TIMEOUT,
+    ) -> None:
+        """Create a new pending-command table."""
+        self.hass = hass
+        self.hub = hub
+        self.timeout = timeout
+        self.confirmed = 0
+        self.rolled_back = 0
+        self.confirm_latencies: deque[float] = deque(maxlen=CONFIRM_LATENCY_SAMPLES)
+        self._pending: dict[tuple[str, str], PendingCommand] = {}
+
+    def get(self, device_id: str, status_key: str) -> PendingCommand | None:
+        """Return the pending command for a status key of a device, if any."""
+        return self._pending.get((device_id, status_key))
+
+    @callback
+    def async_add(
+        self,
+        device: BaseDevice,
+        status_key: str,
+        value: Any,
+        resolves: Callable[[Any], bool],
+    ) -> None:
+        """
+        Record a command that is expected to change a status key.
+
+        Replaces any pending command for the same key. Nothing is recorded if the
+        status already satisfies `resolves`.
+
+        Args:
+            device: device the command was sent to
+            status_key: status key the command changes
+            value: optimistic value shown by entities until the command resolves
+            resolves: returns whether a status value confirms the command
+        """
+        key = (device.id, status_key)
+        previous = self._pending.pop(key, None)
+        if previous is not None:
+            previous.cancel_timeout()
+
+        if resolves(self.hub.get_status(device).get(status_key)):
+            if previous is not None:
+                previous.unsubscribe()
+                self._async_notify(device.id, status_key)
+            return
+
+        self._pending[key] = PendingCommand(
+            value,
+            resolves,
+            time.monotonic(),
+            async_call_later(
+                self.hass, self.timeout, partial(self._async_rollback, key)
+            ),
+            previous.unsubscribe
+            if previous is not None
+            else self.hub.async_subscribe_status(
+                device, lambda _: self._async_check(key), (status_key,)
+            ),
+        )
+        self._async_notify(device.id, status_key)
+
+    @callback
+    def async_discard(self, device_id: str, status_key: str) -> None:
+        """Drop a pending command, e.g. because it could not be sent."""
+        if self._async_remove((device_id, status_key)) is not None:
+            self._async_notify(device_id, status_key)
+
+    @callback
+    def async_discard_device(self, device_id: str) -> None:
+        """Drop the pending commands of a device without notifying entities."""
+        for key in [key for key in self._pending if key[0] == device_id]:
+            self._async_remove(key)
+
+    @callback
+    def _async_check(self, key: tuple[str, str]) -> None:
+        device_id, status_key = key
+        pending = self._pending.get(key)
+        status = self.hub.get_status(self.hub.get_device(device_id))
+        if pending is None or not pending.resolves(status.get(status_key)):
+            return
+
+        self._async_remove(key)
+        latency = time.monotonic() - pending.issued_at
+        self.confirmed += 1
+        self.confirm_latencies.append(latency)
+        LOGGER.debug(
+            "Status of %s confirmed %s after %.3fs", device_id, status_key, latency
+        )
+
+    @callback
+    def _async_rollback(self, key: tuple[str, str], _now=None) -> None:
+        device_id, status_key = key
+        self._async_remove(key)
+        self.rolled_back += 1
+        LOGGER.debug(
+            "Status of %s did not confirm %s within %ss, rolling back",
+            device_id,
+            status_key,
+            self.timeout,
+        )
+        self._async_notify(device_id, status_key)
+
+    @callback
+    def _async_remove(self, key: tuple[str, str]) -> PendingCommand | None:
+        if (pending := self._pending.pop(key, None)) is not None:
+            pending.cancel_timeout()
+            pending.unsubscribe()
+
+        return pending
+
+    @callback
+    def _async_notify(self, device_id: str, status_key: str) -> None:
+        async_dispatcher_send(
+            self.hass, SIGNAL_PENDING_COMMAND.format(device_id), status_key
+        )
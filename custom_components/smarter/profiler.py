@@ -0,0 +1,122 @@
+"""On-demand profiling of the integration's hot paths."""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+from typing import Any
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_PROFILER, DOMAIN, LOGGER, SERVICE_ATTR_SECONDS
+
+# Source directory of the integration, which the profile is scoped to
+PACKAGE_DIR = os.path.dirname(__file__)
+
+# Number of functions listed in the summary report
+SUMMARY_FUNCTIONS = 40
+
+# (file name, line number, function name) as keyed by `pstats`
+FunctionKey = tuple[str, int, str]
+
+
+def integration_stats(
+    stats: dict[FunctionKey, tuple], package_dir: str = PACKAGE_DIR
+) -> dict[FunctionKey, tuple]:
+    """
+    Scope the stats of a `cProfile.Profile` to an integration.
+
+    Keeps the functions defined in `package_dir`, and the functions they call
+    directly, e.g. `Entity.async_write_ha_state`. Calls from elsewhere are dropped
+    from the callers and totals of the functions that are kept.
+
+    Args:
+        stats: `stats` of a profile, after `create_stats`
+        package_dir: source directory of the integration
+    Returns:
+        Stats in the same format, loadable by `pstats` once marshalled.
+    """
+    ours = {func for func in stats if func[0].startswith(package_dir)}
+    scoped: dict[FunctionKey, tuple] = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        if func in ours:
+            scoped[func] = (cc, nc, tt, ct, callers)
+        elif our_callers := {
+            caller: counts for caller, counts in callers.items() if caller in ours
+        }:
+            # Callers keep calls, primitive calls, own and total time
+            totals = [sum(column) for column in zip(*our_callers.values(), strict=True)]
+            nc, cc, tt, ct = totals
+            scoped[func] = (cc, nc, tt, ct, our_callers)
+
+    return scoped
+
+
+def summary(stats_path: str, seconds: float) -> str:
+    """Return a report of a stats file, functions with the most time first."""
+    stream = io.StringIO()
+    stream.write(
+        f"Smarter profile of {seconds:g}s, taken {dt_util.now().isoformat()}\n"
+        "Coroutines are timed while they run, not while they wait.\n"
+    )
+    report = pstats.Stats(stats_path, stream=stream)
+    report.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_FUNCTIONS)
+    report.print_callers(SUMMARY_FUNCTIONS)
+    return stream.getvalue()
+
+
+async def async_handle_profile(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """
+    Profile the integration for the requested number of seconds.
+
+    Home Assistant is profiled deterministically with `cProfile` during the window
+    only, so profiling costs nothing otherwise. The stats are scoped to the
+    integration, see `integration_stats`, and written to the config directory as a
+    stats file loadable with `pstats` and a summary report.
+
+    Returns:
+        Paths of the summary and stats files.
+    Raises:
+        HomeAssistantError: if a profile is already being taken
+    """
+    seconds = call.data[SERVICE_ATTR_SECONDS]
+    data: dict[str, Any] = hass.data.setdefault(DOMAIN, {})
+    if data.get(DATA_PROFILER) is not None:
+        raise HomeAssistantError("A Smarter profile is already being taken")
+
+    profile = data[DATA_PROFILER] = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as ex:  # another profiler, e.g. of the profiler integration
+        data.pop(DATA_PROFILER)
+        raise HomeAssistantError(f"Cannot profile the integration: {ex}") from ex
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile.disable()
+        data.pop(DATA_PROFILER)
+
+    profile.create_stats()
+    stats = integration_stats(profile.stats)
+    timestamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+    summary_path = hass.config.path(f"smarter_profile_{timestamp}.txt")
+    stats_path = hass.config.path(f"smarter_profile_{timestamp}.prof")
+
+    def _write() -> None:
+        with open(stats_path, "wb") as file:
+            marshal.dump(stats, file)
+        with open(summary_path, "w", encoding="utf-8") as file:
+            file.write(summary(stats_path, seconds))
+
+    await hass.async_add_executor_job(_write)
+    LOGGER.info("Wrote Smarter profile to %s and %s", summary_path, stats_path)
+
+    return {"summary": summary_path, "stats": stats_path, "functions": len(stats)}
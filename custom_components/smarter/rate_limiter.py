@@ -0,0 +1,162 @@
+"""Limit the rate at which commands of an account are sent to the Smarter cloud."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from enum import IntEnum
+
+from homeassistant.core import HomeAssistant, callback
+
+# Commands per second that may be sent for an account
+COMMAND_RATE = 2.0
+
+# Commands that may be sent in a burst before the rate applies
+COMMAND_BURST = 5
+
+# Number of wait times kept per priority for diagnostics
+WAIT_TIME_SAMPLES = 100
+
+
+class CommandPriority(IntEnum):
+    """Lane of a command in the rate limiter, lower values are sent first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class CommandRateLimiter:
+    """
+    Token bucket shared by the commands of all devices of an account.
+
+    Commands wait in one FIFO lane per `CommandPriority` once the bucket is empty,
+    and a waiting interactive command is always sent before a background one.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        rate: float = COMMAND_RATE,
+        burst: int = COMMAND_BURST,
+    ) -> None:
+        """
+        Create a new rate limiter.
+
+        Args:
+            rate: tokens added to the bucket per second
+            burst: size of the bucket
+        """
+        self.hass = hass
+        self.rate = rate
+        self.burst = burst
+        self.wait_times: dict[CommandPriority, deque[float]] = {
+            priority: deque(maxlen=WAIT_TIME_SAMPLES) for priority in CommandPriority
+        }
+        self._tokens = float(burst)
+        self._updated = hass.loop.time()
+        self._lanes: dict[CommandPriority, deque[asyncio.Future]] = {
+            priority: deque() for priority in CommandPriority
+        }
+        self._wake_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of commands waiting for a token."""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def queue_depths(self) -> dict[CommandPriority, int]:
+        """Return the number of commands waiting for a token, by priority."""
+        return {priority: len(lane) for priority, lane in self._lanes.items()}
+
+    def wait_time_percentile(
+        self, priority: CommandPriority, percentile: float
+    ) -> float | None:
+        """
+        Return a percentile of the recent wait times of a priority.
+
+        Args:
+            priority: lane of the commands
+            percentile: percentile between 0 and 100
+        Returns:
+            Seconds waited, or `None` if no command of the priority was sent yet.
+        """
+        samples = sorted(self.wait_times[priority])
+        if not samples:
+            return None
+
+        return samples[max(1, math.ceil(len(samples) * percentile / 100)) - 1]
+
+    async def async_acquire(self, priority: CommandPriority) -> float:
+        """
+        Wait until a command of the given priority may be sent.
+
+        Returns:
+            Seconds the command waited.
+        """
+        start = self.hass.loop.time()
+        self._async_refill()
+        if self._tokens >= 1 and not any(
+            self._lanes[lane] for lane in CommandPriority if lane <= priority
+        ):
+            self._tokens -= 1
+            self.wait_times[priority].append(0.0)
+            return 0.0
+
+        future = self.hass.loop.create_future()
+        self._lanes[priority].append(future)
+        self._async_schedule_wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in self._lanes[priority]:
+                self._lanes[priority].remove(future)
+            elif not future.cancelled():
+                # The token was handed over as the caller was cancelled
+                self._tokens += 1
+                self._async_wake()
+            raise
+
+        waited = self.hass.loop.time() - start
+        self.wait_times[priority].append(waited)
+        return waited
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop handing out tokens to waiting commands."""
+        if self._wake_handle is not None:
+            self._wake_handle.cancel()
+            self._wake_handle = None
+        for lane in self._lanes.values():
+            while lane:
+                lane.popleft().cancel()
+
+    @callback
+    def _async_refill(self) -> None:
+        now = self.hass.loop.time()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @callback
+    def _async_schedule_wake(self) -> None:
+        if self._wake_handle is None:
+            self._wake_handle = self.hass.loop.call_later(
+                max(0.0, (1 - self._tokens) / self.rate), self._async_wake
+            )
+
+    @callback
+    def _async_wake(self) -> None:
+        """Hand out tokens to waiting commands, by priority."""
+        if self._wake_handle is not None:
+            self._wake_handle.cancel()
+            self._wake_handle = None
+        self._async_refill()
+        for lane in self._lanes.values():
+            while lane and self._tokens >= 1:
+                future = lane.popleft()
+                if not future.done():
+                    self._tokens -= 1
+                    future.set_result(None)
+
+        if self.queue_depth:
+            self._async_schedule_wake()
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime
 from functools import partial
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -12,11 +16,26 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfTemperature
-from homeassistant.core import HassJobType, HomeAssistant, SupportsResponse
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    Platform,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HassJobType,
+    HomeAssistant,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.helpers import service
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.typing import StateType
 
+from .capabilities import supported_descriptions
 from .const import (
     DOMAIN,
     SERVICE_GET_COMMANDS,
@@ -27,12 +46,26 @@ from .const import (
     SERVICE_SEND_COMMAND,
     SmarterSensorEntityFeature,
 )
-from .entity import SmarterEntity
+from .device_stats import DeviceStats
+from .entity import STABLE_STATUS_KEYS, VOLATILE_STATUS_KEYS, SmarterEntity
+from .significance import SignificanceFilter, SignificanceSettings
+from .status import DeviceStatus
+
+if TYPE_CHECKING:
+    from .smarter_hub import SmarterHub
 
 
 @dataclass(frozen=True, kw_only=True)
 class SmarterSensorEntityDescription(SensorEntityDescription):
-    """Represent the Smarter sensor entity description."""
+    """
+    Represent the Smarter sensor entity description.
+
+    Params:
+        significance: default settings of the changes the sensor publishes, which
+            the options of an entry override. `None` to publish every change.
+    """
+
+    significance: SignificanceSettings | None = None
 
 
 SENSOR_TYPES: tuple[SmarterSensorEntityDescription, ...] = (
@@ -43,6 +76,7 @@ SENSOR_TYPES: tuple[SmarterSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:thermometer",
+        significance=SignificanceSettings(deadband=1.0, hysteresis=1.0),
     ),
     SmarterSensorEntityDescription(
         key="boil_temperature",
@@ -72,6 +106,90 @@ SENSOR_TYPES: tuple[SmarterSensorEntityDescription, ...] = (
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:cup-water",
+        significance=SignificanceSettings(deadband=2.0, hysteresis=2.0),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SmarterDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describe a sensor that shows a runtime counter of a device."""
+
+    value_fn: Callable[[DeviceStats], StateType | datetime]
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[SmarterDiagnosticSensorEntityDescription, ...] = (
+    SmarterDiagnosticSensorEntityDescription(
+        key="status_pushes_per_minute",
+        name="Status Pushes per Minute",
+        native_unit_of_measurement="pushes/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:cloud-download",
+        value_fn=lambda stats: stats.status_pushes_per_minute,
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="last_status_push",
+        name="Last Status Push",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda stats: stats.last_status_push,
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="state_writes",
+        name="State Writes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:database-edit",
+        value_fn=lambda stats: stats.state_writes,
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="state_update_time",
+        name="State Update Time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: _milliseconds(stats.state_update_time),
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="suppressed_updates",
+        name="Suppressed Updates",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:filter-minus",
+        value_fn=lambda stats: stats.suppressed_updates,
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="commands",
+        name="Commands",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:send",
+        value_fn=lambda stats: stats.commands,
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="command_errors",
+        name="Command Errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:alert-circle",
+        value_fn=lambda stats: stats.command_errors,
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="command_latency_p50",
+        name="Command Latency p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats.command_latency.percentile(50)),
+    ),
+    SmarterDiagnosticSensorEntityDescription(
+        key="command_latency_p95",
+        name="Command Latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats.command_latency.percentile(95)),
     ),
 )
 
@@ -89,7 +207,7 @@ async def async_setup_entry(
     entities = [
         SmarterSensor(device, description)
         for device in devices
-        for description in SENSOR_TYPES
+        for description in supported_descriptions(Platform.SENSOR, device, SENSOR_TYPES)
     ]
 
     # Create special "device" entities that represent the main device
@@ -104,7 +222,13 @@ async def async_setup_entry(
         for device in data.get("devices")
     ]
 
-    async_add_entities(entities + device_entities, True)
+    diagnostic_entities = [
+        SmarterDiagnosticSensor(device, description)
+        for device in devices
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    ]
+
+    async_add_entities(entities + device_entities + diagnostic_entities, True)
 
     device_entities_map = {entity.entity_id: entity for entity in device_entities}
 
@@ -146,10 +270,87 @@ class SmarterSensor(SmarterEntity, SensorEntity):
 
     entity_description: SmarterSensorEntityDescription
 
+    # Published value of the sensor, `None` if every change is published
+    significance: SignificanceFilter | None = None
+    _publish_handle: CALLBACK_TYPE | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Set up the significance filter, and subscribe to status changes."""
+        await super().async_added_to_hass()
+        description = self.entity_description
+        if description.significance is None:
+            return
+
+        settings = description.significance.with_options(
+            description.key, self.platform.config_entry.options
+        )
+        if settings.enabled:
+            self.significance = SignificanceFilter(settings)
+            self.significance.publish(
+                self.status.get(description.key), time.monotonic()
+            )
+            self.async_on_remove(self._async_cancel_publish)
+
+    @property
+    def status_keys(self) -> frozenset[str] | None:
+        """Return the device status keys this entity's state depends on."""
+        return self.attribute_status_keys | {self.entity_description.key}
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        return self.device.status.get(self.entity_description.key)
+        if self.significance is not None:
+            return self.significance.value
+        return self.status.get(self.entity_description.key)
+
+    @callback
+    def _on_state_update(self, changed_keys: frozenset[str]):
+        """
+        Handle state update.
+
+        Changes of the measurement that are not significant are counted as
+        suppressed, and only written if an attribute changed too. A significant
+        change that comes too soon after the last one is written once the minimum
+        interval has passed.
+        """
+        significance = self.significance
+        key = self.entity_description.key
+        if significance is None or key not in changed_keys:
+            super()._on_state_update(changed_keys)
+            return
+
+        value = self.status.get(key)
+        now = time.monotonic()
+        if significance.is_significant(value):
+            if not (delay := significance.publish_delay(now)):
+                self._async_cancel_publish()
+                significance.publish(value, now)
+                super()._on_state_update(changed_keys)
+                return
+            if self._publish_handle is None:
+                self._publish_handle = async_call_later(
+                    self.hass, delay, self._async_publish_due
+                )
+
+        self.hub.get_device_stats(self.device.id).async_record_suppressed_update()
+        if changed_keys & self.attribute_status_keys:
+            super()._on_state_update(changed_keys)
+
+    @callback
+    def _async_publish_due(self, _now: datetime) -> None:
+        """Publish a change held back by the minimum interval."""
+        self._publish_handle = None
+        key = self.entity_description.key
+        value = self.status.get(key)
+        if self.significance.is_significant(value):
+            self.significance.publish(value, time.monotonic())
+            super()._on_state_update(frozenset((key,)))
+
+    @callback
+    def _async_cancel_publish(self) -> None:
+        if self._publish_handle is not None:
+            self._publish_handle()
+            self._publish_handle = None
 
 
 class SmarterDeviceSensor(SmarterSensor):
@@ -161,6 +362,7 @@ class SmarterDeviceSensor(SmarterSensor):
     """
 
     _attr_supported_features = SmarterSensorEntityFeature.SERVICE_AGENT
+    _unrecorded_attributes = VOLATILE_STATUS_KEYS
 
     @classmethod
     def get_service_metadata(clazz):
@@ -188,15 +390,37 @@ class SmarterDeviceSensor(SmarterSensor):
             ),
         )
 
+    @property
+    def status_keys(self) -> frozenset[str] | None:
+        """
+        Return the device status keys this entity's state depends on.
+
+        `None` unless in compact attribute mode, since every status key is exposed
+        as an attribute.
+        """
+        if self.compact_attributes:
+            return STABLE_STATUS_KEYS | {"state"}
+        return None
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        return self.device.status.get("state")
+        return self.status.state
 
-    @property
-    def extra_state_attributes(self):
-        """Return extra device attributes associated with entity."""
-        return {"device_id": self.device.id, **self.device.status}
+    def _status_attributes(self, status: DeviceStatus) -> dict[str, Any]:
+        """
+        Return every status key, or only the stable keys in compact attribute mode.
+
+        Values are shown as reported. Volatile keys are not recorded either way, see
+        `VOLATILE_STATUS_KEYS`.
+        """
+        status = status.raw
+        if self.compact_attributes:
+            return {
+                "device_id": self.device.id,
+                **{key: status[key] for key in STABLE_STATUS_KEYS if key in status},
+            }
+        return {"device_id": self.device.id, **status}
 
     async def async_quick_boil(self):
         """
@@ -204,7 +428,9 @@ class SmarterDeviceSensor(SmarterSensor):
 
         Equivalent to send_command("start_auto_boil", True).
         """
-        return self.async_send_command("start_auto_boil", True)
+        return await self.hub.async_send_command(
+            self.device, "start_auto_boil", True, priority=self.command_priority
+        )
 
     async def async_send_command(
         self,
@@ -216,10 +442,11 @@ class SmarterDeviceSensor(SmarterSensor):
         """Send command to device."""
         # The API requires a `value` to be set. The official client sends `True` if no
         # actual value is needed
-        return await self.hass.async_add_executor_job(
-            self.device.send_command,
+        return await self.hub.async_send_command(
+            self.device,
             command_name,
             command_data_text or command_data_number or command_data_boolean or True,
+            priority=self.command_priority,
         )
 
     async def async_get_commands(self):
@@ -237,3 +464,31 @@ class SmarterDeviceSensor(SmarterSensor):
             {"name": command.name, "example": command.example}
             for command in self.device.device.commands.values()
         ]
+
+
+class SmarterDiagnosticSensor(SmarterEntity, SensorEntity):
+    """
+    Representation of a runtime counter of a Smarter device.
+
+    The counters are kept in the hub, see `SmarterHub.get_device_stats`, and polled.
+    """
+
+    _attr_should_poll = True
+
+    entity_description: SmarterDiagnosticSensorEntityDescription
+
+    @callback
+    def _async_subscribe_status(self, hub: SmarterHub) -> None:
+        """Skip the status subscriptions, the counters do not depend on the status."""
+
+    @property
+    def native_value(self) -> StateType | datetime:
+        """Return the value of the counter."""
+        return self.entity_description.value_fn(
+            self.hub.get_device_stats(self.device.id)
+        )
+
+    @property
+    def extra_state_attributes(self):
+        """Return no attributes, the device status is shown by other entities."""
+        return None
@@ -0,0 +1,119 @@
+"""Publish only significant changes of a measurement."""
+
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+# Settings of `SignificanceSettings` that can be changed in the options of an entry
+SIGNIFICANCE_OPTIONS = ("deadband", "relative_deadband", "hysteresis", "min_interval")
+
+# Slack in comparing a change to a deadband, so that e.g. a step from 30.9 to 31.9
+# is not held back by a 1.0 deadband because of rounding
+TOLERANCE = 1e-9
+
+
+def significance_option(key: str, setting: str) -> str:
+    """Return the option that holds a setting of the sensor with a description key."""
+    return f"{key}_{setting}"
+
+
+@dataclass(frozen=True)
+class SignificanceSettings:
+    """
+    When a change of a measurement is worth publishing.
+
+    Params:
+        deadband: smallest change published, in the unit of the measurement
+        relative_deadband: smallest change published, in percent of the last
+            published value. The larger of both deadbands applies.
+        hysteresis: change needed on top of the deadband to reverse the direction
+            of the last published change, which hides jitter around a value
+        min_interval: seconds between published values. A change held back by it
+            is published once the interval has passed.
+    """
+
+    deadband: float = 0.0
+    relative_deadband: float = 0.0
+    hysteresis: float = 0.0
+    min_interval: float = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether any change is held back."""
+        return any(dataclasses.astuple(self))
+
+    def with_options(
+        self, key: str, options: Mapping[str, Any]
+    ) -> SignificanceSettings:
+        """Return the settings overridden by the options of an entry."""
+        return dataclasses.replace(
+            self,
+            **{
+                setting: float(options[option])
+                for setting in SIGNIFICANCE_OPTIONS
+                if (option := significance_option(key, setting)) in options
+            },
+        )
+
+
+class SignificanceFilter:
+    """
+    Track the published value of a measurement and tell which changes to publish.
+
+    Values that are not numbers, e.g. `None` when the device does not report the
+    measurement, are always significant.
+    """
+
+    def __init__(self, settings: SignificanceSettings) -> None:
+        """Create a filter that has not published a value yet."""
+        self.settings = settings
+        self.value: Any = None
+        self.published_at: float | None = None
+        # Sign of the last published change, 0 if there was none
+        self._direction = 0
+
+    def is_significant(self, value: Any) -> bool:
+        """Return whether a value differs enough from the published value."""
+        published = self.value
+        if not _is_number(value) or not _is_number(published):
+            return value != published or self.published_at is None
+
+        change = value - published
+        if not change:
+            return False
+
+        settings = self.settings
+        threshold = max(
+            settings.deadband, abs(published) * settings.relative_deadband / 100
+        )
+        if self._direction and (change > 0) != (self._direction > 0):
+            threshold += settings.hysteresis
+        return abs(change) >= threshold - TOLERANCE
+
+    def publish_delay(self, now: float) -> float:
+        """Return the seconds until a value may be published, 0 if right away."""
+        if self.published_at is None:
+            return 0.0
+        return max(0.0, self.published_at + self.settings.min_interval - now)
+
+    def publish(self, value: Any, now: float) -> None:
+        """
+        Record a published value.
+
+        Args:
+            value: value shown by the entity
+            now: `time.monotonic()` of the publication
+        """
+        if _is_number(value) and _is_number(self.value) and value != self.value:
+            self._direction = 1 if value > self.value else -1
+        elif not _is_number(value):
+            self._direction = 0
+        self.value = value
+        self.published_at = now
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
@@ -1,16 +1,58 @@
 """Defines module for integrating HomeAssistant with the Smarter API Client."""
 
+import asyncio
 import itertools
-from collections.abc import Generator
+import time
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from http import HTTPStatus
 from typing import Any
 
-from homeassistant.core import HomeAssistant
-from smarter_client.domain.models import LoginSession, User
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import dt as dt_util
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+from smarter_client.domain.models import LoginSession, Network, User
 from smarter_client.domain.smarter_client import SmarterClient
 from smarter_client.managed_devices import load_from_network
 from smarter_client.managed_devices.base import BaseDevice
 
-from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.command_coalescer import CommandCoalescer
+from custom_components.smarter.command_scheduler import CommandScheduler
+from custom_components.smarter.const import (
+    DEFAULT_STATUS_WINDOW,
+    LOGGER,
+    SIGNAL_DEVICE_REPLACED,
+)
+from custom_components.smarter.device_cache import CachedDevice
+from custom_components.smarter.device_stats import DeviceStats
+from custom_components.smarter.dispatcher import StatusDispatcher, StatusListener
+from custom_components.smarter.pending_commands import PendingCommandTable
+from custom_components.smarter.rate_limiter import CommandPriority, CommandRateLimiter
+from custom_components.smarter.status import DeviceStatus, parse_status
+from custom_components.smarter.transport import (
+    REQUEST_TIMEOUT,
+    SmarterTransport,
+    TransportError,
+)
+
+# Lifetime of a Firebase ID token, in seconds
+SESSION_DURATION = 3600
+
+# Seconds before expiry at which the ID token is refreshed ahead of a request
+TOKEN_REFRESH_MARGIN = 60
+
+# Maximum number of networks loaded at the same time during discovery
+MAX_DISCOVERY_WORKERS = 4
+
+# Responses of the token endpoint to a refresh token it does not accept
+REJECTED_TOKEN_STATUSES = (HTTPStatus.BAD_REQUEST, HTTPStatus.UNAUTHORIZED)
+
+# Number of sign-in, token and discovery events kept for diagnostics
+CONNECTION_HISTORY_SIZE = 50
 
 
 class DeviceNotFoundError(Exception):
@@ -26,16 +68,118 @@ class DeviceNotFoundError(Exception):
         super().__init__(f"No device found with id {external_device_id}")
 
 
+class _TimeoutAdapter(HTTPAdapter):
+    """Give requests of the blocking client a timeout, which it does not set."""
+
+    def __init__(self, timeout: float) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _is_rejected_token(ex: HTTPError) -> bool:
+    """Return whether an error of the token endpoint rejects the refresh token."""
+    # pyrebase raises a new HTTPError that wraps the one holding the response
+    cause = ex.args[0] if ex.args and isinstance(ex.args[0], HTTPError) else ex
+    return (
+        cause.response is not None
+        and cause.response.status_code in REJECTED_TOKEN_STATUSES
+    )
+
+
+def dispose_devices(devices: Iterable[BaseDevice]) -> None:
+    """
+    Stop the stream and session refresh threads smarter_client runs per device.
+
+    Unsubscribing does not stop them, as the client shares status subscriptions
+    between devices. Blocks until the threads have ended, so call it in the executor.
+    """
+    for device in devices:
+        if isinstance(device, CachedDevice):
+            continue
+        if (timer := getattr(device, "refresh_timer", None)) is not None:
+            timer.cancel()
+            timer.join()
+        stream = device.device._stream
+        if stream is not None and stream.sse is None and not stream.thread.is_alive():
+            # The stream failed to connect, closing it would wait for it forever
+            device.device._stream = None
+        device.dispose()
+
+
 class SmarterHub:
     """Provide a facade around the Smarter API."""
 
     hass: HomeAssistant
     client: SmarterClient
+    session: LoginSession | None
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        status_window: float = DEFAULT_STATUS_WINDOW,
+        request_timeout: float = REQUEST_TIMEOUT,
+    ):
+        """
+        Create a new instance of the SmarterHub class.
 
-    def __init__(self, hass: HomeAssistant):
-        """Create a new instance of the SmarterHub class."""
+        Params:
+            status_window: seconds over which status pushes are merged before
+                entity states are written. 0 merges pushes within one loop iteration.
+            request_timeout: seconds to wait for a response to a database request
+        """
         self.hass = hass
         self.client = SmarterClient()
+        # A stalled request would hold an executor thread forever otherwise. The
+        # sign-in requests and status streams do not use this session, see
+        # `_async_auth_job` for the former.
+        adapter = _TimeoutAdapter(request_timeout)
+        for scheme in ("http://", "https://"):
+            self.client.app.requests.mount(scheme, adapter)
+        self.request_timeout = request_timeout
+        self.session = None
+        self._transport: SmarterTransport | None = None
+        self.rate_limiter = CommandRateLimiter(hass)
+        self.command_scheduler = CommandScheduler(self.rate_limiter)
+        self.command_coalescer = CommandCoalescer(
+            hass, self.async_send_command, self.get_status
+        )
+        self.pending_commands = PendingCommandTable(hass, self)
+        self._token_lock = asyncio.Lock()
+        self.status_window = status_window
+        self._dispatchers: dict[str, StatusDispatcher] = {}
+        self._device_stats: dict[str, DeviceStats] = {}
+        self._devices_by_id: dict[str, BaseDevice] = {}
+        self._devices_by_entry: dict[str, dict[str, BaseDevice]] = {}
+        self._device_ids_by_entity_id: dict[str, str] = {}
+        self.discovery_timings: dict[str, float] = {}
+        self.failed_networks: set[str] = set()
+        self.connection_history: deque[dict[str, Any]] = deque(
+            maxlen=CONNECTION_HISTORY_SIZE
+        )
+
+    async def _async_auth_job(self, target: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking sign-in or token request of the client in the executor.
+
+        pyrebase sends these without the client's session, so `_TimeoutAdapter`
+        does not cover them. The wait is bounded by the request timeout instead,
+        while a stalled request keeps its thread until the cloud answers.
+
+        Raises:
+            TransportError: if the request did not finish within the timeout.
+        """
+        try:
+            async with asyncio.timeout(self.request_timeout):
+                return await self.hass.async_add_executor_job(target, *args)
+        except TimeoutError as ex:
+            raise TransportError(
+                f"Authentication timed out after {self.request_timeout} seconds"
+            ) from ex
 
     async def sign_in(self, username, password):
         """
@@ -44,9 +188,88 @@ class SmarterHub:
         Consumes provided credentials and returns a LoginSession or None, if sign-in
         fails.
         """
-        return await self.hass.async_add_executor_job(
-            self.client.sign_in, username, password
-        )
+        try:
+            self.session = await self._async_auth_job(
+                self.client.sign_in, username, password
+            )
+        except Exception as ex:
+            self.async_record_connection_event("sign_in_failed", error=str(ex))
+            raise
+
+        self.async_record_connection_event("signed_in")
+        return self.session
+
+    async def restore_session(self, refresh_token: str) -> LoginSession | None:
+        """
+        Asynchronously restore a session from a stored refresh token.
+
+        Exchanges the refresh token for a new ID token and returns the LoginSession,
+        or None if the token endpoint rejects the token with a 400 or 401. The
+        returned session may carry a rotated refresh token.
+
+        Raises:
+            TransportError: if the token endpoint does not answer in time.
+            requests.RequestException: if the token endpoint cannot be reached, or
+                fails otherwise.
+        """
+
+        def _restore_session() -> LoginSession:
+            self.client.session = LoginSession(
+                {"refreshToken": refresh_token, "expiresIn": SESSION_DURATION}
+            )
+            return self.client.refresh()
+
+        try:
+            self.session = await self._async_auth_job(_restore_session)
+        except HTTPError as ex:
+            if not _is_rejected_token(ex):
+                raise
+            LOGGER.debug("Refresh token was rejected, %s", ex)
+            self.async_record_connection_event("session_rejected", error=str(ex))
+            self.client.session = self.session = None
+        else:
+            self.async_record_connection_event("session_restored")
+
+        return self.session
+
+    async def authenticate(
+        self, username: str, password: str, refresh_token: str | None = None
+    ) -> LoginSession | None:
+        """
+        Asynchronously authenticate with the Smarter API.
+
+        Restores the session from `refresh_token` when given, and falls back to a
+        password sign-in only if the token is rejected.
+        """
+        if refresh_token and (session := await self.restore_session(refresh_token)):
+            return session
+
+        return await self.sign_in(username, password)
+
+    @property
+    def transport(self) -> SmarterTransport:
+        """Return the transport for requests that bypass the blocking client."""
+        if self._transport is None:
+            # Talk to the same database as the client
+            self._transport = SmarterTransport(
+                async_get_clientsession(self.hass),
+                self.client.app.database_url,
+                self.request_timeout,
+            )
+
+        return self._transport
+
+    async def _async_id_token(self) -> str:
+        """Return the ID token of the session, refreshed if it expires soon."""
+        if self.client.session is None:
+            raise HomeAssistantError("Not signed in to the Smarter API")
+
+        async with self._token_lock:
+            if self.client.session.expires_in < TOKEN_REFRESH_MARGIN:
+                await self._async_auth_job(self.client.refresh)
+                self.async_record_connection_event("token_refreshed")
+
+        return self.client.token
 
     async def get_user(self, session: LoginSession):
         """Retrieve Smarter API user from current session."""
@@ -56,33 +279,317 @@ class SmarterHub:
         return user
 
     async def discover_devices(self, user: User) -> list[BaseDevice]:
-        """Asynchronously discover devices."""
-
-        def _discover_devices() -> list[BaseDevice]:
-            """Get a list of device wrappers from the user's networks."""
-            return list(
-                itertools.chain.from_iterable(
-                    load_from_network(network, user.identifier)
-                    for network in user.networks.values()
-                )
+        """
+        Asynchronously discover devices.
+
+        The user's networks are loaded concurrently, at most `MAX_DISCOVERY_WORKERS`
+        at a time. Devices are returned in the order of the user's networks. A
+        network that fails to load is logged and skipped, and its identifier is kept
+        in `failed_networks`. The time spent on each network, in seconds, is kept in
+        `discovery_timings`.
+        """
+        semaphore = asyncio.Semaphore(MAX_DISCOVERY_WORKERS)
+
+        def _load_network(network: Network) -> list[BaseDevice]:
+            """Get a list of device wrappers from a network."""
+            return list(load_from_network(network, user.identifier))
+
+        async def _discover_network(network: Network) -> list[BaseDevice]:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    return await self.hass.async_add_executor_job(
+                        _load_network, network
+                    )
+                except Exception as ex:
+                    LOGGER.exception(
+                        "Failed to discover devices in network %s", network.identifier
+                    )
+                    self.async_record_connection_event(
+                        "network_failed", network=network.identifier, error=str(ex)
+                    )
+                    self.failed_networks.add(network.identifier)
+                    return []
+                finally:
+                    elapsed = time.monotonic() - start
+                    self.discovery_timings[network.identifier] = elapsed
+                    LOGGER.debug(
+                        "Discovered network %s in %.3fs", network.identifier, elapsed
+                    )
+
+        self.discovery_timings = {}
+        self.failed_networks = set()
+        results = await asyncio.gather(
+            *(_discover_network(network) for network in user.networks.values())
+        )
+
+        return list(itertools.chain.from_iterable(results))
+
+    @callback
+    def async_record_connection_event(self, event: str, **details: Any) -> None:
+        """
+        Add an event to the `connection_history`, e.g. a sign-in or a failure.
+
+        Args:
+            event: name of the event
+            details: data describing the event, e.g. the error
+        """
+        self.connection_history.append(
+            {"time": dt_util.utcnow().isoformat(), "event": event, **details}
+        )
+
+    @callback
+    def async_subscribe_status(
+        self,
+        device: BaseDevice,
+        listener: StatusListener,
+        keys: Iterable[str] | None = None,
+    ) -> CALLBACK_TYPE:
+        """
+        Subscribe to status changes of a device.
+
+        All listeners of a device share a single subscription with the client. The
+        listener is only called when one of `keys` changes.
+
+        Args:
+            device: device to watch
+            listener: called in the event loop with the set of changed keys
+            keys: status keys the listener depends on. `None` for all keys.
+        Returns:
+            Callback that removes the subscription.
+        """
+        if (dispatcher := self._dispatchers.get(device.id)) is None:
+            dispatcher = self._dispatchers[device.id] = StatusDispatcher(
+                self.hass, device, self.status_window, self.get_device_stats(device.id)
+            )
+
+        return dispatcher.async_add_listener(listener, keys)
+
+    @callback
+    def async_register_devices(
+        self, config_entry_id: str, devices: Iterable[BaseDevice]
+    ) -> list[BaseDevice]:
+        """
+        Index the devices discovered for a config entry.
+
+        Replaces any devices previously registered for the entry. A device that is
+        already registered live by another entry of the account is shared, and the
+        discovered duplicate is disposed of, instead of keeping a second object and
+        status stream for it.
+
+        Args:
+            config_entry_id: HASS config entry ID that owns the devices
+            devices: discovered devices
+        Returns:
+            The devices as registered, to be used by the entry's entities.
+        """
+        self.async_unregister_devices(config_entry_id)
+        entry_devices = self._devices_by_entry[config_entry_id] = {}
+        duplicates: list[BaseDevice] = []
+        for device in devices:
+            device = entry_devices[device.id] = self._shared_device(device, duplicates)
+            self._devices_by_id[device.id] = device
+
+        self._async_dispose_devices(duplicates)
+        return list(entry_devices.values())
+
+    @callback
+    def async_replace_devices(
+        self, config_entry_id: str, devices: Iterable[BaseDevice]
+    ) -> list[BaseDevice]:
+        """
+        Replace registered devices of a config entry with new objects of the same ID.
+
+        Entities and status subscriptions of the old devices move to the new ones,
+        in every entry that registered them. Used to swap devices restored from the
+        device cache for live devices.
+
+        Returns:
+            The devices as registered, to be used by the entry's entities.
+        """
+        entry_devices = self._devices_by_entry.setdefault(config_entry_id, {})
+        replaced = 0
+        disposed: list[BaseDevice] = []
+        for device in devices:
+            previous = self._devices_by_id.get(device.id)
+            device = entry_devices[device.id] = self._shared_device(device, disposed)
+            if previous is not None and previous is not device:
+                disposed.append(previous)
+            self._devices_by_id[device.id] = device
+            for other_devices in self._devices_by_entry.values():
+                if device.id in other_devices:
+                    other_devices[device.id] = device
+            async_dispatcher_send(
+                self.hass, SIGNAL_DEVICE_REPLACED.format(device.id), device
             )
+            if (dispatcher := self._dispatchers.get(device.id)) is not None:
+                dispatcher.async_set_device(device)
+            replaced += 1
 
-        return await self.hass.async_add_executor_job(_discover_devices)
+        self._async_dispose_devices(disposed)
+        self.async_record_connection_event("devices_replaced", count=replaced)
+        return list(entry_devices.values())
 
-    def _domain_data(self, config_entry_id: str) -> dict[str, Any]:
-        return self.hass.data[DOMAIN][config_entry_id]
+    @callback
+    def async_unregister_devices(self, config_entry_id: str) -> None:
+        """
+        Remove the devices of a config entry from the index.
+
+        Devices that are still registered by another entry are kept, the others are
+        disposed of.
+        """
+        disposed: list[BaseDevice] = []
+        for device_id in self._devices_by_entry.pop(config_entry_id, {}):
+            if shared := [
+                devices[device_id]
+                for devices in self._devices_by_entry.values()
+                if device_id in devices
+            ]:
+                self._devices_by_id[device_id] = shared[0]
+                continue
+
+            if (device := self._devices_by_id.pop(device_id, None)) is not None:
+                disposed.append(device)
+            self.command_coalescer.async_cancel(device_id)
+            self.pending_commands.async_discard_device(device_id)
+            self._device_stats.pop(device_id, None)
+            if (dispatcher := self._dispatchers.pop(device_id, None)) is not None:
+                dispatcher.async_shutdown()
+
+        self._async_dispose_devices(disposed)
 
-    def _get_devices(self, config_entry_id: str) -> list[BaseDevice]:
-        return self._domain_data(config_entry_id)["devices"]
+    @callback
+    def async_shutdown(self) -> None:
+        """Release the resources of the hub once no config entry uses it."""
+        for config_entry_id in list(self._devices_by_entry):
+            self.async_unregister_devices(config_entry_id)
+        self.rate_limiter.async_shutdown()
+
+    @callback
+    def _async_dispose_devices(self, devices: list[BaseDevice]) -> None:
+        """Stop the client threads of devices that are no longer used."""
+        if devices:
+            self.hass.async_add_executor_job(dispose_devices, devices)
+
+    def _shared_device(
+        self, device: BaseDevice, duplicates: list[BaseDevice]
+    ) -> BaseDevice:
+        """
+        Return the live device already registered with the same ID, if any.
+
+        Args:
+            device: discovered device
+            duplicates: collects the discovered device if it is not used, to be
+                disposed of, as the client already started its threads
+        """
+        existing = self._devices_by_id.get(device.id)
+        if existing is None or isinstance(existing, CachedDevice):
+            return device
+
+        if existing is not device:
+            duplicates.append(device)
+        return existing
+
+    @callback
+    def async_register_entity(
+        self, entity_id: str, device: BaseDevice
+    ) -> CALLBACK_TYPE:
+        """
+        Index the device that backs an entity.
+
+        Entities are indexed by the ID of their device, which is resolved through
+        the device index, so the entry still holds when the device object is
+        replaced, see `async_replace_devices`.
+
+        Returns:
+            Callback that removes the entity from the index.
+        """
+        device_id = self._device_ids_by_entity_id[entity_id] = device.id
+
+        @callback
+        def unregister_entity() -> None:
+            if self._device_ids_by_entity_id.get(entity_id) == device_id:
+                del self._device_ids_by_entity_id[entity_id]
+
+        return unregister_entity
+
+    def get_entity_ids(self, external_device_id: str) -> list[str]:
+        """Return the IDs of the entities of a device, sorted."""
+        return sorted(
+            entity_id
+            for entity_id, device_id in self._device_ids_by_entity_id.items()
+            if device_id == external_device_id
+        )
+
+    def get_listener_count(self, external_device_id: str) -> int:
+        """Return the number of status listeners of a device."""
+        dispatcher = self._dispatchers.get(external_device_id)
+        return 0 if dispatcher is None else dispatcher.listener_count
+
+    def get_dispatcher(self, external_device_id: str) -> StatusDispatcher | None:
+        """Return the status dispatcher of a device, `None` without listeners."""
+        return self._dispatchers.get(external_device_id)
+
+    def get_status(self, device: BaseDevice) -> DeviceStatus:
+        """
+        Return the status snapshot of a device.
+
+        A device without status listeners has no snapshot, so its status is parsed
+        on every call and not versioned.
+        """
+        if (dispatcher := self._dispatchers.get(device.id)) is not None:
+            return dispatcher.status
+        return parse_status(dict(device.status))
+
+    def get_status_version(self, external_device_id: str) -> int:
+        """
+        Return the version of the last status snapshot of a device.
+
+        The version changes whenever the status of the device does, see
+        `StatusDispatcher`. It is 0 for a device without status listeners.
+        """
+        dispatcher = self._dispatchers.get(external_device_id)
+        return 0 if dispatcher is None else dispatcher.version
+
+    def get_device_stats(self, external_device_id: str) -> DeviceStats:
+        """Return the runtime counters of a device, created on first use."""
+        if (stats := self._device_stats.get(external_device_id)) is None:
+            stats = self._device_stats[external_device_id] = DeviceStats()
+
+        return stats
+
+    def get_devices(self, config_entry_id: str) -> list[BaseDevice]:
+        """Return the devices registered for a config entry."""
+        return list(self._devices_by_entry.get(config_entry_id, {}).values())
+
+    def get_device(self, external_device_id: str) -> BaseDevice:
+        """
+        Return a device by its ID in the Smarter API.
+
+        Raises:
+            DeviceNotFoundError: if no device with the ID is registered
+        """
+        try:
+            return self._devices_by_id[external_device_id]
+        except KeyError:
+            raise DeviceNotFoundError(external_device_id)
+
+    def get_device_for_entity(self, entity_id: str) -> BaseDevice:
+        """
+        Return the device that backs an entity.
+
+        Raises:
+            DeviceNotFoundError: if no device is registered for the entity
+        """
+        try:
+            return self._devices_by_id[self._device_ids_by_entity_id[entity_id]]
+        except KeyError:
+            raise DeviceNotFoundError(entity_id)
 
     def _get_device(self, external_device_id: str, config_entry_id: str) -> BaseDevice:
         try:
-            return next(
-                device
-                for device in self._get_devices(config_entry_id)
-                if device.id == external_device_id
-            )
-        except StopIteration:
+            return self._devices_by_entry[config_entry_id][external_device_id]
+        except KeyError:
             raise DeviceNotFoundError(external_device_id)
 
     def get_commands(
@@ -106,6 +613,55 @@ class SmarterHub:
         for command in device.device.commands.values():
             yield (command.name, command.example)
 
+    async def async_send_command(
+        self,
+        device: BaseDevice,
+        command_name: str,
+        command_data: Any,
+        priority: CommandPriority = CommandPriority.BACKGROUND,
+    ) -> dict[str, Any]:
+        """
+        Send a command to a device without blocking the executor.
+
+        Commands of a device are sent in the order they were issued, see
+        `CommandScheduler`. Commands of all devices share the account's
+        `rate_limiter`. The round trip of the command is recorded in the device's
+        stats, see `get_device_stats`.
+
+        Args:
+            device: device to send the command to
+            command_name: name of command (see `get_commands`)
+            command_data: data for given command
+            priority: lane of the command in the rate limiter. Commands of entities
+                use the lane of the service call, see
+                `SmarterEntity.command_priority`.
+        Returns:
+            Response of the API.
+        Raises:
+            ValueError: if the device does not support the command
+        """
+        if isinstance(device, CachedDevice):
+            raise HomeAssistantError(f"Device {device.id} is not connected yet")
+        if device.device.commands.get(command_name) is None:
+            raise ValueError(f"Device does not support command '{command_name}'")
+
+        async def _send() -> dict[str, Any]:
+            id_token = await self._async_id_token()
+            stats = self.get_device_stats(device.id)
+            start = time.monotonic()
+            try:
+                response = await self.transport.send_command(
+                    id_token, device.id, command_name, device.user_id, command_data
+                )
+            except Exception:
+                stats.async_record_command(time.monotonic() - start, failed=True)
+                raise
+
+            stats.async_record_command(time.monotonic() - start)
+            return response
+
+        return await self.command_scheduler.async_run(device.id, priority, _send)
+
     async def send_command(
         self,
         external_device_id: str,
@@ -124,12 +680,7 @@ class SmarterHub:
         """
         try:
             device = self._get_device(external_device_id, config_entry_id)
-            await self.hass.async_add_executor_job(
-                device.send_command,
-                command_name,
-                command_data,
-            )
-        except KeyError:
-            raise ValueError(f"Device does not support command '{command_name}'")
         except DeviceNotFoundError:
             return "not found"
+
+        return await self.async_send_command(device, command_name, command_data)
@@ -0,0 +1,112 @@
+"""Typed, immutable snapshots of the status of a Smarter device."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from enum import StrEnum
+from types import MappingProxyType
+from typing import Any
+
+
+class KettleState(StrEnum):
+    """State reported by a kettle."""
+
+    IDLE = "Idle"
+    BOILING = "Boiling"
+    KEEPING_WARM = "Keeping Warm"
+    COOLING = "Cooling"
+
+
+def _float(value: Any) -> float | None:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bool(value: Any) -> bool | None:
+    return value if isinstance(value, bool) else None
+
+
+def _str(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+def _state(value: Any) -> KettleState | str | None:
+    if value is None:
+        return None
+    try:
+        return KettleState(value)
+    except ValueError:
+        # A state this integration does not know yet is shown as reported
+        return str(value)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class DeviceStatus:
+    """
+    Status of a device, parsed once when it is pushed.
+
+    Known keys are typed fields, `None` when the device does not report them or
+    reports a value that cannot be parsed. Temperatures are in °C, the water level
+    in percent and the keep warm time in minutes, all as floats. `raw` holds the
+    status as reported, including keys without a field.
+
+    Params:
+        version: version of the snapshot, see `StatusDispatcher`. 0 for a status
+            that is not versioned.
+    """
+
+    version: int = 0
+    device_model: str | None = None
+    firmware_version: str | None = None
+    state: KettleState | str | None = None
+    boil_temperature: float | None = None
+    target_temperature: float | None = None
+    water_temperature: float | None = None
+    water_level: float | None = None
+    kettle_is_present: bool | None = None
+    calibrated: bool | None = None
+    keep_warm_time: float | None = None
+    raw: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the parsed value of a status key, or the reported value."""
+        if key in _PARSERS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.raw.get(key, default)
+
+
+# Parsers of the status keys that have a field in `DeviceStatus`
+_PARSERS: dict[str, Callable[[Any], Any]] = {
+    "device_model": _str,
+    "firmware_version": _str,
+    "state": _state,
+    "boil_temperature": _float,
+    "target_temperature": _float,
+    "water_temperature": _float,
+    "water_level": _float,
+    "kettle_is_present": _bool,
+    "calibrated": _bool,
+    "keep_warm_time": _float,
+}
+
+
+def parse_status(status: Mapping[str, Any], version: int = 0) -> DeviceStatus:
+    """
+    Parse a status pushed by a device.
+
+    Args:
+        status: status as reported. It is kept as `raw`, so it must not be changed
+            afterwards, e.g. a copy taken from the client thread.
+        version: version of the snapshot
+    """
+    return DeviceStatus(
+        version=version,
+        raw=MappingProxyType(status),
+        **{key: parse(status.get(key)) for key, parse in _PARSERS.items()},
+    )
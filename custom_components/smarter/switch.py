@@ -2,47 +2,51 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from smarter_client.managed_devices.base import BaseDevice
 
+from .capabilities import supported_descriptions
 from .const import DOMAIN
 from .entity import SmarterEntity
+from .rate_limiter import CommandPriority
+from .status import DeviceStatus
 
+if TYPE_CHECKING:
+    from .smarter_hub import SmarterHub
 
-def make_check_status(key: str, values: list[Any]) -> bool:
-    """Return a function that checks the status of a device."""
 
-    def _check_status(device: BaseDevice) -> bool:
-        return device.device.status.get(key) in values
-
-    return _check_status
-
-
-def set_boil(device: BaseDevice, value: bool):
+def set_boil(
+    hub: SmarterHub, device: BaseDevice, value: bool, priority: CommandPriority
+) -> Awaitable:
     """Invoke or cancel the boil command."""
-    device.send_command("start_boil" if value else "stop_boil", True)
+    return hub.async_send_command(
+        device, "start_boil" if value else "stop_boil", True, priority=priority
+    )
 
 
 @dataclass(frozen=True, kw_only=True)
 class SmarterSwitchEntityDescription(SwitchEntityDescription):
     """Represent the Smarter sensor entity description."""
 
-    get_fn: Callable[[BaseDevice], bool]
-    set_fn: Callable[[BaseDevice, Any], None]
+    get_status_field: str
+    state_on_values: tuple[str, ...]
+    set_fn: Callable[[SmarterHub, BaseDevice, Any, CommandPriority], Awaitable]
 
 
 SWITCH_TYPES = [
     SmarterSwitchEntityDescription(
         key="start_boil",
         name="Boiling",
-        get_fn=make_check_status("state", ["Boiling", "Keeping Warm", "Cooling"]),
+        get_status_field="state",
+        state_on_values=("Boiling", "Keeping Warm", "Cooling"),
         set_fn=set_boil,
         icon="mdi:kettle-steam",
     ),
@@ -59,7 +63,12 @@ async def async_setup_entry(
     entities = [
         SmarterSwitch(device, description)
         for device in data.get("devices")
-        for description in SWITCH_TYPES
+        for description in supported_descriptions(
+            Platform.SWITCH,
+            device,
+            SWITCH_TYPES,
+            lambda description: description.get_status_field,
+        )
     ]
 
     async_add_entities(entities, True)
@@ -72,17 +81,36 @@ class SmarterSwitch(SmarterEntity, SwitchEntity):
 
     _attr_has_entity_name = True
 
+    @property
+    def status_keys(self) -> frozenset[str] | None:
+        """Return the device status keys this entity's state depends on."""
+        return self.attribute_status_keys | {self.entity_description.get_status_field}
+
     @property
     def is_on(self) -> bool | None:
-        """Return the state of the sensor."""
-        return self.entity_description.get_fn(self.device)
+        """Return the state of the sensor, or the state it was just switched to."""
+        return self._pending_value(
+            self.entity_description.get_status_field,
+            self._memoized("is_on", self._status_is_on),
+        )
+
+    def _status_is_on(self, status: DeviceStatus) -> bool:
+        description = self.entity_description
+        return status.get(description.get_status_field) in description.state_on_values
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        self.entity_description.set_fn(self.device, True)
-        self._attr_is_on = True
+        await self._async_switch(True)
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
-        self.entity_description.set_fn(self.device, False)
-        self._attr_is_on = False
+        await self._async_switch(False)
+
+    async def _async_switch(self, value: bool) -> None:
+        description = self.entity_description
+        await self._async_send_optimistic(
+            description.get_status_field,
+            value,
+            lambda state: (state in description.state_on_values) == value,
+            description.set_fn(self.hub, self.device, value, self.command_priority),
+        )
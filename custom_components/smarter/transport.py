@@ -0,0 +1,87 @@
+"""Asyncio transport for the Smarter Firebase REST API."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import aiohttp
+from homeassistant.exceptions import HomeAssistantError
+
+DATABASE_URL = "https://smarter-live.firebaseio.com"
+
+# Seconds to wait for a response from the Smarter API
+REQUEST_TIMEOUT = 10
+
+
+class TransportError(HomeAssistantError):
+    """Error raised when a request to the Smarter API fails."""
+
+
+class SmarterTransport:
+    """
+    Talk to the Smarter realtime database over HA's shared aiohttp session.
+
+    Used for command writes, so they do not have to be handed to the executor like
+    the blocking `smarter_client` calls. Status arrives over the client's stream.
+    """
+
+    session: aiohttp.ClientSession
+    database_url: str
+    timeout: float
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        database_url: str = DATABASE_URL,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        """Create a new transport."""
+        self.session = session
+        self.database_url = database_url.rstrip("/")
+        self.timeout = timeout
+
+    async def send_command(
+        self,
+        id_token: str,
+        device_id: str,
+        command_name: str,
+        user_id: str,
+        value: Any,
+    ) -> dict[str, Any]:
+        """
+        Push a command instance for a device.
+
+        Args:
+            id_token: ID token of the signed-in user
+            device_id: Device ID in Smarter API
+            command_name: name of the command
+            user_id: ID of the user issuing the command
+            value: command data
+        Returns:
+            Response of the API, which holds the `name` of the created instance.
+        """
+        return await self._request(
+            "POST",
+            f"devices/{device_id}/commands/{command_name}",
+            id_token,
+            {"user_id": user_id, "value": value},
+        )
+
+    async def _request(
+        self, method: str, path: str, id_token: str, data: Any = None
+    ) -> Any:
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with self.session.request(
+                    method,
+                    f"{self.database_url}/{path}.json",
+                    params={"auth": id_token},
+                    json=data,
+                ) as response:
+                    response.raise_for_status()
+                    return await response.json()
+        except TimeoutError as ex:
+            raise TransportError(f"{method} {path} timed out") from ex
+        except aiohttp.ClientError as ex:
+            raise TransportError(f"{method} {path} failed: {ex}") from ex
@@ -1,7 +1,7 @@
 """Global fixtures for Smarter Kettle and Coffee integration integration."""
 
 from typing import Any
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from custom_components.smarter.smarter_hub import SmarterHub
@@ -9,6 +9,7 @@ from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from .const import MOCK_CONFIG, MOCK_DEVICE, MOCK_NETWORK, MOCK_SESSION, MOCK_USER
+from .emulator import async_connect_emulator
 
 pytest_plugins = "pytest_homeassistant_custom_component"
 
@@ -89,11 +90,37 @@ def mock_device():
     return MagicMock(**MOCK_DEVICE)
 
 
+@pytest.fixture
+def mock_transport():
+    """Skip requests of the hub's transport and return the mocked `send_command`."""
+    with (
+        patch("custom_components.smarter.smarter_hub.async_get_clientsession"),
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterHub._async_id_token",
+            return_value=MOCK_SESSION["id_token"],
+        ),
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterTransport.send_command",
+            new_callable=AsyncMock,
+        ) as send_command,
+    ):
+        yield send_command
+
+
+@pytest.fixture
+async def smarter_cloud(hass: HomeAssistant, socket_enabled):
+    """Return a running Smarter cloud emulator that new hubs connect to."""
+    async with async_connect_emulator(hass) as cloud:
+        yield cloud
+
+
 # This fixture, when used, will result in calls to async_get_data to return None. To
 # have the call return a value, we would add the `return_value=<VALUE_TO_RETURN>`
 # parameter to the patch call.
 @pytest.fixture(name="bypass_get_data")
-def bypass_get_data_fixture(mock_session, mock_user, mock_device, request):
+def bypass_get_data_fixture(
+    mock_session, mock_user, mock_device, mock_transport, request
+):
     """Skip calls to get data from API."""
     params: dict[str, Any] = request.param
 
@@ -108,6 +135,10 @@ def bypass_get_data_fixture(mock_session, mock_user, mock_device, request):
             "custom_components.smarter.smarter_hub.SmarterHub.sign_in",
             return_value=get_param("session", mock_session),
         ),
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterHub.restore_session",
+            return_value=get_param("session", mock_session),
+        ),
         patch(
             "custom_components.smarter.smarter_hub.SmarterHub.get_user",
             return_value=get_param("user", mock_user),
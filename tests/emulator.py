@@ -0,0 +1,564 @@
+"""
+Local stand-in for the Smarter cloud.
+
+Serves the Firebase endpoints `smarter_client` and the hub's transport talk to:
+password sign-in and refresh-token exchange, the user, network and device documents,
+command writes and the status stream of a device. Kettles can be scripted, e.g. to
+boil hundreds of them at once. See `SmarterCloudEmulator.patch_client` to point new
+`SmarterHub` objects at it, or `async_connect_emulator` to run an emulator that
+the integration connects to.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import secrets
+import time
+from collections.abc import AsyncGenerator, Callable, Generator, Iterable
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any
+from unittest.mock import patch
+
+import pyrebase
+import requests
+from aiohttp import ClientSession, TCPConnector, ThreadedResolver, web
+from aiohttp.test_utils import TestServer
+from custom_components.smarter.smarter_hub import dispose_devices
+from homeassistant.core import HomeAssistant
+from smarter_client.managed_devices import load_from_network
+from smarter_client.managed_devices.base import BaseDevice
+
+from .faults import FaultInjector
+
+# Hosts of the Google APIs that pyrebase signs in with
+AUTH_HOSTS = ("https://www.googleapis.com", "https://securetoken.googleapis.com")
+
+# Model that smarter_client wraps as a kettle
+KETTLE_MODEL = "SMKET01"
+
+# Commands of an emulated kettle, with their examples
+KETTLE_COMMANDS = {
+    "start_boil": {"example": True},
+    "stop_boil": {"example": 0},
+    "start_auto_boil": {"example": 0},
+    "set_boil_temperature": {"example": 100},
+    "set_keep_warm_time": {"example": 5},
+}
+
+# Lifetime of the ID tokens handed out, in seconds
+TOKEN_LIFETIME = 3600
+
+# Seconds a stream client waits before reconnecting, sent with the first event
+STREAM_RETRY = 0.05
+
+CommandEffect = Callable[["SmarterCloudEmulator", str, Any], None]
+
+
+@dataclass
+class CommandWrite:
+    """Command instance written by a client."""
+
+    device_id: str
+    command: str
+    user_id: str
+    value: Any
+    name: str
+
+
+def _set_status(key: str, value: Any = None) -> CommandEffect:
+    """Return an effect that reports a fixed value, or the command's value."""
+
+    def effect(cloud: SmarterCloudEmulator, device_id: str, command_value: Any):
+        cloud.set_status(device_id, {key: command_value if value is None else value})
+
+    return effect
+
+
+# What the emulated kettles do when they receive a command
+DEFAULT_COMMAND_EFFECTS: dict[str, CommandEffect] = {
+    "start_boil": _set_status("state", "Boiling"),
+    "start_auto_boil": _set_status("state", "Boiling"),
+    "stop_boil": _set_status("state", "Idle"),
+    "set_boil_temperature": _set_status("boil_temperature"),
+    "set_keep_warm_time": _set_status("keep_warm_time"),
+}
+
+
+def kettle_status(**changes: Any) -> dict[str, Any]:
+    """Return the status of an idle kettle, with the given changes."""
+    return {
+        "device_model": KETTLE_MODEL,
+        "firmware_version": "1.0.0",
+        "state": "Idle",
+        "boil_temperature": 100.0,
+        "target_temperature": 100.0,
+        "water_temperature": 20.0,
+        "water_level": 50,
+        "kettle_is_present": True,
+        "calibrated": True,
+        "keep_warm_time": 0.0,
+        **changes,
+    }
+
+
+class SmarterCloudEmulator:
+    """
+    Serve the Smarter cloud from a local aiohttp server.
+
+    Accounts and kettles are added with `add_user` and `add_kettles`, before or
+    while clients are connected. Status changes made with `set_status`, by a
+    command's effect or by `async_boil` are pushed to the streams of the device.
+    Written commands are recorded in `commands`. Set `faults` to make the cloud
+    slow or flaky, see `FaultInjector`.
+
+    Use as an async context manager, or call `start` and `stop`.
+    """
+
+    def __init__(
+        self,
+        token_lifetime: float = TOKEN_LIFETIME,
+        stream_retry: float = STREAM_RETRY,
+    ) -> None:
+        """
+        Create a new emulator without any accounts.
+
+        Args:
+            token_lifetime: seconds until a handed out ID token expires
+            stream_retry: seconds a stream client waits before reconnecting
+        """
+        self.token_lifetime = token_lifetime
+        self.stream_retry = stream_retry
+        self.users: dict[str, dict[str, Any]] = {}
+        self.networks: dict[str, dict[str, Any]] = {}
+        self.devices: dict[str, dict[str, Any]] = {}
+        self.commands: list[CommandWrite] = []
+        self.command_effects = dict(DEFAULT_COMMAND_EFFECTS)
+        self.faults: FaultInjector | None = None
+        self.sign_ins = 0
+        self.refreshes = 0
+        self._passwords: dict[str, tuple[str, str]] = {}
+        self._id_tokens: dict[str, tuple[str, float]] = {}
+        self._refresh_tokens: dict[str, str] = {}
+        self._streams: dict[str, set[asyncio.Queue]] = {}
+        self._ids = itertools.count(1)
+        self._server: TestServer | None = None
+
+    async def __aenter__(self) -> SmarterCloudEmulator:
+        """Start the server."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Stop the server."""
+        await self.stop()
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the running server, without a trailing slash."""
+        if self._server is None:
+            raise RuntimeError("The emulator is not running")
+
+        return str(self._server.make_url("")).rstrip("/")
+
+    @property
+    def stream_count(self) -> int:
+        """Return the number of open status streams."""
+        return sum(len(queues) for queues in self._streams.values())
+
+    async def start(self) -> None:
+        """Start serving on a free port of 127.0.0.1."""
+        app = web.Application(middlewares=[self._inject_faults])
+        app.router.add_post(
+            "/identitytoolkit/v3/relyingparty/verifyPassword", self._handle_sign_in
+        )
+        app.router.add_post("/v1/token", self._handle_refresh)
+        app.router.add_get("/{path:.+}.json", self._handle_get)
+        app.router.add_post("/{path:.+}.json", self._handle_push)
+
+        self._server = TestServer(app, host="127.0.0.1", access_log=None)
+        await self._server.start_server()
+
+    async def stop(self) -> None:
+        """End the open streams and stop the server."""
+        self.drop_streams()
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    def drop_streams(self) -> None:
+        """Cut all open status streams, their clients reconnect."""
+        for queues in self._streams.values():
+            for queue in queues:
+                queue.put_nowait(None)
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler):
+        if self.faults is None:
+            return await handler(request)
+
+        return await self.faults.async_handle(request, handler)
+
+    @contextmanager
+    def patch_client(self) -> Generator[None]:
+        """
+        Point the clients created in the context at the emulator.
+
+        `SmarterClient` and with it `SmarterHub` have the Firebase URLs built in,
+        so the database URL and the sign-in requests are redirected instead.
+        """
+        initialize_app = pyrebase.initialize_app
+        post = requests.post
+
+        def _initialize_app(config: dict[str, Any]):
+            return initialize_app({**config, "databaseURL": self.url})
+
+        def _post(url: str, *args, **kwargs):
+            for host in AUTH_HOSTS:
+                if url.startswith(host):
+                    url = self.url + url.removeprefix(host)
+
+            return post(url, *args, **kwargs)
+
+        with (
+            patch("pyrebase.initialize_app", _initialize_app),
+            patch("pyrebase.pyrebase.requests.post", _post),
+        ):
+            yield
+
+    def add_user(self, email: str, password: str) -> str:
+        """
+        Add an account with a network of its own.
+
+        Returns:
+            ID of the user.
+        """
+        user_id = f"user{next(self._ids)}"
+        self._passwords[email.casefold()] = (password, user_id)
+        self.users[user_id] = {
+            "email": email,
+            "accepted": int(time.time() * 1000),
+            "first_name": "Emulated",
+            "last_name": "User",
+            "location_accepted": 1,
+            "networks_index": {},
+            "temperature_unit": 0,
+        }
+        self.add_network(user_id, "Home")
+        return user_id
+
+    def add_network(self, user_id: str, name: str | None = None) -> str:
+        """
+        Add another network to the account of a user.
+
+        Args:
+            user_id: ID of the user, see `add_user`
+            name: name of the network, which smarter_client expects to be unique
+        Returns:
+            ID of the network.
+        """
+        network_id = f"network{next(self._ids)}"
+        name = name or f"Network {network_id}"
+        self.users[user_id]["networks_index"][network_id] = name
+        self.networks[network_id] = {
+            "access_tokens_fcm": {},
+            "associated_devices": {},
+            "name": name,
+            "owner": user_id,
+        }
+        return network_id
+
+    def add_kettles(
+        self,
+        user_id: str,
+        count: int = 1,
+        network_id: str | None = None,
+        **status: Any,
+    ) -> list[str]:
+        """
+        Add kettles to a network of a user.
+
+        Args:
+            user_id: ID of the user, see `add_user`
+            count: number of kettles to add
+            network_id: network to add them to, the user's first one by default
+            status: changes to the status of an idle kettle
+        Returns:
+            IDs of the kettles.
+        """
+        if network_id is None:
+            network_id = next(iter(self.users[user_id]["networks_index"]))
+        device_ids = []
+        for _ in range(count):
+            device_id = f"kettle{next(self._ids)}"
+            self.devices[device_id] = {
+                "commands": {
+                    name: dict(command) for name, command in KETTLE_COMMANDS.items()
+                },
+                "settings": {"network": network_id, "network_ssid": "emulated"},
+                "status": kettle_status(**status),
+            }
+            self.networks[network_id]["associated_devices"][device_id] = True
+            device_ids.append(device_id)
+
+        return device_ids
+
+    def set_status(self, device_id: str, changes: dict[str, Any]) -> None:
+        """Change the status of a device and push the changes to its streams."""
+        self.devices[device_id]["status"].update(changes)
+        self._publish(device_id, "patch", "/status", changes)
+
+    async def async_boil(
+        self,
+        device_ids: Iterable[str],
+        step: float = 10.0,
+        interval: float = 0.1,
+    ) -> None:
+        """
+        Boil kettles at the same time, like their heaters would.
+
+        Every `interval` seconds, the water temperature of each kettle rises by
+        `step` degrees until it reaches its boil temperature. The kettles then keep
+        warm if they have a keep-warm time, and go idle otherwise.
+        """
+        boiling = list(device_ids)
+        for device_id in boiling:
+            self.set_status(device_id, {"state": "Boiling"})
+
+        while boiling:
+            await asyncio.sleep(interval)
+            for device_id in list(boiling):
+                status = self.devices[device_id]["status"]
+                temperature = min(
+                    status["water_temperature"] + step, status["boil_temperature"]
+                )
+                if temperature < status["boil_temperature"]:
+                    self.set_status(device_id, {"water_temperature": temperature})
+                    continue
+
+                boiling.remove(device_id)
+                self.set_status(
+                    device_id,
+                    {
+                        "water_temperature": temperature,
+                        "state": "Keeping Warm" if status["keep_warm_time"] else "Idle",
+                    },
+                )
+
+    def expire_tokens(self) -> None:
+        """Expire all ID tokens, as if their lifetime had passed."""
+        self._id_tokens = {
+            token: (user_id, 0.0) for token, (user_id, _) in self._id_tokens.items()
+        }
+
+    def _publish(self, device_id: str, event: str, path: str, data: Any) -> None:
+        for queue in self._streams.get(device_id, ()):
+            queue.put_nowait((event, {"path": path, "data": data}))
+
+    def _issue_tokens(self, user_id: str, refresh_token: str | None = None) -> dict:
+        id_token = secrets.token_urlsafe(16)
+        self._id_tokens[id_token] = (
+            user_id,
+            time.monotonic() + self.token_lifetime,
+        )
+        if refresh_token is None:
+            refresh_token = secrets.token_urlsafe(16)
+            self._refresh_tokens[refresh_token] = user_id
+
+        return {
+            "idToken": id_token,
+            "refreshToken": refresh_token,
+            "expiresIn": str(int(self.token_lifetime)),
+        }
+
+    @staticmethod
+    def _auth_error(message: str) -> web.Response:
+        return web.json_response(
+            {"error": {"code": 400, "message": message}}, status=400
+        )
+
+    async def _handle_sign_in(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        password, user_id = self._passwords.get(
+            body.get("email", "").casefold(), (None, None)
+        )
+        if user_id is None:
+            return self._auth_error("EMAIL_NOT_FOUND")
+        if body.get("password") != password:
+            return self._auth_error("INVALID_PASSWORD")
+
+        self.sign_ins += 1
+        return web.json_response(
+            {
+                "kind": "identitytoolkit#VerifyPasswordResponse",
+                "localId": user_id,
+                "email": body["email"],
+                "displayName": "",
+                "registered": True,
+                **self._issue_tokens(user_id),
+            }
+        )
+
+    async def _handle_refresh(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        refresh_token = body.get("refreshToken")
+        if (user_id := self._refresh_tokens.get(refresh_token)) is None:
+            return self._auth_error("INVALID_REFRESH_TOKEN")
+
+        self.refreshes += 1
+        tokens = self._issue_tokens(user_id, refresh_token)
+        return web.json_response(
+            {
+                "access_token": tokens["idToken"],
+                "expires_in": tokens["expiresIn"],
+                "token_type": "Bearer",
+                "refresh_token": refresh_token,
+                "id_token": tokens["idToken"],
+                "user_id": user_id,
+            }
+        )
+
+    def _authorize(self, request: web.Request) -> None:
+        user_id, expires_at = self._id_tokens.get(
+            request.query.get("auth"), (None, 0.0)
+        )
+        if user_id is None:
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"error": "Permission denied"}),
+                content_type="application/json",
+            )
+        if expires_at <= time.monotonic():
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"error": "Auth token is expired"}),
+                content_type="application/json",
+            )
+
+    def _resolve(self, path: str) -> Any:
+        collection, _, rest = path.strip("/").partition("/")
+        document_id, _, rest = rest.partition("/")
+        node: Any = {
+            "users": self.users,
+            "networks": self.networks,
+            "devices": self.devices,
+        }.get(collection, {}).get(document_id)
+        for key in filter(None, rest.split("/")):
+            node = node.get(key) if isinstance(node, dict) else None
+
+        return node
+
+    async def _handle_get(self, request: web.Request) -> web.StreamResponse:
+        self._authorize(request)
+        path = request.match_info["path"]
+        if request.headers.get("Accept") == "text/event-stream":
+            return await self._stream(request, path)
+
+        return web.json_response(self._resolve(path))
+
+    async def _handle_push(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        collection, device_id, commands, command = (
+            request.match_info["path"].strip("/").split("/") + [""] * 4
+        )[:4]
+        device = self.devices.get(device_id)
+        if collection != "devices" or commands != "commands" or device is None:
+            raise web.HTTPNotFound
+
+        body = await request.json()
+        name = f"-cmd{next(self._ids)}"
+        self.commands.append(
+            CommandWrite(
+                device_id, command, body.get("user_id"), body.get("value"), name
+            )
+        )
+        if (effect := self.command_effects.get(command)) is not None:
+            effect(self, device_id, body.get("value"))
+
+        return web.json_response({"name": name})
+
+    async def _stream(self, request: web.Request, path: str) -> web.StreamResponse:
+        collection, _, device_id = path.strip("/").partition("/")
+        if collection != "devices" or device_id not in self.devices:
+            raise web.HTTPBadRequest(text="Only devices can be streamed")
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        self._streams.setdefault(device_id, set()).add(queue)
+        try:
+            await response.write(
+                self._event(
+                    "put",
+                    {"path": "/", "data": self.devices[device_id]},
+                    retry=int(self.stream_retry * 1000),
+                )
+            )
+            while (message := await queue.get()) is not None:
+                await response.write(self._event(*message))
+                if self.faults is not None and self.faults.drop_stream():
+                    break
+        except ConnectionResetError:
+            pass
+        finally:
+            self._streams[device_id].discard(queue)
+
+        return response
+
+    @staticmethod
+    def _event(event: str, data: Any, retry: int | None = None) -> bytes:
+        lines = [f"event: {event}"]
+        if retry is not None:
+            lines.append(f"retry: {retry}")
+        lines.append(f"data: {json.dumps(data)}")
+        return ("\n".join(lines) + "\n\n").encode()
+
+
+@asynccontextmanager
+async def async_connect_emulator(
+    hass: HomeAssistant, **kwargs: Any
+) -> AsyncGenerator[SmarterCloudEmulator]:
+    """
+    Run an emulator that the hubs created in the context connect to.
+
+    The hubs' transports share a session of their own, and the client threads of
+    the devices discovered through the emulator are stopped on exit. Needs sockets
+    to be enabled in tests.
+
+    Args:
+        kwargs: arguments for `SmarterCloudEmulator`
+    """
+    devices: list[BaseDevice] = []
+    # smarter_client logs fetched documents with a format that fails on dicts
+    logging.getLogger("smarter_client.domain.models").setLevel(logging.WARNING)
+
+    def _load_from_network(network, user_id: str) -> list[BaseDevice]:
+        loaded = list(load_from_network(network, user_id))
+        devices.extend(loaded)
+        return loaded
+
+    # The default resolver starts a thread that outlives the test
+    connector = TCPConnector(resolver=ThreadedResolver())
+    async with (
+        SmarterCloudEmulator(**kwargs) as cloud,
+        ClientSession(connector=connector) as session,
+    ):
+        with (
+            cloud.patch_client(),
+            patch(
+                "custom_components.smarter.smarter_hub.async_get_clientsession",
+                return_value=session,
+            ),
+            patch(
+                "custom_components.smarter.smarter_hub.load_from_network",
+                _load_from_network,
+            ),
+        ):
+            try:
+                yield cloud
+            finally:
+                await hass.async_add_executor_job(dispose_devices, devices)
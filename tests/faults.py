@@ -0,0 +1,111 @@
+"""
+Fault injection for the Smarter cloud emulator.
+
+A `FaultInjector` set as the emulator's `faults` delays, fails or stalls the
+requests it serves and cuts its status streams, at configurable rates. Faults apply
+to every client, i.e. to the blocking `smarter_client` calls as well as to the hub's
+transport.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+# Returns a latency in seconds, drawn with the given random generator
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def no_latency(rng: random.Random) -> float:
+    """Return no latency."""
+    return 0.0
+
+
+def constant(seconds: float) -> LatencyDistribution:
+    """Return a distribution that always adds `seconds`."""
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> LatencyDistribution:
+    """Return a distribution of latencies between `low` and `high` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> LatencyDistribution:
+    """Return a long-tailed distribution of latencies around `median` seconds."""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+@dataclass
+class FaultInjector:
+    """
+    Faults injected into the requests and streams of the emulator.
+
+    Each request first waits for a latency drawn from `latency`. It is then stalled
+    for `stall_time` seconds with probability `stall_rate`, and answered with a 503
+    or a 401 with probabilities `error_rate` and `auth_error_rate`. Only requests
+    whose path matches `paths` are affected. A status stream is cut after an event
+    with probability `drop_stream_rate`.
+
+    The injected faults are counted in `injected`, by kind.
+    """
+
+    latency: LatencyDistribution = no_latency
+    error_rate: float = 0.0
+    auth_error_rate: float = 0.0
+    stall_rate: float = 0.0
+    stall_time: float = 1.0
+    drop_stream_rate: float = 0.0
+    paths: str = ".*"
+    seed: int = 0
+    injected: dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Seed the random generator, so a scenario plays out the same every run."""
+        self._rng = random.Random(self.seed)
+        self._paths = re.compile(self.paths)
+
+    def _chance(self, rate: float, kind: str) -> bool:
+        if rate <= 0 or self._rng.random() >= rate:
+            return False
+
+        self.injected[kind] = self.injected.get(kind, 0) + 1
+        return True
+
+    def drop_stream(self) -> bool:
+        """Return whether a stream should be cut after the event it just sent."""
+        return self._chance(self.drop_stream_rate, "dropped_streams")
+
+    async def async_handle(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Serve a request with the configured faults."""
+        if not self._paths.search(request.path):
+            return await handler(request)
+
+        if (latency := self.latency(self._rng)) > 0:
+            await asyncio.sleep(latency)
+        if self._chance(self.stall_rate, "stalls"):
+            await asyncio.sleep(self.stall_time)
+        if self._chance(self.error_rate, "errors"):
+            raise web.HTTPServiceUnavailable(
+                text=json.dumps({"error": "Service unavailable"}),
+                content_type="application/json",
+            )
+        if self._chance(self.auth_error_rate, "auth_errors"):
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"error": "Permission denied"}),
+                content_type="application/json",
+            )
+
+        return await handler(request)
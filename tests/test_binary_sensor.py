@@ -1,7 +1,5 @@
 """Test Smarter Kettle and Coffee integration binary_sensors."""
 
-from unittest.mock import patch
-
 import pytest
 from custom_components.smarter.binary_sensor import (
     BINARY_SENSOR_TYPES,
@@ -39,21 +37,24 @@ def test_expected_binary_sensors(
     BINARY_SENSOR_TYPES,
     indirect=False,
 )
-def test_binary_sensor_values(
+async def test_binary_sensor_values(
     hass: HomeAssistant,
     bypass_get_data,
     init_integration: MockConfigEntry,
+    mock_device,
     data: SmarterBinarySensorEntityDescription,
 ):
     """Test binary sensor values."""
     entity = get_entity(
         hass, generate_unique_id(data.key), platform=Platform.BINARY_SENSOR
     )
-
-    device = entity.device
+    (on_status,) = mock_device.subscribe_status.call_args.args
 
     for value in data.state_on_values:
-        with patch.dict(device.status, {data.get_status_field: value}):
-            assert (
-                entity.is_on
-            ), f"expected entity {entity.unique_id} to be on when status is {value}"
+        # Values are derived once per status version, so push the status
+        mock_device.status = {**mock_device.status, data.get_status_field: value}
+        on_status(mock_device.status)
+        await hass.async_block_till_done()
+        assert entity.is_on, (
+            f"expected entity {entity.unique_id} to be on when status is {value}"
+        )
@@ -0,0 +1,79 @@
+"""Test Smarter Kettle and Coffee integration device capabilities."""
+
+from types import SimpleNamespace
+from typing import Any
+
+from custom_components.smarter.binary_sensor import BINARY_SENSOR_TYPES
+from custom_components.smarter.capabilities import (
+    KETTLE_PROFILE,
+    DeviceCapabilities,
+    supported_descriptions,
+)
+from custom_components.smarter.number import NUMBER_TYPES
+from custom_components.smarter.sensor import SENSOR_TYPES
+from homeassistant.const import Platform
+
+
+def _device(
+    device_type: str = "coffee",
+    model: str | None = None,
+    status: dict[str, Any] | None = None,
+    commands: dict[str, Any] | None = None,
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        type=device_type,
+        model=model,
+        status=status or {},
+        device=SimpleNamespace(commands=commands or {}),
+    )
+
+
+def test_unknown_device_supports_everything():
+    """Test that entities are only left out of devices known not to need them."""
+    capabilities = DeviceCapabilities(_device())
+
+    assert capabilities.status_keys is None
+    assert capabilities.commands is None
+    assert capabilities.supports("water_level", ("set_keep_warm_time",))
+
+
+def test_reported_status_and_commands():
+    """Test that a device without a profile supports what it reports."""
+    device = _device(
+        status={"state": "Idle", "boil_temperature": 95},
+        commands={"set_boil_temperature": 95},
+    )
+
+    sensors = supported_descriptions(Platform.SENSOR, device, SENSOR_TYPES)
+    assert [description.key for description in sensors] == [
+        "boil_temperature",
+        "state",
+    ]
+    numbers = supported_descriptions(Platform.NUMBER, device, NUMBER_TYPES)
+    assert [description.key for description in numbers] == ["boil_temperature"]
+    binary_sensors = supported_descriptions(
+        Platform.BINARY_SENSOR,
+        device,
+        BINARY_SENSOR_TYPES,
+        lambda description: description.get_status_field,
+    )
+    assert [description.key for description in binary_sensors] == [
+        "is_boiling",
+        "is_cooling",
+        "is_keep_warm",
+    ]
+
+
+def test_profile():
+    """Test that profiles declare keys a device has not reported yet."""
+    kettle = DeviceCapabilities(_device("kettle", status={"state": "Idle"}))
+    assert kettle.status_keys == KETTLE_PROFILE.status_keys
+    assert kettle.commands == KETTLE_PROFILE.commands
+
+    # The model's profile applies to devices of any type, and the command catalog
+    # of the device takes precedence
+    capabilities = DeviceCapabilities(
+        _device(model="SMKET01", commands={"start_boil": True})
+    )
+    assert capabilities.supports("water_level")
+    assert not capabilities.supports("state", ("start_boil", "stop_boil"))
@@ -0,0 +1,180 @@
+"""Test Smarter Kettle and Coffee integration command coalescer."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, call
+
+from custom_components.smarter.command_coalescer import CommandCoalescer
+from custom_components.smarter.rate_limiter import CommandPriority
+from custom_components.smarter.status import DeviceStatus, parse_status
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+INTERACTIVE = CommandPriority.INTERACTIVE
+
+
+def _make_device() -> MagicMock:
+    return MagicMock(id="kettle1", status={"boil_temperature": 99.0})
+
+
+def _get_status(device: MagicMock) -> DeviceStatus:
+    return parse_status(dict(device.status))
+
+
+async def _fire_debounce(hass: HomeAssistant) -> None:
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+
+async def test_latest_value_wins(hass: HomeAssistant):
+    """Test that rapid writes of a setting send only the final value."""
+    send_command = AsyncMock(return_value={"name": "-command1"})
+    coalescer = CommandCoalescer(hass, send_command, _get_status)
+    device = _make_device()
+
+    writes = [
+        hass.async_create_task(
+            coalescer.async_send(
+                device, "set_boil_temperature", "boil_temperature", value
+            )
+        )
+        for value in (90, 85, 80)
+    ]
+    await asyncio.sleep(0)
+    send_command.assert_not_called()
+
+    await _fire_debounce(hass)
+
+    send_command.assert_called_once_with(
+        device, "set_boil_temperature", 80, priority=INTERACTIVE
+    )
+    assert [await write for write in writes] == [{"name": "-command1"}] * 3
+    assert coalescer.saved_writes == 2
+
+
+async def test_most_urgent_lane_wins(hass: HomeAssistant):
+    """Test that a coalesced write is sent interactive if any caller was."""
+    send_command = AsyncMock()
+    coalescer = CommandCoalescer(hass, send_command, _get_status)
+    device = _make_device()
+
+    for value, priority in (
+        (90, CommandPriority.BACKGROUND),
+        (85, INTERACTIVE),
+        (80, CommandPriority.BACKGROUND),
+    ):
+        hass.async_create_task(
+            coalescer.async_send(
+                device, "set_boil_temperature", "boil_temperature", value, priority
+            )
+        )
+    await _fire_debounce(hass)
+
+    send_command.assert_called_once_with(
+        device, "set_boil_temperature", 80, priority=INTERACTIVE
+    )
+
+
+async def test_skips_value_in_status(hass: HomeAssistant):
+    """Test that a value the device already reports is not sent."""
+    send_command = AsyncMock()
+    coalescer = CommandCoalescer(hass, send_command, _get_status)
+    device = _make_device()
+
+    write = hass.async_create_task(
+        coalescer.async_send(device, "set_boil_temperature", "boil_temperature", 99)
+    )
+    await _fire_debounce(hass)
+
+    assert await write is None
+    send_command.assert_not_called()
+    assert coalescer.saved_writes == 1
+
+
+async def test_compares_to_write_in_flight(hass: HomeAssistant):
+    """Test that a value is compared to the last write, not a lagging status."""
+    sent = asyncio.Event()
+    release = asyncio.Event()
+
+    async def send_command(device, command_name, value, priority):
+        sent.set()
+        await release.wait()
+
+    send_command = AsyncMock(side_effect=send_command)
+    coalescer = CommandCoalescer(hass, send_command, _get_status)
+    device = MagicMock(id="kettle1", status={"boil_temperature": 100.0})
+
+    first = hass.async_create_task(
+        coalescer.async_send(device, "set_boil_temperature", "boil_temperature", 90)
+    )
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    async with asyncio.timeout(1):
+        await sent.wait()
+
+    # The status still reports 100 while 90 is in flight
+    second = hass.async_create_task(
+        coalescer.async_send(device, "set_boil_temperature", "boil_temperature", 100)
+    )
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert send_command.call_args_list == [
+        call(device, "set_boil_temperature", 90, priority=INTERACTIVE),
+        call(device, "set_boil_temperature", 100, priority=INTERACTIVE),
+    ]
+    assert coalescer.saved_writes == 0
+    # The lock of the setting is dropped once no write holds or waits for it
+    assert not coalescer._locks
+
+    # Once the status reports a change, it is the current value again
+    device.status["boil_temperature"] = 95.0
+    write = hass.async_create_task(
+        coalescer.async_send(device, "set_boil_temperature", "boil_temperature", 95)
+    )
+    await _fire_debounce(hass)
+
+    assert await write is None
+    assert send_command.call_count == 2
+
+
+async def test_settings_are_independent(hass: HomeAssistant):
+    """Test that writes of different settings are not coalesced."""
+    send_command = AsyncMock()
+    coalescer = CommandCoalescer(hass, send_command, _get_status)
+    device = _make_device()
+
+    hass.async_create_task(
+        coalescer.async_send(device, "set_boil_temperature", "boil_temperature", 90)
+    )
+    hass.async_create_task(
+        coalescer.async_send(device, "set_keep_warm_time", "keep_warm_time", 10)
+    )
+    await _fire_debounce(hass)
+
+    assert send_command.call_args_list == [
+        call(device, "set_boil_temperature", 90, priority=INTERACTIVE),
+        call(device, "set_keep_warm_time", 10, priority=INTERACTIVE),
+    ]
+    assert coalescer.saved_writes == 0
+
+
+async def test_errors_reach_callers(hass: HomeAssistant):
+    """Test that a failed write is raised to every coalesced caller."""
+    coalescer = CommandCoalescer(hass, AsyncMock(side_effect=ValueError), _get_status)
+    device = _make_device()
+
+    writes = [
+        hass.async_create_task(
+            coalescer.async_send(
+                device, "set_boil_temperature", "boil_temperature", value
+            )
+        )
+        for value in (90, 85)
+    ]
+    await _fire_debounce(hass)
+
+    for write in writes:
+        assert isinstance(write.exception(), ValueError)
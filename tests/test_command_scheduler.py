@@ -0,0 +1,69 @@
+"""Test Smarter Kettle and Coffee integration command scheduler."""
+
+import asyncio
+
+from custom_components.smarter.command_scheduler import CommandScheduler
+from custom_components.smarter.rate_limiter import CommandPriority, CommandRateLimiter
+from homeassistant.core import HomeAssistant
+
+
+def _make_scheduler(hass: HomeAssistant, max_concurrent: int) -> CommandScheduler:
+    return CommandScheduler(CommandRateLimiter(hass, burst=100), max_concurrent)
+
+
+async def test_device_commands_in_order(hass: HomeAssistant):
+    """Test that a device sees its commands in the order they were issued."""
+    scheduler = _make_scheduler(hass, 4)
+    release = asyncio.Event()
+    sent = []
+
+    async def send(name: str) -> str:
+        sent.append(name)
+        if name == "start_boil":
+            await release.wait()
+        return name
+
+    start = asyncio.create_task(
+        scheduler.async_run(
+            "kettle1", CommandPriority.BACKGROUND, lambda: send("start_boil")
+        )
+    )
+    stop = asyncio.create_task(
+        scheduler.async_run(
+            "kettle1", CommandPriority.INTERACTIVE, lambda: send("stop_boil")
+        )
+    )
+    await asyncio.sleep(0)
+
+    assert sent == ["start_boil"]
+    assert scheduler.lane_depth("kettle1") == 2
+
+    release.set()
+
+    assert await asyncio.gather(start, stop) == ["start_boil", "stop_boil"]
+    assert sent == ["start_boil", "stop_boil"]
+    assert scheduler.lane_depth("kettle1") == 0
+
+
+async def test_devices_run_concurrently(hass: HomeAssistant):
+    """Test that commands of different devices run concurrently, up to the cap."""
+    scheduler = _make_scheduler(hass, 2)
+    release = asyncio.Event()
+
+    async def send() -> None:
+        await release.wait()
+
+    tasks = [
+        asyncio.create_task(
+            scheduler.async_run(f"kettle{i}", CommandPriority.BACKGROUND, send)
+        )
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    assert scheduler.in_flight == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert scheduler.in_flight == 0
@@ -3,9 +3,15 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
-from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.const import (
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_STATUS_WINDOW,
+    DOMAIN,
+    MAX_STATUS_WINDOW,
+)
 from homeassistant import config_entries, data_entry_flow
 from homeassistant.const import CONF_USERNAME
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from .const import MOCK_CONFIG, MOCK_SESSION
 
@@ -106,3 +112,45 @@ async def test_failed_config_flow_error(hass, error_on_get_data):
 
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["errors"] == {"base": "cannot_connect"}
+
+
+async def test_options_flow(hass):
+    """Test that the options flow keeps options it does not show."""
+    entry = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG, options={CONF_STATUS_WINDOW: 0.1}
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_COMPACT_ATTRIBUTES: True}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert entry.options[CONF_STATUS_WINDOW] == 0.1
+    assert entry.options[CONF_COMPACT_ATTRIBUTES] is True
+    # The significance settings of the sensors default to their descriptions
+    assert entry.options["water_temperature_deadband"] == 1.0
+
+
+async def test_options_flow_status_window(hass):
+    """Test that the status window can be set within its bounds."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    for invalid in (-1, MAX_STATUS_WINDOW + 1):
+        with pytest.raises(data_entry_flow.InvalidData):
+            await hass.config_entries.options.async_configure(
+                result["flow_id"], user_input={CONF_STATUS_WINDOW: invalid}
+            )
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_STATUS_WINDOW: "0.5"}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert entry.options[CONF_STATUS_WINDOW] == 0.5
@@ -0,0 +1,241 @@
+"""Test Smarter Kettle and Coffee integration device cache."""
+
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.device_cache import CachedDevice
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from .const import MOCK_DEVICE, MOCK_DEVICE_ID, MOCK_DEVICE_NAME
+from .helpers import generate_unique_id, get_entity
+
+
+def _storage_key(entry: MockConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.devices"
+
+
+def _cached_device(device_id: str = MOCK_DEVICE_ID) -> dict[str, Any]:
+    return {
+        "id": device_id,
+        "type": MOCK_DEVICE["type"],
+        "friendly_name": MOCK_DEVICE_NAME,
+        "model": MOCK_DEVICE["model"],
+        "firmware_version": MOCK_DEVICE["firmware_version"],
+        "commands": {"start_boil": True, "stop_boil": 0},
+    }
+
+
+def _populate_cache(
+    hass_storage: dict[str, Any], entry: MockConfigEntry, devices: list[dict]
+) -> None:
+    hass_storage[_storage_key(entry)] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": _storage_key(entry),
+        "data": {"devices": devices},
+    }
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_saves_discovered_devices(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+):
+    """Test that discovered devices are saved to the cache."""
+    (device,) = hass_storage[_storage_key(init_integration)]["data"]["devices"]
+
+    assert device == {**_cached_device(), "commands": {}}
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+async def test_creates_entities_from_cache(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that entities are created from the cache before discovery finishes."""
+    _populate_cache(hass_storage, init_integration, [_cached_device()])
+
+    with patch(
+        "custom_components.smarter.smarter_hub.SmarterHub.authenticate",
+        side_effect=Exception,
+    ):
+        await hass.config_entries.async_setup(init_integration.entry_id)
+        await hass.async_block_till_done()
+
+    assert init_integration.state == ConfigEntryState.LOADED
+    entity = get_entity(hass, generate_unique_id("start_boil"), Platform.SWITCH)
+    assert isinstance(entity.device, CachedDevice)
+
+    device_entity = get_entity(hass, generate_unique_id(None))
+    commands = await device_entity.async_get_commands()
+    assert commands == [
+        {"name": "start_boil", "example": True},
+        {"name": "stop_boil", "example": 0},
+    ]
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_replaces_cached_devices(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that cached devices are swapped for live devices after discovery."""
+    _populate_cache(hass_storage, init_integration, [_cached_device()])
+
+    await hass.config_entries.async_setup(init_integration.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    entity = get_entity(hass, generate_unique_id("start_boil"), Platform.SWITCH)
+    assert entity.device is mock_device
+    assert hub.get_device_for_entity(entity.entity_id) is mock_device
+    assert mock_device.subscribe_status.call_count == 1
+    assert hass.states.get(entity.entity_id).state == "off"
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_reloads_when_devices_change(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+):
+    """Test that the entry is reloaded when discovery finds other devices."""
+    _populate_cache(hass_storage, init_integration, [_cached_device("old_kettle")])
+
+    with patch(
+        "homeassistant.config_entries.ConfigEntries.async_schedule_reload"
+    ) as schedule_reload:
+        await hass.config_entries.async_setup(init_integration.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    schedule_reload.assert_called_once_with(init_integration.entry_id)
+    (device,) = hass_storage[_storage_key(init_integration)]["data"]["devices"]
+    assert device["id"] == MOCK_DEVICE_ID
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_keeps_cache_when_networks_fail(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that a partial discovery keeps the cache and is retried in place."""
+    _populate_cache(hass_storage, init_integration, [_cached_device()])
+    failed_networks = [{"network1"}, set()]
+
+    async def discover_devices(hub, user):
+        hub.failed_networks = failed_networks.pop(0)
+        return [] if hub.failed_networks else [mock_device]
+
+    with (
+        patch(
+            "custom_components.smarter.smarter_hub.SmarterHub.discover_devices",
+            discover_devices,
+        ),
+        patch(
+            "homeassistant.config_entries.ConfigEntries.async_schedule_reload"
+        ) as schedule_reload,
+    ):
+        await hass.config_entries.async_setup(init_integration.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        (device,) = hass_storage[_storage_key(init_integration)]["data"]["devices"]
+        assert device["id"] == MOCK_DEVICE_ID
+        entity = get_entity(hass, generate_unique_id("start_boil"), Platform.SWITCH)
+        assert isinstance(entity.device, CachedDevice)
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=10))
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        # The retry swaps in the live device without recreating the entities
+        assert not failed_networks
+        assert entity.device is mock_device
+        schedule_reload.assert_not_called()
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+async def test_restores_device_status(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    init_integration: MockConfigEntry,
+):
+    """Test that entities report the last known status before discovery."""
+    _populate_cache(hass_storage, init_integration, [_cached_device()])
+    key = f"{DOMAIN}.{init_integration.entry_id}.status"
+    hass_storage[key] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": key,
+        "data": {MOCK_DEVICE_ID: {"state": "Boiling", "water_temperature": 64.5}},
+    }
+
+    with patch(
+        "custom_components.smarter.smarter_hub.SmarterHub.authenticate",
+        side_effect=Exception,
+    ):
+        await hass.config_entries.async_setup(init_integration.entry_id)
+        await hass.async_block_till_done()
+
+    entity = get_entity(hass, generate_unique_id("water_temperature"))
+    assert hass.states.get(entity.entity_id).state == "64.5"
+    entity = get_entity(hass, generate_unique_id("start_boil"), Platform.SWITCH)
+    assert hass.states.get(entity.entity_id).state == "on"
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_records_device_status(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that status changes are saved on a throttled schedule."""
+    key = f"{DOMAIN}.{init_integration.entry_id}.status"
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    mock_device.status = {**mock_device.status, "water_temperature": 90.0}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    assert key not in hass_storage
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+
+    status = hass_storage[key]["data"][MOCK_DEVICE_ID]
+    assert status["water_temperature"] == 90.0
+
+    mock_device.status = {**mock_device.status, "water_temperature": 95.0}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+    await hass.config_entries.async_unload(init_integration.entry_id)
+    await hass.async_block_till_done()
+
+    status = hass_storage[key]["data"][MOCK_DEVICE_ID]
+    assert status["water_temperature"] == 95.0
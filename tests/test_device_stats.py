@@ -0,0 +1,125 @@
+"""Test Smarter Kettle and Coffee integration device counters."""
+
+import math
+import time
+from datetime import timedelta
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.device_stats import DeviceStats, LatencyHistogram
+from custom_components.smarter.sensor import DIAGNOSTIC_SENSOR_TYPES
+from custom_components.smarter.transport import TransportError
+from homeassistant.const import STATE_UNKNOWN, EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from .const import MOCK_DEVICE_ID
+from .helpers import generate_unique_id, get_unique_id
+
+
+def test_latency_histogram():
+    """Test that percentiles are reported as bucket upper bounds."""
+    histogram = LatencyHistogram(bounds=(0.01, 0.1, 1.0))
+    assert histogram.percentile(50) is None
+
+    for latency in (0.005, 0.05, 0.05, 0.5):
+        histogram.add(latency)
+
+    assert histogram.percentile(0) == 0.01
+    assert histogram.percentile(50) == 0.1
+    assert histogram.percentile(95) == 1.0
+    histogram.add(5.0)
+    assert histogram.percentile(100) == math.inf
+
+
+async def test_push_rate(hass: HomeAssistant, freezer):
+    """Test that the push rate only counts pushes of the last minute."""
+    stats = DeviceStats()
+    stats.async_record_pushes(3, time.monotonic())
+    assert stats.status_pushes == 3
+    assert stats.last_status_push is not None
+
+    freezer.tick(timedelta(seconds=30))
+    stats.async_record_pushes(2, time.monotonic())
+    assert stats.status_pushes_per_minute == 5
+
+    freezer.tick(timedelta(seconds=45))
+    assert stats.status_pushes_per_minute == 2
+    assert stats.status_pushes == 5
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_device_counters(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+    mock_transport,
+):
+    """Test that pushes, state writes and commands are counted per device."""
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    stats = hub.get_device_stats(MOCK_DEVICE_ID)
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    mock_device.status = {**mock_device.status, "water_temperature": 81.0}
+    on_status(mock_device.status)
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    assert stats.status_pushes == 2
+    # The device sensor and the water temperature sensor depend on the key
+    assert stats.state_writes == 2
+    assert stats.state_update_time > 0
+
+    await hub.async_send_command(mock_device, "start_boil", True)
+    mock_transport.side_effect = TransportError("Smarter cloud returned 503")
+    with pytest.raises(TransportError):
+        await hub.async_send_command(mock_device, "start_boil", True)
+
+    assert (stats.commands, stats.command_errors) == (2, 1)
+    assert stats.command_latency.count == 2
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_diagnostic_sensors(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+    mock_transport,
+):
+    """Test that the diagnostic sensors are disabled by default and poll counters."""
+    registry = er.async_get(hass)
+    for description in DIAGNOSTIC_SENSOR_TYPES:
+        entity_id = get_unique_id(hass, generate_unique_id(description.key))
+        entry = registry.async_get(entity_id)
+        assert entry.entity_category is EntityCategory.DIAGNOSTIC
+        assert entry.disabled_by is er.RegistryEntryDisabler.INTEGRATION
+
+    commands_id = get_unique_id(hass, generate_unique_id("commands"))
+    latency_id = get_unique_id(hass, generate_unique_id("command_latency_p50"))
+    for entity_id in (commands_id, latency_id):
+        registry.async_update_entity(entity_id, disabled_by=None)
+    # The entry is reloaded once the registry settles
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=1))
+    await hass.async_block_till_done()
+
+    assert hass.states.get(commands_id).state == "0"
+    assert hass.states.get(latency_id).state == STATE_UNKNOWN
+
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    # The sensors skip only the status subscriptions of their base class
+    assert hub.get_device_for_entity(commands_id) is mock_device
+    await hub.async_send_command(mock_device, "start_boil", True)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=2))
+    await hass.async_block_till_done()
+
+    assert hass.states.get(commands_id).state == "1"
+    assert float(hass.states.get(latency_id).state) > 0
@@ -0,0 +1,130 @@
+"""Test Smarter Kettle and Coffee integration diagnostics."""
+
+import asyncio
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from custom_components.smarter.const import CONF_REFRESH_TOKEN, DOMAIN
+from custom_components.smarter.diagnostics import async_get_config_entry_diagnostics
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_dumps
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from .const import MOCK_DEVICE_ID
+from .emulator import SmarterCloudEmulator
+
+EMAIL = "kettle@example.com"
+PASSWORD = "secret"
+
+
+async def test_diagnostics(hass: HomeAssistant, smarter_cloud: SmarterCloudEmulator):
+    """Test that diagnostics are redacted and carry a performance snapshot."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    (kettle_id,) = smarter_cloud.add_kettles(user_id)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=EMAIL,
+        data={CONF_USERNAME: EMAIL, CONF_PASSWORD: PASSWORD},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    hub.rate_limiter.rate = 1000.0
+    device = hub.get_device(kettle_id)
+    await hub.async_send_command(device, "set_boil_temperature", 80)
+    async with asyncio.timeout(5):
+        while not hub.get_device_stats(kettle_id).status_pushes:
+            await asyncio.sleep(0.01)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    # Nothing that identifies the account is left
+    dump = json_dumps(diagnostics)
+    for secret in (EMAIL, PASSWORD, user_id, entry.data[CONF_REFRESH_TOKEN], "Home"):
+        assert secret not in dump
+    assert diagnostics["entry"]["title"] == REDACTED
+    assert diagnostics["account"]["networks"][0]["name"] == REDACTED
+
+    (device_data,) = diagnostics["devices"]
+    assert device_data["id"] == kettle_id
+    assert device_data["status"]["boil_temperature"] == 80
+    assert device_data["stream"] == {"watching": True, "active": True}
+    # The device sensor, the cache and the entities that watch a status key
+    assert device_data["listeners"] > 2
+    assert device_data["entities"]
+    assert device_data["stats"]["commands"] == 1
+    assert device_data["status_size"] > 0
+    assert device_data["stats"]["status_key_counts"]
+
+    performance = diagnostics["performance"]
+    assert performance["setup_timings"].keys() == {
+        "cache_load",
+        "authenticate",
+        "get_user",
+        "discover_devices",
+        "platforms",
+    }
+    assert len(performance["discovery_timings"]) == 1
+    assert performance["failed_networks"] == []
+    assert [event["event"] for event in performance["connection_history"]] == [
+        "signed_in"
+    ]
+    assert performance["commands"]["in_flight"] == 0
+    assert performance["commands"]["rate_limited"] == {
+        "interactive": 0,
+        "background": 0,
+    }
+    # The command above was sent in the background lane without waiting
+    assert performance["commands"]["rate_limit_waits"] == {
+        "interactive": {"p50": None, "p95": None},
+        "background": {"p50": 0.0, "p95": 0.0},
+    }
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+async def test_diagnostics_cached_devices(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    init_integration: MockConfigEntry,
+):
+    """Test diagnostics of an entry whose devices are restored from the cache."""
+    key = f"{DOMAIN}.{init_integration.entry_id}.devices"
+    hass_storage[key] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": key,
+        "data": {
+            "devices": [
+                {
+                    "id": MOCK_DEVICE_ID,
+                    "type": "kettle",
+                    "friendly_name": "Kettle",
+                    "model": None,
+                    "firmware_version": None,
+                    "commands": {},
+                }
+            ]
+        },
+    }
+    with patch(
+        "custom_components.smarter.smarter_hub.SmarterHub.authenticate",
+        side_effect=Exception("Smarter cloud is down"),
+    ):
+        await hass.config_entries.async_setup(init_integration.entry_id)
+        await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, init_integration)
+
+    assert diagnostics["account"] is None
+    (device_data,) = diagnostics["devices"]
+    assert device_data["id"] == MOCK_DEVICE_ID
+    assert device_data["cached"] is True
+    assert device_data["stream"] is None
+    (event,) = diagnostics["performance"]["connection_history"]
+    assert event["event"] == "discovery_failed"
+    assert event["error"] == "Smarter cloud is down"
+    assert "platforms" in diagnostics["performance"]["setup_timings"]
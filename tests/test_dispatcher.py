@@ -0,0 +1,183 @@
+"""Test Smarter Kettle and Coffee integration status dispatcher."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from .helpers import generate_unique_id, get_entity
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+def test_single_subscription_per_device(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that all entities of a device share one client subscription."""
+    assert mock_device.subscribe_status.call_count == 1
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_fan_out_to_changed_keys(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that only listeners of changed keys are woken up."""
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    temperature_listener = MagicMock()
+    state_listener = MagicMock()
+    all_listener = MagicMock()
+    hub.async_subscribe_status(
+        mock_device, temperature_listener, ("water_temperature",)
+    )
+    hub.async_subscribe_status(mock_device, state_listener, ("state",))
+    hub.async_subscribe_status(mock_device, all_listener)
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    mock_device.status = {**mock_device.status, "water_temperature": 81.0}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    temperature_listener.assert_called_once_with(frozenset(("water_temperature",)))
+    state_listener.assert_not_called()
+    all_listener.assert_called_once()
+
+    # identical push carries no changes
+    on_status(dict(mock_device.status))
+    mock_device.status = dict(mock_device.status)
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    assert temperature_listener.call_count == 1
+    assert all_listener.call_count == 1
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_ignores_other_devices(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that pushes for other devices are ignored."""
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    listener = MagicMock()
+    hub.async_subscribe_status(mock_device, listener)
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    on_status({"state": "Boiling"})
+    await hass.async_block_till_done()
+
+    listener.assert_not_called()
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_unsubscribe_on_unload(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that the client subscription is released with the last entity."""
+    await hass.config_entries.async_unload(init_integration.entry_id)
+    await hass.async_block_till_done()
+
+    assert mock_device.unsubscribe_status.call_count == 1
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_coalesces_pushes_within_tick(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that pushes within one loop iteration wake a listener once."""
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    listener = MagicMock()
+    hub.async_subscribe_status(mock_device, listener)
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    for temperature in (81.0, 82.0, 83.0):
+        mock_device.status = {**mock_device.status, "water_temperature": temperature}
+        on_status(mock_device.status)
+    mock_device.status = {**mock_device.status, "state": "Boiling"}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    listener.assert_called_once_with(frozenset(("water_temperature", "state")))
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_coalesces_pushes_within_window(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that pushes within the configured window wake a listener once."""
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    hub._dispatchers[mock_device.id].window = 1.0
+    listener = MagicMock()
+    hub.async_subscribe_status(mock_device, listener)
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    mock_device.status = {**mock_device.status, "water_temperature": 81.0}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+    mock_device.status = {**mock_device.status, "water_temperature": 82.0}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    listener.assert_not_called()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
+
+    listener.assert_called_once_with(frozenset(("water_temperature",)))
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_status_versions(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that changed snapshots get a new version, and memoized values too."""
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    entity = get_entity(hass, generate_unique_id(None))
+    (on_status,) = mock_device.subscribe_status.call_args.args
+    version = hub.get_status_version(mock_device.id)
+    attributes = entity.extra_state_attributes
+    assert entity.extra_state_attributes is attributes
+
+    on_status(dict(mock_device.status))
+    await hass.async_block_till_done()
+    assert hub.get_status_version(mock_device.id) == version
+    assert entity.extra_state_attributes is attributes
+
+    mock_device.status = {**mock_device.status, "water_temperature": 81.0}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+    assert hub.get_status_version(mock_device.id) > version
+    assert entity.extra_state_attributes["water_temperature"] == 81.0
+    assert hub.get_status_version("unknown") == 0
@@ -0,0 +1,166 @@
+"""Test Smarter Kettle and Coffee integration against the cloud emulator."""
+
+import asyncio
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.smarter_hub import SmarterHub
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    SERVICE_TURN_ON,
+    STATE_ON,
+    Platform,
+)
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from .emulator import SmarterCloudEmulator
+from .helpers import generate_unique_id, get_unique_id
+
+EMAIL = "kettle@example.com"
+PASSWORD = "secret"
+
+
+async def _wait_for(predicate, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+async def test_sign_in_and_refresh(hass: HomeAssistant, smarter_cloud):
+    """Test that the hub signs in and exchanges refresh tokens with the emulator."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    hub = SmarterHub(hass)
+
+    with pytest.raises(Exception, match="INVALID_PASSWORD"):
+        await hub.sign_in(EMAIL, "wrong")
+    session = await hub.sign_in(EMAIL, PASSWORD)
+    assert session.local_id == user_id
+
+    restored = await SmarterHub(hass).restore_session(session.refresh_token)
+    assert restored.local_id == user_id
+    assert await SmarterHub(hass).restore_session("unknown") is None
+    assert (smarter_cloud.sign_ins, smarter_cloud.refreshes) == (1, 1)
+
+
+async def test_discover_and_command(hass: HomeAssistant, smarter_cloud):
+    """Test that devices are discovered and commands change their status."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    (kettle_id,) = smarter_cloud.add_kettles(user_id)
+    hub = SmarterHub(hass)
+
+    user = await hub.get_user(await hub.sign_in(EMAIL, PASSWORD))
+    (device,) = await hub.discover_devices(user)
+    assert device.id == kettle_id
+    assert device.status["state"] == "Idle"
+    await _wait_for(lambda: smarter_cloud.stream_count == 1)
+
+    changes = []
+    hub.async_subscribe_status(device, changes.append, ("boil_temperature",))
+    response = await hub.async_send_command(device, "set_boil_temperature", 80)
+
+    assert response == {"name": smarter_cloud.commands[-1].name}
+    assert smarter_cloud.commands[-1].user_id == user_id
+    await _wait_for(lambda: changes)
+    assert device.status == smarter_cloud.devices[kettle_id]["status"]
+    hub.async_shutdown()
+
+
+async def test_expired_token_is_rejected(hass: HomeAssistant, smarter_cloud):
+    """Test that expired ID tokens are refused like by the cloud."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    smarter_cloud.add_kettles(user_id)
+    hub = SmarterHub(hass)
+    user = await hub.get_user(await hub.sign_in(EMAIL, PASSWORD))
+    (device,) = await hub.discover_devices(user)
+    await _wait_for(lambda: smarter_cloud.stream_count == 1)
+
+    smarter_cloud.expire_tokens()
+
+    with pytest.raises(Exception, match="401"):
+        await hub.async_send_command(device, "set_boil_temperature", 80)
+    hub.async_shutdown()
+
+
+async def test_boil_kettles(hass: HomeAssistant, smarter_cloud: SmarterCloudEmulator):
+    """Test that a switch boils a kettle, and scripted boils reach the states."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    kettle_ids = smarter_cloud.add_kettles(user_id, 3, keep_warm_time=5.0)
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_USERNAME: EMAIL, CONF_PASSWORD: PASSWORD}
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = hass.data[DOMAIN][entry.entry_id]["hub"]
+
+    switch_id = get_unique_id(
+        hass,
+        generate_unique_id("start_boil", kettle_ids[0], "kettle"),
+        Platform.SWITCH,
+    )
+    await hass.services.async_call(
+        Platform.SWITCH, SERVICE_TURN_ON, {ATTR_ENTITY_ID: switch_id}, blocking=True
+    )
+    assert smarter_cloud.commands[-1].command == "start_boil"
+    # Shown right away, and confirmed once the kettle reports it is boiling
+    assert hass.states.get(switch_id).state == STATE_ON
+    await _wait_for(lambda: hub.pending_commands.confirmed == 1)
+    assert hass.states.get(switch_id).state == STATE_ON
+
+    await smarter_cloud.async_boil(kettle_ids, step=40, interval=0.01)
+    sensor_ids = [
+        get_unique_id(
+            hass, generate_unique_id("water_temperature", kettle_id, "kettle")
+        )
+        for kettle_id in kettle_ids
+    ]
+    await _wait_for(
+        lambda: all(
+            hass.states.get(sensor_id).state == "100.0" for sensor_id in sensor_ids
+        )
+    )
+    assert smarter_cloud.stream_count == 3
+
+
+async def test_unload_stops_streams(hass: HomeAssistant, smarter_cloud):
+    """Test that the status streams of the devices end when the entry unloads."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    smarter_cloud.add_kettles(user_id, 2)
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_USERNAME: EMAIL, CONF_PASSWORD: PASSWORD}
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    await _wait_for(lambda: smarter_cloud.stream_count == 2)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    await _wait_for(lambda: smarter_cloud.stream_count == 0)
+
+
+async def test_shared_devices_stream_once(hass: HomeAssistant, smarter_cloud):
+    """Test that entries of one account share a status stream per device."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    smarter_cloud.add_kettles(user_id, 3)
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN, data={CONF_USERNAME: EMAIL, CONF_PASSWORD: PASSWORD}
+        )
+        for _ in range(2)
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    # The devices the second entry discovered are dropped for the shared ones
+    await _wait_for(lambda: smarter_cloud.stream_count == 3)
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+    await _wait_for(lambda: smarter_cloud.stream_count == 0)
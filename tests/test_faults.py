@@ -0,0 +1,311 @@
+"""Test how the Smarter hub copes with a slow or flaky cloud."""
+
+import asyncio
+import gc
+import time
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pytest
+from custom_components.smarter.smarter_hub import MAX_DISCOVERY_WORKERS, SmarterHub
+from custom_components.smarter.transport import TransportError
+from homeassistant.core import HomeAssistant
+
+from .emulator import SmarterCloudEmulator
+from .faults import FaultInjector, constant, lognormal
+
+EMAIL = "kettle@example.com"
+PASSWORD = "secret"
+
+# Seconds the hub waits for a database request in these tests
+REQUEST_TIMEOUT = 0.2
+
+# Commands sent to each device per batch in `test_command_faults`
+COMMAND_ROUNDS = 10
+
+# Modules whose objects must not pile up as requests fail
+LIVE_OBJECT_MODULES = (
+    "custom_components.smarter",
+    "asyncio",
+    "_asyncio",
+    "aiohttp.client",
+)
+
+
+@dataclass
+class ExecutorUsage:
+    """Executor jobs of hass, in flight and at the peak."""
+
+    in_flight: int = 0
+    peak: int = 0
+
+
+@contextmanager
+def track_executor(hass: HomeAssistant) -> Generator[ExecutorUsage]:
+    """Count the executor jobs hass runs in the context."""
+    usage = ExecutorUsage()
+    add_executor_job = hass.async_add_executor_job
+
+    def _done(_future) -> None:
+        usage.in_flight -= 1
+
+    def counting_add_executor_job(target, *args):
+        usage.in_flight += 1
+        usage.peak = max(usage.peak, usage.in_flight)
+        future = add_executor_job(target, *args)
+        future.add_done_callback(_done)
+        return future
+
+    hass.async_add_executor_job = counting_add_executor_job
+    try:
+        yield usage
+    finally:
+        del hass.async_add_executor_job
+
+
+def _live_objects() -> Counter[str]:
+    """Count the live objects of the integration, asyncio and the aiohttp client."""
+    gc.collect()
+    live = Counter()
+    for obj in gc.get_objects():
+        # The loop drops cancelled timers lazily
+        if isinstance(obj, asyncio.TimerHandle) and obj.cancelled():
+            continue
+        module = vars(type(obj)).get("__module__")
+        if isinstance(module, str) and module.startswith(LIVE_OBJECT_MODULES):
+            live[f"{module}.{type(obj).__qualname__}"] += 1
+
+    return live
+
+
+async def _wait_for(predicate, timeout: float = 5) -> float:
+    """Wait until `predicate` holds and return the seconds it took."""
+    start = time.monotonic()
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+    return time.monotonic() - start
+
+
+async def _connect(
+    hass: HomeAssistant, cloud: SmarterCloudEmulator, kettles: int = 1
+) -> tuple[SmarterHub, list]:
+    """Return a hub signed in to the emulator, and its discovered devices."""
+    user_id = cloud.add_user(EMAIL, PASSWORD)
+    cloud.add_kettles(user_id, kettles)
+    hub = SmarterHub(hass, request_timeout=REQUEST_TIMEOUT)
+    # Send every command right away, the rate limiter is tested on its own
+    hub.rate_limiter.rate = 1000.0
+    hub.rate_limiter.burst = 1000
+    user = await hub.get_user(await hub.sign_in(EMAIL, PASSWORD))
+    devices = await hub.discover_devices(user)
+    await _wait_for(lambda: cloud.stream_count == kettles)
+    return hub, devices
+
+
+async def test_discovery_with_latency(hass: HomeAssistant, smarter_cloud):
+    """Test that slow networks are loaded with a bounded number of threads."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    for _ in range(7):
+        smarter_cloud.add_kettles(
+            user_id, 3, network_id=smarter_cloud.add_network(user_id)
+        )
+    smarter_cloud.faults = FaultInjector(latency=lognormal(0.02))
+    hub = SmarterHub(hass)
+
+    with track_executor(hass) as usage:
+        start = time.monotonic()
+        user = await hub.get_user(await hub.sign_in(EMAIL, PASSWORD))
+        devices = await hub.discover_devices(user)
+        elapsed = time.monotonic() - start
+
+    assert len(devices) == 21
+    assert usage.peak <= MAX_DISCOVERY_WORKERS
+    assert usage.in_flight == 0
+    # 4 requests per kettle in 2 waves of networks, with some slack for the tail
+    assert elapsed < 5
+    await _wait_for(lambda: smarter_cloud.stream_count == 21)
+
+
+async def test_sign_in_stall(hass: HomeAssistant, smarter_cloud):
+    """Test that a stalled sign-in times out, and the next sign-in recovers."""
+    smarter_cloud.add_user(EMAIL, PASSWORD)
+    smarter_cloud.faults = FaultInjector(
+        stall_rate=1, stall_time=1, paths="verifyPassword"
+    )
+    hub = SmarterHub(hass, request_timeout=REQUEST_TIMEOUT)
+
+    with track_executor(hass) as usage:
+        start = time.monotonic()
+        with pytest.raises(TransportError, match="timed out"):
+            await hub.sign_in(EMAIL, PASSWORD)
+        stalled = time.monotonic() - start
+
+        smarter_cloud.faults = None
+        start = time.monotonic()
+        assert await hub.sign_in(EMAIL, PASSWORD)
+        recovered = time.monotonic() - start
+
+    assert REQUEST_TIMEOUT <= stalled < REQUEST_TIMEOUT + 0.3
+    assert recovered < REQUEST_TIMEOUT
+    assert usage.peak == 1
+    assert hub.connection_history[0]["event"] == "sign_in_failed"
+
+
+async def test_discovery_stall(hass: HomeAssistant, smarter_cloud):
+    """Test that a stalled network is skipped once its request times out."""
+    user_id = smarter_cloud.add_user(EMAIL, PASSWORD)
+    smarter_cloud.add_kettles(user_id, 2)
+    stalled_network = smarter_cloud.add_network(user_id)
+    smarter_cloud.add_kettles(user_id, 2, network_id=stalled_network)
+    hub = SmarterHub(hass, request_timeout=REQUEST_TIMEOUT)
+    user = await hub.get_user(await hub.sign_in(EMAIL, PASSWORD))
+    smarter_cloud.faults = FaultInjector(
+        stall_rate=1, stall_time=1, paths=f"^/networks/{stalled_network}"
+    )
+
+    with track_executor(hass) as usage:
+        start = time.monotonic()
+        devices = await hub.discover_devices(user)
+        elapsed = time.monotonic() - start
+
+    assert len(devices) == 2
+    assert REQUEST_TIMEOUT <= hub.discovery_timings[stalled_network] < 0.8
+    assert elapsed < 0.8
+    assert usage.in_flight == 0
+
+
+@pytest.mark.parametrize(
+    "faults",
+    [
+        FaultInjector(error_rate=0.5, paths="/commands/"),
+        FaultInjector(auth_error_rate=0.5, paths="/commands/"),
+        FaultInjector(stall_rate=0.2, stall_time=0.4, paths="/commands/"),
+    ],
+    ids=["server_errors", "auth_errors", "stalls"],
+)
+async def test_command_faults(
+    hass: HomeAssistant, smarter_cloud, faults: FaultInjector
+):
+    """
+    Test that failed commands raise and leave nothing behind.
+
+    Commands do not use the executor, their failures are raised within the request
+    timeout, and the hub sends commands again as soon as the cloud recovers.
+    """
+    hub, devices = await _connect(hass, smarter_cloud, kettles=5)
+    smarter_cloud.faults = faults
+
+    async def send_commands(rounds: int) -> list:
+        return await asyncio.gather(
+            *(
+                hub.async_send_command(device, "set_boil_temperature", 80)
+                for _ in range(rounds)
+                for device in devices
+            ),
+            return_exceptions=True,
+        )
+
+    with track_executor(hass) as usage:
+        start = time.monotonic()
+        results = await send_commands(COMMAND_ROUNDS)
+        elapsed = time.monotonic() - start
+        injected = dict(faults.injected)
+
+        # Memory must not grow with the number of failed commands. The emulator
+        # holds on to stalled requests until their stall is over.
+        await send_commands(COMMAND_ROUNDS)
+        await asyncio.sleep(faults.stall_time if faults.stall_rate else 0)
+        before = _live_objects()
+        batch_failures = sum(
+            isinstance(result, Exception)
+            for result in await send_commands(COMMAND_ROUNDS)
+        )
+        await asyncio.sleep(faults.stall_time if faults.stall_rate else 0)
+        growth = _live_objects() - before
+
+        smarter_cloud.faults = None
+        start = time.monotonic()
+        await hub.async_send_command(devices[0], "set_boil_temperature", 90)
+        recovered = time.monotonic() - start
+
+    failures = [result for result in results if isinstance(result, Exception)]
+    assert failures
+    assert all(isinstance(failure, TransportError) for failure in failures)
+    # Every injected fault fails its command, and only injected errors fail with
+    # an HTTP error. On a busy machine, requests can time out before the cloud
+    # answers them, with an error or not.
+    timeouts = sum("timed out" in str(failure) for failure in failures)
+    errors = injected.get("errors", 0) + injected.get("auth_errors", 0)
+    assert len(failures) >= errors + injected.get("stalls", 0)
+    assert len(failures) - timeouts <= errors
+    # Commands are sent in order per device, so a batch takes at most one timeout
+    # per round, with slack for a busy machine
+    assert elapsed < COMMAND_ROUNDS * (REQUEST_TIMEOUT + 0.1)
+    assert recovered < REQUEST_TIMEOUT + 0.1
+    assert usage.peak == 0
+    assert hub.command_scheduler.in_flight == 0
+    assert all(hub.command_scheduler.lane_depth(device.id) == 0 for device in devices)
+    assert hub.rate_limiter.queue_depth == 0
+    # Pooled connections come and go, but nothing may be left per failure
+    assert all(count < batch_failures / 2 for count in growth.values()), growth
+    hub.async_shutdown()
+
+
+async def test_stalled_command_times_out(hass: HomeAssistant, smarter_cloud):
+    """Test that a stalled command fails after the request timeout."""
+    hub, (device,) = await _connect(hass, smarter_cloud)
+    smarter_cloud.faults = FaultInjector(stall_rate=1, stall_time=1, paths="/commands/")
+
+    start = time.monotonic()
+    with pytest.raises(TransportError, match="timed out"):
+        await hub.async_send_command(device, "set_boil_temperature", 80)
+
+    assert REQUEST_TIMEOUT <= time.monotonic() - start < REQUEST_TIMEOUT + 0.3
+    hub.async_shutdown()
+
+
+async def test_dropped_streams(hass: HomeAssistant, smarter_cloud):
+    """Test that dropped status streams reconnect and deliver pushes again."""
+    hub, devices = await _connect(hass, smarter_cloud, kettles=5)
+    changes = {device.id: [] for device in devices}
+    for device in devices:
+        hub.async_subscribe_status(device, changes[device.id].append)
+    # Every stream is cut right after the next event it sends
+    smarter_cloud.faults = FaultInjector(drop_stream_rate=1)
+
+    for round_ in range(3):
+        for device in devices:
+            smarter_cloud.set_status(device.id, {"water_temperature": 30.0 + round_})
+
+        await _wait_for(
+            lambda round_=round_: all(
+                len(device_changes) == round_ + 1 for device_changes in changes.values()
+            )
+        )
+        # The clients reconnect after the retry delay sent with the first event
+        recovery = await _wait_for(lambda: smarter_cloud.stream_count == 5)
+        assert recovery < 1
+
+    assert smarter_cloud.faults.injected["dropped_streams"] == 15
+    hub.async_shutdown()
+
+
+async def test_latency_distribution(hass: HomeAssistant, smarter_cloud):
+    """Test that latency is added to every affected request."""
+    hub, (device,) = await _connect(hass, smarter_cloud)
+    smarter_cloud.faults = FaultInjector(
+        latency=constant(0.1), paths="/set_boil_temperature"
+    )
+
+    start = time.monotonic()
+    await hub.async_send_command(device, "set_boil_temperature", 80)
+    assert 0.1 <= time.monotonic() - start < REQUEST_TIMEOUT
+
+    start = time.monotonic()
+    await hub.async_send_command(device, "set_keep_warm_time", 5)
+    assert time.monotonic() - start < 0.1
+    hub.async_shutdown()
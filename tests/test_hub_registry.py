@@ -0,0 +1,62 @@
+"""Test Smarter Kettle and Coffee integration hub registry."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from custom_components.smarter.const import DATA_HUBS, DOMAIN
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from .const import MOCK_CONFIG, MOCK_DEVICE
+
+
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_entries_share_account_hub(hass: HomeAssistant, bypass_get_data):
+    """Test that entries of one account share a hub and its devices."""
+    devices = [MagicMock(**MOCK_DEVICE), MagicMock(**MOCK_DEVICE)]
+    entries = [MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG) for _ in devices]
+
+    with patch(
+        "custom_components.smarter.smarter_hub.SmarterHub.discover_devices",
+        side_effect=[[device] for device in devices],
+    ):
+        for entry in entries:
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+
+    registry = hass.data[DOMAIN][DATA_HUBS]
+    first, second = (hass.data[DOMAIN][entry.entry_id] for entry in entries)
+    assert first["hub"] is second["hub"]
+    assert second["devices"] == [devices[0]]
+    assert registry.entry_count("test_username") == 2
+
+    await hass.config_entries.async_unload(entries[0].entry_id)
+    await hass.async_block_till_done()
+
+    assert registry.entry_count("test_username") == 1
+    assert second["hub"].get_device(devices[0].id) is devices[0]
+    devices[0].unsubscribe_status.assert_not_called()
+
+    await hass.config_entries.async_unload(entries[1].entry_id)
+    await hass.async_block_till_done()
+
+    assert registry.entry_count("test_username") == 0
+    devices[0].unsubscribe_status.assert_called_once()
+    devices[1].subscribe_status.assert_not_called()
+
+
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_accounts_use_own_hubs(hass: HomeAssistant, bypass_get_data):
+    """Test that entries of different accounts do not share a hub."""
+    entries = [
+        MockConfigEntry(domain=DOMAIN, data={**MOCK_CONFIG, "username": username})
+        for username in ("first", "second")
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    first, second = (hass.data[DOMAIN][entry.entry_id] for entry in entries)
+    assert first["hub"] is not second["hub"]
@@ -1,11 +1,20 @@
 """Test Smarter Kettle and Coffee integration setup process."""
 
+from unittest.mock import patch
+
 import pytest
-from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.const import (
+    CONF_REFRESH_TOKEN,
+    DATA_FLOW_HUBS,
+    DOMAIN,
+)
+from custom_components.smarter.smarter_hub import SmarterHub
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from .const import MOCK_CONFIG
+
 
 @pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
 @pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
@@ -65,3 +74,54 @@ async def test_async_reload_entry(
     # Unload
     await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_setup_restores_refresh_token(
+    hass: HomeAssistant,
+    bypass_get_data,
+    mock_session,
+):
+    """Test that setup restores the stored session instead of signing in."""
+    mock_session.refresh_token = "rotated_token"
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={**MOCK_CONFIG, CONF_REFRESH_TOKEN: "stored_token"}
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.smarter.smarter_hub.SmarterHub.restore_session",
+        return_value=mock_session,
+    ) as restore_session:
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    restore_session.assert_called_once_with("stored_token")
+    assert not SmarterHub.sign_in.called
+    assert entry.data[CONF_REFRESH_TOKEN] == "rotated_token"
+
+
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_setup_reuses_config_flow_session(
+    hass: HomeAssistant,
+    bypass_get_data,
+    mock_session,
+):
+    """Test that the first setup reuses the hub signed in by the config flow."""
+    hub = SmarterHub(hass)
+    hub.session = mock_session
+    hass.data.setdefault(DOMAIN, {})[DATA_FLOW_HUBS] = {mock_session.refresh_token: hub}
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**MOCK_CONFIG, CONF_REFRESH_TOKEN: mock_session.refresh_token},
+    )
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    assert hass.data[DOMAIN][entry.entry_id]["hub"] is hub
+    assert not SmarterHub.sign_in.called
+    assert hass.data[DOMAIN][DATA_FLOW_HUBS] == {}
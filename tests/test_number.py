@@ -3,6 +3,7 @@
 from unittest.mock import call
 
 import pytest
+from custom_components.smarter.const import DOMAIN
 from custom_components.smarter.number import (
     NUMBER_TYPES,
     SmarterNumberEntityDescription,
@@ -42,6 +43,7 @@ async def test_number_services(
     hass: HomeAssistant,
     bypass_get_data,
     init_integration: MockConfigEntry,
+    mock_transport,
     description: SmarterNumberEntityDescription,
 ):
     """Test sensor entity services."""
@@ -50,7 +52,7 @@ async def test_number_services(
     value = description.native_max_value
     entity: SmarterSensor = get_entity(hass, unique_id, platform=Platform.NUMBER)
     device = entity.device
-    device.send_command.return_value = "executed"
+    hass.data[DOMAIN][init_integration.entry_id]["hub"].command_coalescer.delay = 0
 
     await hass.services.async_call(
         Platform.NUMBER,
@@ -59,7 +61,7 @@ async def test_number_services(
         blocking=True,
     )
 
-    # Assert that the command was invoked with the correct args
-    handler = getattr(device, f"set_{key}")
-    assert handler.called
-    assert handler.call_args == call(value)
+    # Assert that the command was sent with the correct args
+    assert mock_transport.call_args == call(
+        "mock_id_token", device.id, f"set_{key}", device.user_id, value
+    )
@@ -0,0 +1,98 @@
+"""Test Smarter Kettle and Coffee integration optimistic state."""
+
+from datetime import timedelta
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.smarter_hub import SmarterHub
+from homeassistant.components.number import ATTR_VALUE, SERVICE_SET_VALUE
+from homeassistant.components.switch import SERVICE_TURN_ON
+from homeassistant.const import ATTR_ENTITY_ID, Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from .helpers import generate_unique_id, get_unique_id
+
+
+async def _turn_on_boil(hass: HomeAssistant) -> str:
+    entity_id = get_unique_id(hass, generate_unique_id("start_boil"), Platform.SWITCH)
+    await hass.services.async_call(
+        Platform.SWITCH, SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id}, blocking=True
+    )
+    return entity_id
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_switch_confirmed(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that a switch shows its new state until the device confirms it."""
+    hub: SmarterHub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    entity_id = await _turn_on_boil(hass)
+
+    assert hass.states.get(entity_id).state == "on"
+    assert hub.pending_commands.get(mock_device.id, "state") is not None
+
+    (on_status,) = mock_device.subscribe_status.call_args.args
+    mock_device.status = {**mock_device.status, "state": "Boiling"}
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == "on"
+    assert hub.pending_commands.get(mock_device.id, "state") is None
+    assert hub.pending_commands.confirmed == 1
+    assert len(hub.pending_commands.confirm_latencies) == 1
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_switch_rolled_back(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that a switch rolls back when the device does not confirm its state."""
+    hub: SmarterHub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    entity_id = await _turn_on_boil(hass)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == "off"
+    assert hub.pending_commands.rolled_back == 1
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_failed_command_discarded(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_transport,
+):
+    """Test that the optimistic value is dropped when a command fails."""
+    hub: SmarterHub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    hub.command_coalescer.delay = 0
+    mock_transport.side_effect = ValueError
+    entity_id = get_unique_id(
+        hass, generate_unique_id("boil_temperature"), Platform.NUMBER
+    )
+
+    with pytest.raises(ValueError):
+        await hass.services.async_call(
+            Platform.NUMBER,
+            SERVICE_SET_VALUE,
+            {ATTR_ENTITY_ID: entity_id, ATTR_VALUE: 80},
+            blocking=True,
+        )
+
+    assert hass.states.get(entity_id).state == "99.0"
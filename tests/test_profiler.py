@@ -0,0 +1,80 @@
+"""Test Smarter Kettle and Coffee integration profile service."""
+
+import asyncio
+import pstats
+from pathlib import Path
+
+import pytest
+from custom_components.smarter.const import DOMAIN, SERVICE_PROFILE
+from custom_components.smarter.profiler import integration_stats
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+PACKAGE_DIR = "/config/custom_components/smarter"
+
+
+def test_integration_stats():
+    """Test that stats keep the integration's functions and their direct callees."""
+    ours = (f"{PACKAGE_DIR}/entity.py", 10, "_on_state_update")
+    write = ("/homeassistant/helpers/entity.py", 20, "async_write_ha_state")
+    other = ("/homeassistant/components/light/__init__.py", 30, "turn_on")
+    stats = {
+        ours: (2, 2, 0.1, 0.5, {}),
+        write: (5, 5, 1.0, 1.5, {ours: (2, 2, 0.4, 0.4), other: (3, 3, 0.6, 1.1)}),
+        other: (3, 3, 0.2, 1.3, {}),
+    }
+
+    assert integration_stats(stats, PACKAGE_DIR) == {
+        ours: (2, 2, 0.1, 0.5, {}),
+        write: (2, 2, 0.4, 0.4, {ours: (2, 2, 0.4, 0.4)}),
+    }
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_profile_service(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+    tmp_path: Path,
+):
+    """Test that a profile of the status path is written to the config directory."""
+    hass.config.config_dir = str(tmp_path)
+    (on_status,) = mock_device.subscribe_status.call_args.args
+    profile = hass.async_create_task(
+        hass.services.async_call(
+            DOMAIN,
+            SERVICE_PROFILE,
+            {"seconds": 0.2},
+            blocking=True,
+            return_response=True,
+        )
+    )
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HomeAssistantError, match="already being taken"):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_PROFILE, {"seconds": 1}, blocking=True
+        )
+
+    for temperature in (81.0, 82.0):
+        mock_device.status = {**mock_device.status, "water_temperature": temperature}
+        on_status(mock_device.status)
+        await asyncio.sleep(0)
+    response = await profile
+
+    summary = Path(response["summary"])
+    assert summary.parent == tmp_path
+    assert "_on_state_update" in summary.read_text()
+    stats = pstats.Stats(response["stats"]).stats
+    functions = {name: counts for (_, _, name), counts in stats.items()}
+    assert functions["_on_state_update"][1] == 4
+    assert functions["async_write_ha_state"][1] == 4
+    assert "native_value" in functions
+    # Nothing outside the integration, unless called by it
+    assert all(
+        file.startswith(str(Path(__file__).parents[1] / "custom_components")) or callers
+        for (file, _, _), (*_, callers) in stats.items()
+    )
@@ -0,0 +1,81 @@
+"""Test Smarter Kettle and Coffee integration command rate limiter."""
+
+import asyncio
+
+from custom_components.smarter.rate_limiter import CommandPriority, CommandRateLimiter
+from homeassistant.core import HomeAssistant
+
+
+async def test_burst_is_not_delayed(hass: HomeAssistant):
+    """Test that commands within the burst are sent right away."""
+    limiter = CommandRateLimiter(hass, rate=1, burst=3)
+
+    for _ in range(3):
+        assert await limiter.async_acquire(CommandPriority.BACKGROUND) == 0
+
+    assert limiter.queue_depth == 0
+
+
+async def test_interactive_lane_first(hass: HomeAssistant):
+    """Test that waiting interactive commands overtake background commands."""
+    limiter = CommandRateLimiter(hass, rate=50, burst=1)
+    order = []
+
+    async def send(name: str, priority: CommandPriority) -> None:
+        await limiter.async_acquire(priority)
+        order.append(name)
+
+    await send("first", CommandPriority.BACKGROUND)
+    tasks = [
+        asyncio.create_task(send(f"background{i}", CommandPriority.BACKGROUND))
+        for i in range(3)
+    ]
+    tasks.append(asyncio.create_task(send("interactive", CommandPriority.INTERACTIVE)))
+    await asyncio.sleep(0)
+
+    assert limiter.queue_depth == 4
+    assert limiter.queue_depths() == {
+        CommandPriority.INTERACTIVE: 1,
+        CommandPriority.BACKGROUND: 3,
+    }
+
+    await asyncio.gather(*tasks)
+
+    assert order == [
+        "first",
+        "interactive",
+        "background0",
+        "background1",
+        "background2",
+    ]
+    assert limiter.queue_depth == 0
+    assert max(limiter.wait_times[CommandPriority.BACKGROUND]) > 0
+
+
+async def test_cancelled_waiter(hass: HomeAssistant):
+    """Test that a cancelled command leaves its lane."""
+    limiter = CommandRateLimiter(hass, rate=50, burst=1)
+    await limiter.async_acquire(CommandPriority.BACKGROUND)
+
+    task = asyncio.create_task(limiter.async_acquire(CommandPriority.BACKGROUND))
+    await asyncio.sleep(0)
+    task.cancel()
+    await asyncio.sleep(0)
+
+    assert limiter.queue_depth == 0
+    assert await limiter.async_acquire(CommandPriority.INTERACTIVE) > 0
+
+
+async def test_wait_time_percentile(hass: HomeAssistant):
+    """Test that percentiles are taken from the recent wait times of a lane."""
+    limiter = CommandRateLimiter(hass)
+    assert limiter.wait_time_percentile(CommandPriority.INTERACTIVE, 50) is None
+
+    limiter.wait_times[CommandPriority.INTERACTIVE].extend(
+        [0.4, 0.0, 0.1, 0.3, 0.2, 0.0, 0.0, 0.0, 0.0, 1.0]
+    )
+
+    assert limiter.wait_time_percentile(CommandPriority.INTERACTIVE, 50) == 0.0
+    assert limiter.wait_time_percentile(CommandPriority.INTERACTIVE, 80) == 0.3
+    assert limiter.wait_time_percentile(CommandPriority.INTERACTIVE, 95) == 1.0
+    assert limiter.wait_time_percentile(CommandPriority.BACKGROUND, 95) is None
@@ -5,6 +5,7 @@ from unittest.mock import call
 
 import pytest
 from custom_components.smarter.const import (
+    CONF_COMPACT_ATTRIBUTES,
     DOMAIN,
     SERVICE_ATTR_COMMAND_DATA_BOOLEAN,
     SERVICE_ATTR_COMMAND_DATA_NUMBER,
@@ -18,6 +19,7 @@ from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from .const import MOCK_DEVICE_NAME
 from .helpers import generate_unique_id, get_entity, get_unique_id
 
 
@@ -75,13 +77,14 @@ async def test_sensor_services(
     hass: HomeAssistant,
     bypass_get_data,
     init_integration: MockConfigEntry,
+    mock_transport,
     service_data: SimpleNamespace,
 ):
     """Test sensor entity services."""
     unique_id = generate_unique_id(None)
     entity: SmarterSensor = get_entity(hass, unique_id)
     device = entity.device
-    device.send_command.return_value = "executed"
+    mock_transport.return_value = "executed"
 
     result = await hass.services.async_call(
         DOMAIN,
@@ -96,9 +99,11 @@ async def test_sensor_services(
 
     # Assert that the command was invoked with the correct args
     # and returned expected result
-    assert device.send_command.called
-    assert device.send_command.call_args == call(
+    assert mock_transport.call_args == call(
+        "mock_id_token",
+        device.id,
         service_data.data[SERVICE_ATTR_COMMAND_NAME],
+        device.user_id,
         service_data.data[service_data.data_key],
     )
     assert result == {entity.entity_id: "executed"}
@@ -120,3 +125,73 @@ def test_expected_sensors(
     """Test that the expected sensor entities are created."""
     entity_id = get_unique_id(hass, expected_unique_id)
     assert entity_id is not None, f"sensor {expected_unique_id} should exist"
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+def test_device_sensor_attributes(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that the device sensor shows every status key, but records few."""
+    entity = get_entity(hass, generate_unique_id("device"))
+    state = hass.states.get(entity.entity_id)
+
+    assert state.attributes["water_temperature"] == 80.0
+    assert state.attributes["boil_temperature"] == 99.0
+    unrecorded = state.state_info["unrecorded_attributes"]
+    assert {"water_temperature", "target_temperature", "state"} <= unrecorded
+    assert "boil_temperature" not in unrecorded
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_compact_attributes(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that compact attribute mode only shows the stable status keys."""
+    hass.config_entries.async_update_entry(
+        init_integration, options={CONF_COMPACT_ATTRIBUTES: True}
+    )
+    await hass.config_entries.async_setup(init_integration.entry_id)
+    await hass.async_block_till_done()
+
+    entity = get_entity(hass, generate_unique_id("device"))
+    assert hass.states.get(entity.entity_id).attributes == {
+        "device_id": mock_device.id,
+        "device_model": "TEST_KETTLE1",
+        "boil_temperature": 99.0,
+        "keep_warm_time": 5.0,
+        "friendly_name": MOCK_DEVICE_NAME,
+        "icon": "mdi:kettle",
+        "supported_features": entity.supported_features,
+    }
+    assert "water_temperature" not in entity.status_keys
+
+    sensor = get_entity(hass, generate_unique_id("water_temperature"))
+    assert hass.states.get(sensor.entity_id).attributes.keys() >= {"device_id"}
+    assert "kettle_is_present" not in hass.states.get(sensor.entity_id).attributes
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+def test_device_info_memoized(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that the device info is built again only when the firmware changes."""
+    entity = get_entity(hass, generate_unique_id("water_temperature"))
+    assert entity.unique_id == generate_unique_id("water_temperature")
+    device_info = entity.device_info
+    assert entity.device_info is device_info
+
+    mock_device.firmware_version = "1.0.0"
+    assert entity.device_info is not device_info
+    assert entity.device_info["sw_version"] == "1.0.0"
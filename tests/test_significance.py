@@ -0,0 +1,105 @@
+"""Test Smarter Kettle and Coffee integration significance filtering."""
+
+from datetime import timedelta
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.significance import (
+    SignificanceFilter,
+    SignificanceSettings,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from .const import MOCK_DEVICE_ID
+from .helpers import generate_unique_id, get_unique_id
+
+
+def test_deadband_and_hysteresis():
+    """Test that small changes, and small reversals, are not significant."""
+    significance = SignificanceFilter(
+        SignificanceSettings(deadband=1.0, relative_deadband=2.0, hysteresis=1.0)
+    )
+    assert significance.is_significant(None)
+    significance.publish(20.0, 0)
+
+    assert not significance.is_significant(20.5)
+    assert significance.is_significant(21.0)
+    # Rounding does not hide a change of exactly the deadband
+    rounded = SignificanceFilter(SignificanceSettings(deadband=1.0))
+    rounded.publish(31.3, 0)
+    assert rounded.is_significant(32.3)
+    significance.publish(21.0, 0)
+    # Reversing needs the deadband and the hysteresis
+    assert not significance.is_significant(20.0)
+    assert significance.is_significant(19.0)
+    # Above 50, the relative deadband is larger
+    significance.publish(100.0, 0)
+    assert not significance.is_significant(101.5)
+    assert significance.is_significant(102.0)
+    assert significance.is_significant(None)
+
+
+def test_min_interval():
+    """Test that a value may only be published once the interval has passed."""
+    significance = SignificanceFilter(SignificanceSettings(min_interval=10))
+    assert significance.publish_delay(0) == 0
+    significance.publish(20.0, 100)
+
+    assert significance.is_significant(20.1)
+    assert significance.publish_delay(104) == 6
+    assert significance.publish_delay(110) == 0
+
+
+def test_settings_options():
+    """Test that options override the settings of a description."""
+    settings = SignificanceSettings(deadband=1.0, hysteresis=1.0)
+    options = {"water_level_deadband": 3, "water_temperature_min_interval": 5}
+
+    assert settings.with_options("water_level", options) == SignificanceSettings(
+        deadband=3.0, hysteresis=1.0
+    )
+    assert not SignificanceSettings().enabled
+
+
+@pytest.mark.parametrize("init_integration", [(True,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_sensor_significance(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that the sensor writes significant changes and counts the others."""
+    hass.config_entries.async_update_entry(
+        init_integration, options={"water_temperature_min_interval": 10}
+    )
+    await hass.config_entries.async_setup(init_integration.entry_id)
+    await hass.async_block_till_done()
+    entity_id = get_unique_id(hass, generate_unique_id("water_temperature"))
+    stats = hass.data[DOMAIN][init_integration.entry_id]["hub"].get_device_stats(
+        MOCK_DEVICE_ID
+    )
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    async def push(water_temperature: float) -> str:
+        mock_device.status = {
+            **mock_device.status,
+            "water_temperature": water_temperature,
+        }
+        on_status(mock_device.status)
+        await hass.async_block_till_done()
+        return hass.states.get(entity_id).state
+
+    # Jitter within the deadband
+    assert await push(80.5) == "80.0"
+    # Too soon after setup, and published once the interval has passed
+    assert await push(83.0) == "80.0"
+    assert stats.suppressed_updates == 2
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "83.0"
@@ -0,0 +1,175 @@
+"""Test Smarter Kettle and Coffee integration hub."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.smarter_hub import DeviceNotFoundError, SmarterHub
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from requests import Response
+from requests.exceptions import HTTPError
+
+from .const import MOCK_DEVICE_ID
+from .helpers import generate_unique_id, get_unique_id
+
+
+def _make_device(device_id: str) -> MagicMock:
+    return MagicMock(id=device_id, status={})
+
+
+async def test_device_index(hass: HomeAssistant):
+    """Test that devices are indexed per entry and by id."""
+    hub = SmarterHub(hass)
+    devices = [_make_device(f"kettle{i}") for i in range(3)]
+    hub.async_register_devices("entry1", devices)
+    hub.async_register_devices("entry2", [_make_device("coffee")])
+
+    assert hub.get_devices("entry1") == devices
+    assert hub.get_device("kettle1") is devices[1]
+    assert hub._get_device("kettle2", "entry1") is devices[2]
+    with pytest.raises(DeviceNotFoundError):
+        hub._get_device("coffee", "entry1")
+
+    hub.async_unregister_devices("entry1")
+
+    assert hub.get_devices("entry1") == []
+    with pytest.raises(DeviceNotFoundError):
+        hub.get_device("kettle1")
+    assert hub.get_device("coffee").id == "coffee"
+
+
+async def test_send_command_unknown_device(hass: HomeAssistant):
+    """Test that commands to unknown devices are reported as not found."""
+    hub = SmarterHub(hass)
+    hub.async_register_devices("entry1", [_make_device("kettle0")])
+
+    assert await hub.send_command("missing", "entry1", "start_boil", True) == (
+        "not found"
+    )
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_entity_index(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that entities are indexed by their device while loaded."""
+    hub: SmarterHub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    entity_id = get_unique_id(
+        hass, generate_unique_id("start_boil"), platform=Platform.SWITCH
+    )
+
+    assert hub.get_device_for_entity(entity_id) is mock_device
+    assert entity_id in hub.get_entity_ids(MOCK_DEVICE_ID)
+    assert hub.get_device(MOCK_DEVICE_ID) is mock_device
+    assert list(hub.get_commands(MOCK_DEVICE_ID, init_integration.entry_id)) == []
+
+    await hass.config_entries.async_unload(init_integration.entry_id)
+    await hass.async_block_till_done()
+
+    assert hub.get_entity_ids(MOCK_DEVICE_ID) == []
+    with pytest.raises(DeviceNotFoundError):
+        hub.get_device_for_entity(entity_id)
+    with pytest.raises(DeviceNotFoundError):
+        hub.get_device(MOCK_DEVICE_ID)
+
+
+async def test_restore_session(hass: HomeAssistant, mock_hub, mock_session):
+    """Test that a stored refresh token is exchanged for a session."""
+    mock_hub.client.refresh.return_value = mock_session
+
+    session = await mock_hub.authenticate("user", "password", "stored_token")
+
+    assert session is mock_session
+    assert mock_hub.session is mock_session
+    assert mock_hub.client.session.refresh_token == "stored_token"
+    mock_hub.client.sign_in.assert_not_called()
+
+
+def _token_error(status_code: int) -> HTTPError:
+    """Return an error like the one pyrebase raises for a failed token request."""
+    response = Response()
+    response.status_code = status_code
+    return HTTPError(HTTPError(response=response), '{"error": "TOKEN_EXPIRED"}')
+
+
+@pytest.mark.parametrize("status_code", [400, 401])
+async def test_restore_session_rejected(
+    hass: HomeAssistant, mock_hub, mock_session, status_code: int
+):
+    """Test that a rejected refresh token falls back to password sign-in."""
+    mock_hub.client.refresh.side_effect = _token_error(status_code)
+
+    session = await mock_hub.authenticate("user", "password", "stored_token")
+
+    assert session is mock_session
+    mock_hub.client.sign_in.assert_called_once_with("user", "password")
+
+
+@pytest.mark.parametrize(
+    "error", [_token_error(503), ConnectionError("Network is unreachable")]
+)
+async def test_restore_session_failed(hass: HomeAssistant, mock_hub, error: Exception):
+    """Test that a token request that fails for other reasons is raised."""
+    mock_hub.client.refresh.side_effect = error
+
+    with pytest.raises(type(error)):
+        await mock_hub.authenticate("user", "password", "stored_token")
+
+    mock_hub.client.sign_in.assert_not_called()
+
+
+async def test_discover_devices_concurrently(hass: HomeAssistant, mock_hub):
+    """Test that networks are discovered in order and failures are isolated."""
+    networks = {f"network{i}": MagicMock(identifier=f"network{i}") for i in range(4)}
+    user = MagicMock(identifier="user", networks=networks)
+    devices = {
+        "network0": [_make_device("kettle0"), _make_device("kettle1")],
+        "network2": [_make_device("kettle2")],
+        "network3": [],
+    }
+
+    def load_from_network(network, user_id):
+        if network.identifier == "network1":
+            raise ConnectionError
+        return iter(devices[network.identifier])
+
+    with patch(
+        "custom_components.smarter.smarter_hub.load_from_network",
+        side_effect=load_from_network,
+    ):
+        result = await mock_hub.discover_devices(user)
+
+    assert [device.id for device in result] == ["kettle0", "kettle1", "kettle2"]
+    assert set(mock_hub.discovery_timings) == set(networks)
+    assert mock_hub.failed_networks == {"network1"}
+
+
+async def test_id_token_refresh(hass: HomeAssistant, mock_hub: SmarterHub):
+    """Test that the ID token is only refreshed when it expires soon."""
+    mock_hub.client.token = "token1"
+    mock_hub.client.session.expires_in = 3000
+
+    assert await mock_hub._async_id_token() == "token1"
+    mock_hub.client.refresh.assert_not_called()
+
+    mock_hub.client.session.expires_in = 10
+
+    await mock_hub._async_id_token()
+    mock_hub.client.refresh.assert_called_once()
+
+
+async def test_send_command_unsupported(hass: HomeAssistant, mock_transport):
+    """Test that unsupported commands are rejected before a request is made."""
+    hub = SmarterHub(hass)
+    device = _make_device("kettle0")
+    device.device.commands = {}
+
+    with pytest.raises(ValueError):
+        await hub.async_send_command(device, "start_boil", True)
+    mock_transport.assert_not_called()
@@ -0,0 +1,73 @@
+"""Test Smarter Kettle and Coffee integration status snapshots."""
+
+import dataclasses
+
+import pytest
+from custom_components.smarter.status import DeviceStatus, KettleState, parse_status
+from homeassistant.const import STATE_UNKNOWN, Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from .helpers import generate_unique_id, get_unique_id
+
+
+def test_parse_status():
+    """Test that known keys are typed, and missing or invalid values are None."""
+    raw = {
+        "device_model": "SMKET01",
+        "state": "Keeping Warm",
+        "water_temperature": 80,
+        "water_level": "n/a",
+        "calibrated": True,
+        "alarm": 5,
+    }
+    status = parse_status(raw, 3)
+
+    assert status.version == 3
+    assert status.state is KettleState.KEEPING_WARM
+    assert status.water_temperature == 80.0
+    assert isinstance(status.water_temperature, float)
+    assert status.water_level is None
+    assert status.keep_warm_time is None
+    assert status.calibrated is True
+    assert status.get("water_temperature") == 80.0
+    assert status.get("keep_warm_time", 0) == 0
+    assert status.get("alarm") == 5
+    assert parse_status({"state": "Descaling"}).state == "Descaling"
+
+
+def test_status_is_immutable():
+    """Test that a snapshot cannot be changed by its readers."""
+    status = parse_status({"state": "Idle"})
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        status.state = KettleState.BOILING
+    with pytest.raises(TypeError):
+        status.raw["state"] = "Boiling"
+    assert not hasattr(DeviceStatus(), "__dict__")
+
+
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+async def test_missing_value(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_device,
+):
+    """Test that an entity shows a key the device stops reporting as unknown."""
+    entity_id = get_unique_id(
+        hass, generate_unique_id("keep_warm_time"), Platform.NUMBER
+    )
+    assert hass.states.get(entity_id).state == "5.0"
+    (on_status,) = mock_device.subscribe_status.call_args.args
+
+    mock_device.status = {
+        key: value
+        for key, value in mock_device.status.items()
+        if key != "keep_warm_time"
+    }
+    on_status(mock_device.status)
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == STATE_UNKNOWN
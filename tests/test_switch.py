@@ -4,12 +4,14 @@ from types import SimpleNamespace
 from unittest.mock import call
 
 import pytest
+from custom_components.smarter.const import DOMAIN
+from custom_components.smarter.rate_limiter import CommandPriority
 from custom_components.smarter.sensor import SmarterSensor
 from custom_components.smarter.switch import SWITCH_TYPES
 from homeassistant.components.switch import SERVICE_TURN_OFF, SERVICE_TURN_ON
 from homeassistant.const import ATTR_ENTITY_ID, Platform
-from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.core import Context, HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry, MockUser
 
 from .helpers import generate_unique_id, get_entity, get_unique_id
 
@@ -47,13 +49,13 @@ async def test_switch_services(
     hass: HomeAssistant,
     bypass_get_data,
     init_integration: MockConfigEntry,
+    mock_transport,
     service_data: SimpleNamespace,
 ):
     """Test sensor entity services."""
     unique_id = generate_unique_id(service_data.switch_key)
     entity: SmarterSensor = get_entity(hass, unique_id, platform=Platform.SWITCH)
     device = entity.device
-    device.send_command.return_value = "executed"
 
     await hass.services.async_call(
         Platform.SWITCH,
@@ -64,11 +66,9 @@ async def test_switch_services(
         blocking=True,
     )
 
-    # Assert that the command was invoked with the correct args
-    assert device.send_command.called
-    assert device.send_command.call_args == call(
-        service_data.on_command,
-        True,
+    # Assert that the command was sent with the correct args
+    assert mock_transport.call_args == call(
+        "mock_id_token", device.id, service_data.on_command, device.user_id, True
     )
 
     await hass.services.async_call(
@@ -80,8 +80,45 @@ async def test_switch_services(
         blocking=True,
     )
 
-    assert device.send_command.called
-    assert device.send_command.call_args == call(
-        service_data.off_command,
-        True,
+    assert mock_transport.call_args == call(
+        "mock_id_token", device.id, service_data.off_command, device.user_id, True
     )
+
+
+@pytest.mark.parametrize("bypass_get_data", [{}], indirect=True)
+@pytest.mark.parametrize("init_integration", [(False,)], indirect=True)
+@pytest.mark.parametrize(
+    ("by_user", "priority"),
+    [(True, CommandPriority.INTERACTIVE), (False, CommandPriority.BACKGROUND)],
+    ids=["user", "automation"],
+)
+async def test_command_priority(
+    hass: HomeAssistant,
+    bypass_get_data,
+    init_integration: MockConfigEntry,
+    mock_transport,
+    hass_admin_user: MockUser,
+    by_user: bool,
+    priority: CommandPriority,
+):
+    """Test that commands of users are interactive, and of automations are not."""
+    # Automations run under a context of their own, without a user
+    context = (
+        Context(user_id=hass_admin_user.id)
+        if by_user
+        else Context(parent_id="automation1")
+    )
+    hub = hass.data[DOMAIN][init_integration.entry_id]["hub"]
+    entity_id = get_unique_id(hass, generate_unique_id("start_boil"), Platform.SWITCH)
+
+    await hass.services.async_call(
+        Platform.SWITCH,
+        SERVICE_TURN_ON,
+        service_data={ATTR_ENTITY_ID: entity_id},
+        blocking=True,
+        context=context,
+    )
+
+    assert {
+        lane: len(waits) for lane, waits in hub.rate_limiter.wait_times.items()
+    } == {lane: int(lane == priority) for lane in CommandPriority}
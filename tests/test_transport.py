@@ -0,0 +1,61 @@
+"""Test Smarter Kettle and Coffee integration transport."""
+
+import asyncio
+
+import pytest
+from aiohttp import ClientSession, TCPConnector, ThreadedResolver, web
+from aiohttp.test_utils import TestServer
+from custom_components.smarter.transport import SmarterTransport, TransportError
+
+
+@pytest.fixture
+async def requests() -> list[web.Request]:
+    """Return the requests received by the stand-in server."""
+    return []
+
+
+@pytest.fixture
+async def transport(requests: list, socket_enabled):
+    """Return a transport connected to a local stand-in for the Smarter API."""
+
+    async def handle_command(request: web.Request) -> web.Response:
+        requests.append((request, await request.json()))
+        if request.match_info["device_id"] == "slow":
+            await asyncio.sleep(1)
+        if request.match_info["device_id"] == "denied":
+            raise web.HTTPUnauthorized
+
+        return web.json_response({"name": "-command1"})
+
+    app = web.Application()
+    app.router.add_post("/devices/{device_id}/commands/{command}.json", handle_command)
+
+    # The default resolver starts a thread that outlives the test
+    connector = TCPConnector(resolver=ThreadedResolver())
+    async with (
+        TestServer(app, host="127.0.0.1") as server,
+        ClientSession(connector=connector) as session,
+    ):
+        yield SmarterTransport(session, str(server.make_url("/")), timeout=0.1)
+
+
+async def test_send_command(transport: SmarterTransport, requests: list):
+    """Test that commands are pushed to the command's path."""
+    response = await transport.send_command(
+        "token", "kettle1", "set_boil_temperature", "user1", 90
+    )
+
+    assert response == {"name": "-command1"}
+    ((request, body),) = requests
+    assert request.path == "/devices/kettle1/commands/set_boil_temperature.json"
+    assert request.query["auth"] == "token"
+    assert body == {"user_id": "user1", "value": 90}
+
+
+@pytest.mark.parametrize("device_id", ["slow", "denied"])
+async def test_request_errors(transport: SmarterTransport, device_id: str):
+    """Test that timeouts and HTTP errors are raised as `TransportError`."""
+    with pytest.raises(TransportError):
+        await transport.send_command(
+            "token", device_id, "set_boil_temperature", "user1", 90
+        )